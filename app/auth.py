@@ -2,15 +2,204 @@
 auth.py - Authentication module.
 
 Berisi fungsi login untuk administrator dan pelanggan.
-Password dicek menggunakan hash SHA2-256 sesuai implementasi di database.
+Password diverifikasi di Python (lihat security.py): hash PBKDF2 untuk data
+baru, serta hex SHA2-256 dan password plain untuk data lama. Password lama
+di-hash ulang otomatis setelah login berhasil.
 """
 
 from __future__ import annotations
-from typing import Any, Dict, Optional
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
 from mysql.connector import MySQLConnection
-from .db import fetch_all
 
+from .db import DatabaseError, execute, fetch_all
+from .security import hash_password, legacy_sha256, needs_rehash, verify_password
+
+# Panjang minimal kolom password agar hash PBKDF2 muat.
+MIN_HASH_COLUMN_LENGTH = 128
+
+_PRINCIPALS = {
+    "admin": {
+        "table": "user",
+        "id_column": "id_user",
+        "select": "SELECT id_user, username, nama_admin, id_level, password FROM user WHERE username = %s",
+        "allow_plain": False,
+    },
+    "pelanggan": {
+        "table": "pelanggan",
+        "id_column": "id_pelanggan",
+        "select": (
+            "SELECT id_pelanggan, username, nama_pelanggan, nomor_kwh, id_tarif, password "
+            "FROM pelanggan WHERE username = %s"
+        ),
+        "allow_plain": True,
+    },
+}
+
+
+# =====================
+# CACHE USERNAME TIDAK DIKENAL
+# =====================
+class UnknownUsernameCache:
+    """
+    LRU username yang tidak terdaftar, dengan masa berlaku per entri.
+
+    Dipakai untuk meredam percobaan login massal dengan username acak:
+    username yang baru saja terbukti tidak ada langsung ditolak tanpa query.
+
+    Cache ini per proses: akun baru hanya dihapus dari cache di proses yang
+    membuatnya, sehingga di worker lain username tersebut tetap ditolak
+    sampai entrinya kedaluwarsa. Karena itu cache nonaktif secara default
+    (ttl 0) dan tidak dipakai jika rate limit login per username aktif.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 60.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def __contains__(self, username: str) -> bool:
+        key = username.lower()
+        with self._lock:
+            expires_at = self._data.get(key)
+            if expires_at is None:
+                return False
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return False
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True
+
+    def add(self, username: str) -> None:
+        if self.ttl <= 0:
+            return
+        key = username.lower()
+        with self._lock:
+            self._data[key] = time.monotonic() + self.ttl
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, username: str) -> None:
+        with self._lock:
+            self._data.pop(username.lower(), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+unknown_usernames = UnknownUsernameCache(ttl=0)
+
+
+def forget_unknown_username(username: str) -> None:
+    """Dipanggil saat username baru dibuat agar bisa langsung login."""
+    unknown_usernames.discard(username)
+
+
+# =====================
+# PENYIMPANAN HASH
+# =====================
+_storage_ready: Optional[bool] = None
+_storage_lock = threading.Lock()
+
+
+def password_storage_ready(conn: MySQLConnection) -> bool:
+    """
+    Mengecek (sekali per proses) apakah kolom password cukup panjang untuk PBKDF2.
+
+    Jika belum (misal masih CHAR(64) untuk SHA2), hash baru tetap memakai
+    SHA2-256 dan rehash saat login dilewati sampai kolom diperbesar:
+        ALTER TABLE user MODIFY password VARCHAR(255);
+        ALTER TABLE pelanggan MODIFY password VARCHAR(255);
+
+    Args:
+        conn: Koneksi MySQL.
+
+    Returns:
+        True jika hash PBKDF2 bisa disimpan.
+    """
+    global _storage_ready
+    if _storage_ready is not None:
+        return _storage_ready
+    with _storage_lock:
+        if _storage_ready is None:
+            rows = fetch_all(
+                conn,
+                """
+                SELECT TABLE_NAME AS table_name, CHARACTER_MAXIMUM_LENGTH AS panjang
+                FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND TABLE_NAME IN ('user', 'pelanggan')
+                  AND COLUMN_NAME = 'password'
+                """,
+            )
+            _storage_ready = len(rows) == 2 and all(
+                int(row["panjang"] or 0) >= MIN_HASH_COLUMN_LENGTH for row in rows
+            )
+    return _storage_ready
+
+
+def make_password_hash(conn: MySQLConnection, password_plain: str) -> str:
+    """
+    Membuat hash password untuk disimpan (PBKDF2 jika kolom mendukung).
 
+    Args:
+        conn: Koneksi MySQL.
+        password_plain: Password plain.
+
+    Returns:
+        String hash untuk kolom password.
+    """
+    if password_storage_ready(conn):
+        return hash_password(password_plain)
+    return legacy_sha256(password_plain)
+
+
+def _upgrade_hash(
+    conn: MySQLConnection, role: str, row_id: int, stored: str, password_plain: str
+) -> None:
+    if not needs_rehash(stored) or not password_storage_ready(conn):
+        return
+    spec = _PRINCIPALS[role]
+    try:
+        # Syarat password = nilai lama mencegah menimpa password yang baru
+        # saja diganti oleh request lain.
+        execute(
+            conn,
+            f"UPDATE {spec['table']} SET password = %s WHERE {spec['id_column']} = %s AND password = %s",
+            (hash_password(password_plain), row_id, stored),
+        )
+    except DatabaseError:
+        # Login tetap berhasil; rehash dicoba lagi di login berikutnya.
+        pass
+
+
+def _login(
+    conn: MySQLConnection, role: str, username: str, password_plain: str
+) -> Optional[Dict[str, Any]]:
+    spec = _PRINCIPALS[role]
+    rows = fetch_all(conn, spec["select"], (username,))
+    if not rows:
+        return None
+    row = dict(rows[0])
+    stored = row.pop("password")
+    if not verify_password(password_plain, stored, allow_plain=spec["allow_plain"]):
+        return None
+    _upgrade_hash(conn, role, int(row[spec["id_column"]]), stored, password_plain)
+    return row
+
+
+# =====================
+# LOGIN
+# =====================
 def login_admin(
     conn: MySQLConnection, username: str, password_plain: str
 ) -> Optional[Dict[str, Any]]:
@@ -20,21 +209,12 @@ def login_admin(
     Args:
         conn: Koneksi MySQL.
         username: Username admin.
-        password_plain: Password input (plain), akan di-hash di query.
+        password_plain: Password input (plain), diverifikasi di Python.
 
     Returns:
         Dict data admin jika valid, atau None jika gagal login.
     """
-    rows = fetch_all(
-        conn,
-        """
-        SELECT id_user, username, nama_admin, id_level
-        FROM user
-        WHERE username = %s AND password = SHA2(%s, 256)
-        """,
-        (username, password_plain),
-    )
-    return rows[0] if rows else None
+    return _login(conn, "admin", username, password_plain)
 
 
 def login_pelanggan(
@@ -46,19 +226,64 @@ def login_pelanggan(
     Args:
         conn: Koneksi MySQL.
         username: Username pelanggan.
-        password_plain: Password input (plain), akan di-hash di query.
+        password_plain: Password input (plain), diverifikasi di Python.
 
     Returns:
         Dict data pelanggan jika valid, atau None jika gagal login.
     """
-    rows = fetch_all(
+    return _login(conn, "pelanggan", username, password_plain)
+
+
+def authenticate(
+    conn: MySQLConnection, username: str, password_plain: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Login admin atau pelanggan dengan satu query.
+
+    Data kredensial admin dan pelanggan diambil sekaligus lewat UNION ALL
+    (masing-masing memakai index username). Jika username terdaftar di
+    keduanya, admin dicek lebih dulu seperti alur login sebelumnya.
+    Username yang tidak ditemukan disimpan sementara di `unknown_usernames`.
+
+    Args:
+        conn: Koneksi MySQL.
+        username: Username admin atau pelanggan.
+        password_plain: Password input (plain).
+
+    Returns:
+        Dict berisi role ("admin"/"pelanggan"), id, username, dan nama;
+        None jika gagal login.
+    """
+    if not username or username in unknown_usernames:
+        return None
+
+    rows: List[Dict[str, Any]] = fetch_all(
         conn,
         """
-        SELECT id_pelanggan, username, nama_pelanggan, nomor_kwh, id_tarif
+        SELECT 'admin' AS role, id_user AS id, username, nama_admin AS nama, password
+        FROM user
+        WHERE username = %s
+        UNION ALL
+        SELECT 'pelanggan' AS role, id_pelanggan AS id, username, nama_pelanggan AS nama, password
         FROM pelanggan
         WHERE username = %s
-          AND (password = SHA2(%s, 256) OR password = %s)
+        ORDER BY role
         """,
-        (username, password_plain, password_plain),
+        (username, username),
     )
-    return rows[0] if rows else None
+    if not rows:
+        unknown_usernames.add(username)
+        return None
+
+    for row in rows:
+        role = row["role"]
+        stored = row["password"]
+        if verify_password(password_plain, stored, allow_plain=_PRINCIPALS[role]["allow_plain"]):
+            _upgrade_hash(conn, role, int(row["id"]), stored, password_plain)
+            return {
+                "role": role,
+                "id": int(row["id"]),
+                "username": row["username"],
+                "nama": row["nama"],
+            }
+    return None
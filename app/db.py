@@ -7,8 +7,17 @@ untuk aplikasi pembayaran listrik pascabayar.
 
 from __future__ import annotations
 
+import keyword
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque, namedtuple
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
 
 import mysql.connector
 from mysql.connector import MySQLConnection
@@ -63,12 +72,284 @@ def get_connection(cfg: DBConfig) -> MySQLConnection:
         raise DatabaseError(f"Gagal koneksi database: {exc}") from exc
 
 
+# =====================
+# CACHE PREPARED STATEMENT
+# =====================
+ER_UNKNOWN_STMT_HANDLER = 1243
+
+
+class StatementCache:
+    """
+    LRU cursor prepared (server-side) untuk satu koneksi.
+
+    Cursor disimpan berdasarkan teks SQL sehingga statement yang sama hanya
+    di-parse sekali oleh server. Jika koneksi tersambung ulang (connection_id
+    berubah), semua statement lama tidak berlaku dan cache dikosongkan.
+    """
+
+    def __init__(self, conn: MySQLConnection, maxsize: int = 64) -> None:
+        self.conn = conn
+        self.maxsize = maxsize
+        self._cursors: "OrderedDict[Tuple[str, bool], Any]" = OrderedDict()
+        self._connection_id = getattr(conn, "connection_id", None)
+        self.hits = 0
+        self.misses = 0
+
+    def cursor(self, query: str, dictionary: bool) -> Any:
+        """
+        Mengambil cursor prepared untuk query, membuat baru jika belum ada.
+
+        Args:
+            query: Teks SQL.
+            dictionary: True untuk cursor yang menghasilkan dict.
+
+        Returns:
+            Cursor prepared milik koneksi.
+        """
+        connection_id = getattr(self.conn, "connection_id", None)
+        if connection_id != self._connection_id:
+            self.clear()
+            self._connection_id = connection_id
+
+        key = (query, dictionary)
+        cur = self._cursors.get(key)
+        if cur is not None:
+            self._cursors.move_to_end(key)
+            self.hits += 1
+            return cur
+
+        self.misses += 1
+        cur = self.conn.cursor(prepared=True, dictionary=dictionary)
+        self._cursors[key] = cur
+        if len(self._cursors) > self.maxsize:
+            _, evicted = self._cursors.popitem(last=False)
+            _close_quietly(evicted)
+        return cur
+
+    def discard(self, query: str, dictionary: bool) -> None:
+        """Membuang cursor untuk query (misal setelah error statement)."""
+        cur = self._cursors.pop((query, dictionary), None)
+        if cur is not None:
+            _close_quietly(cur)
+
+    def clear(self) -> None:
+        """Menutup dan membuang semua cursor di cache."""
+        cursors = list(self._cursors.values())
+        self._cursors.clear()
+        for cur in cursors:
+            _close_quietly(cur)
+
+
+_statement_caches: "weakref.WeakKeyDictionary[MySQLConnection, StatementCache]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _close_quietly(cur: Any) -> None:
+    try:
+        cur.close()
+    except Exception:
+        pass
+
+
+def enable_statement_cache(conn: MySQLConnection, maxsize: int = 64) -> StatementCache:
+    """
+    Mengaktifkan mode prepared statement untuk koneksi (opt-in).
+
+    Setelah aktif, `fetch_all` dan `execute` pada koneksi ini memakai cursor
+    prepared yang disimpan dalam LRU per koneksi.
+
+    Args:
+        conn: Koneksi MySQL.
+        maxsize: Jumlah maksimal statement yang disimpan.
+
+    Returns:
+        Objek StatementCache milik koneksi.
+    """
+    cache = _statement_caches.get(conn)
+    if cache is None:
+        cache = _statement_caches[conn] = StatementCache(conn, maxsize)
+    return cache
+
+
+def disable_statement_cache(conn: MySQLConnection) -> None:
+    """Menonaktifkan mode prepared statement dan menutup cursor-nya."""
+    cache = _statement_caches.pop(conn, None)
+    if cache is not None:
+        cache.clear()
+
+
+def _is_stale_statement(exc: Exception) -> bool:
+    return getattr(exc, "errno", None) == ER_UNKNOWN_STMT_HANDLER
+
+
+def _run_cached(
+    cache: StatementCache,
+    query: str,
+    params: Optional[Tuple[Any, ...]],
+    dictionary: bool,
+) -> Any:
+    # Statement yang sudah tidak dikenal server (misal setelah reconnect
+    # otomatis) di-prepare ulang satu kali.
+    cur = cache.cursor(query, dictionary)
+    try:
+        cur.execute(query, params or ())
+    except Exception as exc:
+        cache.discard(query, dictionary)
+        if not _is_stale_statement(exc):
+            raise
+        cur = cache.cursor(query, dictionary)
+        cur.execute(query, params or ())
+    return cur
+
+
+# =====================
+# INSTRUMENTASI QUERY
+# =====================
+QueryHook = Callable[[str, str, float, int], None]
+
+_query_hooks: List[QueryHook] = []
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_GROUP_LIST = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def add_query_hook(hook: QueryHook) -> None:
+    """
+    Mendaftarkan fungsi yang dipanggil setelah setiap query selesai.
+
+    Hook menerima (jenis, sql, durasi_detik, jumlah_baris), dengan jenis
+    "select", "execute", "execute_many", atau "iter". Exception dari hook
+    diabaikan agar tidak mengganggu query.
+
+    Args:
+        hook: Fungsi callback.
+    """
+    if hook not in _query_hooks:
+        _query_hooks.append(hook)
+
+
+def remove_query_hook(hook: QueryHook) -> None:
+    """Menghapus hook yang didaftarkan lewat `add_query_hook`."""
+    if hook in _query_hooks:
+        _query_hooks.remove(hook)
+
+
+@lru_cache(maxsize=1024)
+def query_fingerprint(query: str) -> str:
+    """
+    Bentuk normal SQL untuk mengelompokkan query yang sama.
+
+    Literal dan placeholder diganti `?`, daftar nilai seperti `IN (?, ?, ?)`
+    atau multi-row VALUES diringkas menjadi `(...)`, dan spasi dirapikan.
+
+    Args:
+        query: Teks SQL.
+
+    Returns:
+        Fingerprint SQL.
+    """
+    text = _STRING_LITERAL.sub("?", query.replace("%s", "?"))
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _VALUE_LIST.sub("(...)", text)
+    text = _GROUP_LIST.sub("(...)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _record_query(kind: str, query: str, elapsed: float, rowcount: int) -> None:
+    for hook in tuple(_query_hooks):
+        try:
+            hook(kind, query, elapsed, rowcount)
+        except Exception:
+            pass
+
+
+# =====================
+# BARIS RINGKAS
+# =====================
+class Row(tuple):
+    """
+    Baris hasil query berbasis tuple dengan akses lewat nama kolom.
+
+    Nama kolom disimpan sekali per kelas (satu kelas per susunan kolom),
+    bukan di setiap baris seperti dict. Mendukung `row.kolom`,
+    `row["kolom"]`, `row.get()`, `keys()`, `values()`, dan `items()` sehingga
+    bisa menggantikan dict di template maupun helper yang memakai `.get()`.
+    """
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    _index: Dict[str, int] = {}
+
+    def __getitem__(self, key: Any) -> Any:
+        if isinstance(key, str):
+            try:
+                key = self._index[key]
+            except KeyError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._index
+
+    def get(self, key: str, default: Any = None) -> Any:
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def values(self) -> Tuple[Any, ...]:
+        return tuple(self)
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return list(zip(self._fields, self))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(zip(self._fields, self))
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={value!r}" for name, value in zip(self._fields, self))
+        return f"Row({values})"
+
+
+@lru_cache(maxsize=256)
+def compact_row(columns: Tuple[str, ...]) -> type:
+    """
+    Membuat (atau mengambil dari cache) kelas Row untuk susunan kolom.
+
+    Kolom yang namanya bentrok dengan method tuple/Row (misal `count`)
+    tetap bisa diakses lewat `row["count"]`.
+
+    Args:
+        columns: Nama kolom sesuai urutan hasil query.
+
+    Returns:
+        Subclass Row; panggil dengan tuple nilai untuk membuat baris.
+    """
+    namespace: Dict[str, Any] = {
+        "__slots__": (),
+        "_fields": columns,
+        "_index": {name: index for index, name in enumerate(columns)},
+    }
+    for index, name in enumerate(columns):
+        if name.isidentifier() and not keyword.iskeyword(name) and not hasattr(Row, name):
+            namespace[name] = property(itemgetter(index))
+    return type("Row", (Row,), namespace)
+
+
 # =====================
 # QUERY SELECT
 # =====================
 def fetch_all(
-    conn: MySQLConnection, query: str, params: Optional[Tuple[Any, ...]] = None
-) -> List[Dict[str, Any]]:
+    conn: MySQLConnection,
+    query: str,
+    params: Optional[Tuple[Any, ...]] = None,
+    row_factory: Optional[Callable[[Tuple[str, ...]], Callable[[Tuple[Any, ...]], Any]]] = None,
+) -> List[Any]:
     """
     Menjalankan SELECT dan mengembalikan semua baris dalam bentuk list of dict.
 
@@ -76,6 +357,9 @@ def fetch_all(
         conn: Koneksi MySQL aktif.
         query: SQL query SELECT.
         params: Parameter query (opsional).
+        row_factory: Fungsi yang menerima nama kolom dan mengembalikan
+            pembuat baris dari tuple, misal `compact_row` untuk baris ringkas.
+            Default None menghasilkan dict.
 
     Returns:
         List data hasil query.
@@ -83,21 +367,134 @@ def fetch_all(
     Raises:
         DatabaseError: Jika query gagal.
     """
-    cur = conn.cursor(dictionary=True)
+    dictionary = row_factory is None
+    started = time.perf_counter()
+    cache = _statement_caches.get(conn)
+    if cache is not None:
+        try:
+            cur = _run_cached(cache, query, params, dictionary=dictionary)
+            rows = _fetch_rows(cur, row_factory)
+        except Exception as exc:
+            raise DatabaseError(f"Query gagal: {exc}") from exc
+        _record_query("select", query, time.perf_counter() - started, len(rows))
+        return rows
+
+    cur = conn.cursor(dictionary=dictionary)
     try:
         cur.execute(query, params or ())
-        return cur.fetchall()
+        rows = _fetch_rows(cur, row_factory)
     except Exception as exc:
         raise DatabaseError(f"Query gagal: {exc}") from exc
     finally:
         cur.close()
+    _record_query("select", query, time.perf_counter() - started, len(rows))
+    return rows
+
+
+def _fetch_rows(cur: Any, row_factory: Optional[Callable[..., Any]]) -> List[Any]:
+    rows = cur.fetchall()
+    if row_factory is None:
+        return rows
+    make_row = row_factory(tuple(cur.column_names))
+    return [make_row(row) for row in rows]
+
+
+# =====================
+# QUERY SELECT STREAMING
+# =====================
+ROW_TYPES = ("dict", "tuple", "namedtuple", "row")
+
+
+@lru_cache(maxsize=128)
+def _namedtuple_type(columns: Tuple[str, ...]) -> Any:
+    return namedtuple("Row", columns, rename=True)
+
+
+def iter_rows(
+    conn: MySQLConnection,
+    query: str,
+    params: Optional[Tuple[Any, ...]] = None,
+    batch_size: int = 1000,
+    row_type: str = "dict",
+) -> Iterator[Any]:
+    """
+    Menjalankan SELECT dan menghasilkan baris satu per satu (generator).
+
+    Cursor yang dipakai unbuffered: server mengirim baris sesuai permintaan
+    dan klien mengambilnya per batch, sehingga memori tidak bergantung pada
+    jumlah baris. Selama generator belum habis, koneksi tidak bisa dipakai
+    query lain; generator yang ditutup lebih awal (close() atau break lalu
+    dibuang) akan membuang sisa hasil agar koneksi bisa dipakai lagi.
+
+    Args:
+        conn: Koneksi MySQL aktif.
+        query: SQL query SELECT.
+        params: Parameter query (opsional).
+        batch_size: Jumlah baris yang diambil per fetch.
+        row_type: "dict", "tuple", "namedtuple", atau "row" (lihat Row).
+
+    Returns:
+        Iterator baris hasil query.
+
+    Raises:
+        ValueError: Jika row_type tidak dikenal.
+        DatabaseError: Jika query gagal.
+    """
+    if row_type not in ROW_TYPES:
+        raise ValueError(f"row_type tidak dikenal: {row_type}")
+
+    cur = conn.cursor(dictionary=row_type == "dict", buffered=False)
+    # Yang dicatat hanya waktu di database (execute + fetch), bukan waktu
+    # konsumen generator memproses baris.
+    elapsed = 0.0
+    count = 0
+    executed = False
+    try:
+        started = time.perf_counter()
+        try:
+            cur.execute(query, params or ())
+        except Exception as exc:
+            raise DatabaseError(f"Query gagal: {exc}") from exc
+        elapsed += time.perf_counter() - started
+        executed = True
+
+        make_row = None
+        if row_type == "namedtuple":
+            make_row = _namedtuple_type(tuple(cur.column_names))._make
+        elif row_type == "row":
+            make_row = compact_row(tuple(cur.column_names))
+
+        while True:
+            started = time.perf_counter()
+            try:
+                rows = cur.fetchmany(batch_size)
+            except Exception as exc:
+                raise DatabaseError(f"Query gagal: {exc}") from exc
+            elapsed += time.perf_counter() - started
+            if not rows:
+                break
+            count += len(rows)
+            if make_row is None:
+                yield from rows
+            else:
+                for row in rows:
+                    yield make_row(row)
+    finally:
+        if conn.unread_result:
+            conn.consume_results()
+        cur.close()
+        if executed:
+            _record_query("iter", query, elapsed, count)
 
 
 # =====================
 # QUERY NON-SELECT
 # =====================
 def execute(
-    conn: MySQLConnection, query: str, params: Optional[Tuple[Any, ...]] = None
+    conn: MySQLConnection,
+    query: str,
+    params: Optional[Tuple[Any, ...]] = None,
+    commit: bool = True,
 ) -> int:
     """
     Menjalankan query INSERT/UPDATE/DELETE.
@@ -106,6 +503,7 @@ def execute(
         conn: Koneksi MySQL aktif.
         query: SQL non-select.
         params: Parameter query (opsional).
+        commit: False jika commit diatur oleh pemanggil (lihat `transaction`).
 
     Returns:
         lastrowid untuk INSERT, atau 0 untuk selain INSERT.
@@ -113,13 +511,292 @@ def execute(
     Raises:
         DatabaseError: Jika eksekusi gagal.
     """
+    started = time.perf_counter()
+    cache = _statement_caches.get(conn)
+    if cache is not None:
+        try:
+            cur = _run_cached(cache, query, params, dictionary=False)
+            if commit:
+                conn.commit()
+        except Exception as exc:
+            conn.rollback()
+            raise DatabaseError(f"Eksekusi gagal: {exc}") from exc
+        _record_query("execute", query, time.perf_counter() - started, int(getattr(cur, "rowcount", 0) or 0))
+        return int(cur.lastrowid or 0)
+
     cur = conn.cursor()
     try:
         cur.execute(query, params or ())
-        conn.commit()
+        if commit:
+            conn.commit()
+        _record_query("execute", query, time.perf_counter() - started, int(getattr(cur, "rowcount", 0) or 0))
         return int(cur.lastrowid or 0)
     except Exception as exc:
         conn.rollback()
         raise DatabaseError(f"Eksekusi gagal: {exc}") from exc
     finally:
         cur.close()
+
+
+def execute_many(
+    conn: MySQLConnection,
+    query: str,
+    seq_params: List[Tuple[Any, ...]],
+    commit: bool = True,
+) -> int:
+    """
+    Menjalankan INSERT/UPDATE untuk banyak baris sekaligus (executemany).
+
+    Untuk INSERT ... VALUES, connector menggabungkan semua baris menjadi satu
+    statement multi-row sehingga hanya butuh satu round-trip.
+
+    Args:
+        conn: Koneksi MySQL aktif.
+        query: SQL non-select dengan placeholder.
+        seq_params: Daftar parameter, satu tuple per baris.
+        commit: False jika commit diatur oleh pemanggil (transaksi chunk).
+
+    Returns:
+        Jumlah baris yang terpengaruh.
+
+    Raises:
+        DatabaseError: Jika eksekusi gagal (transaksi di-rollback).
+    """
+    if not seq_params:
+        return 0
+    started = time.perf_counter()
+    cur = conn.cursor()
+    try:
+        cur.executemany(query, seq_params)
+        if commit:
+            conn.commit()
+        rowcount = int(cur.rowcount or 0)
+        _record_query("execute_many", query, time.perf_counter() - started, rowcount)
+        return rowcount
+    except Exception as exc:
+        conn.rollback()
+        raise DatabaseError(f"Eksekusi batch gagal: {exc}") from exc
+    finally:
+        cur.close()
+
+
+@contextmanager
+def transaction(conn: MySQLConnection) -> Iterator[MySQLConnection]:
+    """
+    Menjalankan beberapa query dalam satu transaksi dengan satu commit.
+
+    Di dalam blok, panggil `execute`/`execute_many` dengan commit=False.
+    Jika terjadi exception, seluruh perubahan di-rollback lalu exception
+    diteruskan.
+
+    Args:
+        conn: Koneksi MySQL aktif.
+
+    Yields:
+        Koneksi yang sama.
+    """
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+# =====================
+# POOL KONEKSI
+# =====================
+@dataclass
+class PoolConfig:
+    """Konfigurasi pool koneksi MySQL."""
+
+    pool_size: int = 5
+    max_overflow: int = 10
+    timeout: float = 30.0
+    recycle: float = 3600.0
+    pre_ping: bool = True
+    statement_cache_size: int = 0
+
+
+class PoolTimeoutError(DatabaseError):
+    """Error ketika tidak ada koneksi pool yang tersedia sampai batas waktu."""
+
+
+class ConnectionPool:
+    """
+    Pool koneksi MySQL yang thread-safe dan berukuran terbatas.
+
+    Pool menyimpan maksimal `pool_size` koneksi idle. Jika semua koneksi sedang
+    dipakai, pool boleh membuka hingga `max_overflow` koneksi tambahan yang akan
+    ditutup kembali saat dikembalikan. Koneksi yang umurnya melewati `recycle`
+    detik ditutup dan dibuat ulang, dan (jika `pre_ping` aktif) koneksi idle
+    dicek dengan ping sebelum dipinjamkan.
+    """
+
+    def __init__(
+        self,
+        cfg: DBConfig,
+        pool_cfg: Optional[PoolConfig] = None,
+        connect: Optional[Callable[[DBConfig], MySQLConnection]] = None,
+    ) -> None:
+        self.cfg = cfg
+        self.pool_cfg = pool_cfg or PoolConfig()
+        self._connect = connect or get_connection
+        self._cond = threading.Condition()
+        self._idle: Deque[Tuple[MySQLConnection, float]] = deque()
+        self._created_at: Dict[int, float] = {}
+        self._in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @property
+    def max_connections(self) -> int:
+        """Jumlah maksimal koneksi yang boleh terbuka bersamaan."""
+        return self.pool_cfg.pool_size + self.pool_cfg.max_overflow
+
+    def acquire(self) -> MySQLConnection:
+        """
+        Meminjam koneksi dari pool.
+
+        Returns:
+            Koneksi MySQL yang siap dipakai.
+
+        Raises:
+            PoolTimeoutError: Jika tidak ada koneksi tersedia sampai batas waktu.
+            DatabaseError: Jika koneksi baru gagal dibuat.
+        """
+        started = time.monotonic()
+        deadline = started + self.pool_cfg.timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._open_count() < self.max_connections:
+                    conn = None
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Pool koneksi penuh ({self.max_connections} koneksi dipakai)"
+                    )
+                self._cond.wait(remaining)
+            self._record_wait(time.monotonic() - started)
+
+        try:
+            if conn is not None and not self._is_usable(conn):
+                self._discard(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect(self.cfg)
+                if self.pool_cfg.statement_cache_size > 0:
+                    enable_statement_cache(conn, self.pool_cfg.statement_cache_size)
+                with self._cond:
+                    self._created_at[id(conn)] = time.monotonic()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def release(self, conn: MySQLConnection, discard: bool = False) -> None:
+        """
+        Mengembalikan koneksi ke pool.
+
+        Transaksi yang masih terbuka di-rollback agar peminjam berikutnya
+        mendapatkan koneksi bersih dan snapshot data terbaru.
+
+        Args:
+            conn: Koneksi yang dipinjam lewat `acquire`.
+            discard: True untuk menutup koneksi alih-alih menyimpannya.
+        """
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            keep = (
+                not discard
+                and len(self._idle) < self.pool_cfg.pool_size
+                and not self._is_expired(conn)
+            )
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+        if not keep:
+            self._discard(conn)
+
+    def close_all(self) -> None:
+        """Menutup semua koneksi idle di pool."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Statistik pemakaian pool.
+
+        Returns:
+            Dict berisi jumlah koneksi dipakai/idle, jumlah checkout, timeout,
+            serta total, rata-rata, dan maksimal waktu tunggu (ms).
+        """
+        with self._cond:
+            checkouts = self._checkouts
+            return {
+                "pool_size": self.pool_cfg.pool_size,
+                "max_overflow": self.pool_cfg.max_overflow,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "open": self._open_count(),
+                "checkouts": checkouts,
+                "timeouts": self._timeouts,
+                "wait_total_ms": round(self._wait_total * 1000, 3),
+                "wait_avg_ms": round(self._wait_total * 1000 / checkouts, 3) if checkouts else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3),
+            }
+
+    def _open_count(self) -> int:
+        return self._in_use + len(self._idle)
+
+    def _record_wait(self, waited: float) -> None:
+        self._checkouts += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+
+    def _is_expired(self, conn: MySQLConnection) -> bool:
+        created = self._created_at.get(id(conn))
+        if created is None or self.pool_cfg.recycle <= 0:
+            return False
+        return time.monotonic() - created > self.pool_cfg.recycle
+
+    def _is_usable(self, conn: MySQLConnection) -> bool:
+        with self._cond:
+            if self._is_expired(conn):
+                return False
+        if not self.pool_cfg.pre_ping:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn: MySQLConnection) -> None:
+        with self._cond:
+            self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
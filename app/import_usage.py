@@ -0,0 +1,61 @@
+"""
+import_usage.py - Bulk import data penggunaan dari CSV.
+
+Contoh pemakaian:
+    python -m app.import_usage data_meter.csv --chunk-size 2000
+
+Kolom CSV: nomor_kwh (atau id_pelanggan), bulan, tahun, meter_awal, meter_akhir.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from app.db import DBConfig, get_connection
+from app.usage import import_usage_csv
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import massal data penggunaan dari CSV.")
+    parser.add_argument("csv_file", help="Path file CSV")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Jumlah baris per transaksi")
+    args = parser.parse_args()
+
+    # Load konfigurasi dari file .env
+    load_dotenv()
+    cfg = DBConfig(
+        host=os.getenv("DB_HOST", "localhost"),
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASSWORD", ""),
+        database=os.getenv("DB_NAME", "lsp_listrik"),
+        port=int(os.getenv("DB_PORT", "3306")),
+    )
+
+    conn = get_connection(cfg)
+    try:
+        started = time.perf_counter()
+        with open(args.csv_file, newline="", encoding="utf-8-sig") as stream:
+            result = import_usage_csv(conn, stream, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - started
+    finally:
+        conn.close()
+
+    rate = result.total_rows / elapsed if elapsed > 0 else 0
+    print(f"Total baris : {result.total_rows}")
+    print(f"Berhasil    : {result.inserted}")
+    print(f"Ditolak     : {result.rejected}")
+    print(f"Waktu       : {elapsed:.2f} detik ({rate:,.0f} baris/detik)")
+    for reject in result.rejects:
+        print(f"  baris {reject.line}: {reject.reason}")
+    if result.rejected > len(result.rejects):
+        print(f"  ... {result.rejected - len(result.rejects)} baris ditolak lainnya")
+
+    if result.rejected:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+rebuild_report_summary.py - Rebuild dan verifikasi rekap tagihan bulanan.
+
+Contoh pemakaian:
+    python -m app.rebuild_report_summary            # rebuild lalu verifikasi
+    python -m app.rebuild_report_summary --verify   # verifikasi saja
+
+Exit code 1 jika rekap tidak sesuai dengan data tagihan.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from app.db import DBConfig, get_connection
+from app.report_summary import rebuild_summary, verify_summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild/verifikasi rekap tagihan bulanan.")
+    parser.add_argument("--verify", action="store_true", help="Hanya verifikasi, tanpa rebuild")
+    args = parser.parse_args()
+
+    # Load konfigurasi dari file .env
+    load_dotenv()
+    cfg = DBConfig(
+        host=os.getenv("DB_HOST", "localhost"),
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASSWORD", ""),
+        database=os.getenv("DB_NAME", "lsp_listrik"),
+        port=int(os.getenv("DB_PORT", "3306")),
+    )
+
+    conn = get_connection(cfg)
+    try:
+        if not args.verify:
+            started = time.perf_counter()
+            total = rebuild_summary(conn)
+            print(f"Rekap dibangun ulang: {total} bulan ({time.perf_counter() - started:.2f} detik)")
+        mismatches = verify_summary(conn)
+    finally:
+        conn.close()
+
+    if not mismatches:
+        print("Rekap sesuai dengan data tagihan.")
+        return
+
+    print(f"Ditemukan {len(mismatches)} selisih:")
+    for item in mismatches:
+        print(
+            f"  {item['tahun']}-{item['bulan']:02d} {item['kolom']}: "
+            f"seharusnya {item['seharusnya']}, tersimpan {item['tersimpan']}"
+        )
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
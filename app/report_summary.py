@@ -0,0 +1,223 @@
+"""
+report_summary.py - Rekap tagihan bulanan (tabel ringkasan).
+
+Laporan bulanan membaca tabel `rekap_tagihan_bulanan` (satu baris per
+tahun/bulan) alih-alih menghitung ulang agregat dari seluruh tagihan.
+Setiap perubahan penggunaan atau status tagihan menghitung ulang hanya
+bulan yang terdampak.
+
+Tabel rekap dibuat dan diisi pertama kali dengan
+`python -m app.rebuild_report_summary` saat deploy.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from mysql.connector import MySQLConnection
+
+from .db import execute, fetch_all
+
+SUMMARY_TABLE = "rekap_tagihan_bulanan"
+
+SUMMARY_COLUMNS = (
+    "total_tagihan",
+    "tagihan_lunas",
+    "tagihan_belum",
+    "total_pelanggan",
+    "total_bayar",
+)
+
+_CREATE_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} (
+        tahun INT NOT NULL,
+        bulan INT NOT NULL,
+        total_tagihan INT NOT NULL DEFAULT 0,
+        tagihan_lunas INT NOT NULL DEFAULT 0,
+        tagihan_belum INT NOT NULL DEFAULT 0,
+        total_pelanggan INT NOT NULL DEFAULT 0,
+        total_bayar DECIMAL(18, 0) NOT NULL DEFAULT 0,
+        versi INT NOT NULL DEFAULT 0,
+        diperbarui_pada TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (tahun, bulan)
+    )
+"""
+
+# Agregat yang sama dengan laporan lama; WHERE ditambahkan oleh pemanggil.
+_AGGREGATE_SQL = """
+    SELECT t.tahun,
+           t.bulan,
+           COUNT(*) AS total_tagihan,
+           SUM(CASE WHEN t.status = 'SUDAH BAYAR' THEN 1 ELSE 0 END) AS tagihan_lunas,
+           SUM(CASE WHEN t.status <> 'SUDAH BAYAR' THEN 1 ELSE 0 END) AS tagihan_belum,
+           COUNT(DISTINCT t.id_pelanggan) AS total_pelanggan,
+           ROUND(SUM(t.jumlah_meter * tr.tarifperkwh), 0) AS total_bayar
+    FROM tagihan t
+    JOIN pelanggan pl ON pl.id_pelanggan = t.id_pelanggan
+    JOIN tarif tr ON tr.id_tarif = pl.id_tarif
+    {where}
+    GROUP BY t.tahun, t.bulan
+"""
+
+# Upsert, bukan REPLACE: kolom versi naik setiap kali bulan itu dihitung
+# ulang sehingga cache PDF laporan bisa memakai (tahun, bulan, versi) tanpa
+# memindai detail tagihan. Agregat dibungkus subquery karena ON DUPLICATE
+# KEY UPDATE tidak boleh merujuk kolom SELECT yang memakai GROUP BY.
+_UPSERT_SQL = f"""
+    INSERT INTO {SUMMARY_TABLE}
+        (tahun, bulan, total_tagihan, tagihan_lunas, tagihan_belum, total_pelanggan, total_bayar)
+    SELECT * FROM ({_AGGREGATE_SQL}) AS src
+    ON DUPLICATE KEY UPDATE
+        total_tagihan = src.total_tagihan,
+        tagihan_lunas = src.tagihan_lunas,
+        tagihan_belum = src.tagihan_belum,
+        total_pelanggan = src.total_pelanggan,
+        total_bayar = src.total_bayar,
+        versi = versi + 1
+"""
+
+
+# =====================
+# SKEMA
+# =====================
+def create_summary_table(conn: MySQLConnection) -> None:
+    """
+    Membuat tabel rekap jika belum ada.
+
+    Hanya dipanggil dari `python -m app.rebuild_report_summary`: DDL di MySQL
+    melakukan commit implisit, jadi tidak boleh berjalan di jalur request
+    yang sedang memegang transaksi. Tabel lama tanpa kolom versi ikut
+    ditambahkan kolomnya.
+
+    Args:
+        conn: Koneksi MySQL.
+    """
+    execute(conn, _CREATE_TABLE_SQL)
+    if not fetch_all(conn, f"SHOW COLUMNS FROM {SUMMARY_TABLE} LIKE 'versi'"):
+        execute(conn, f"ALTER TABLE {SUMMARY_TABLE} ADD COLUMN versi INT NOT NULL DEFAULT 0 AFTER total_bayar")
+
+
+# =====================
+# PEMBARUAN INKREMENTAL
+# =====================
+def refresh_months(conn: MySQLConnection, periods: Iterable[Tuple[int, int]]) -> None:
+    """
+    Menghitung ulang rekap untuk bulan-bulan tertentu saja.
+
+    Args:
+        conn: Koneksi MySQL.
+        periods: Daftar (tahun, bulan) yang datanya berubah.
+    """
+    for tahun, bulan in sorted(set(periods)):
+        execute(
+            conn,
+            _UPSERT_SQL.format(where="WHERE t.tahun = %s AND t.bulan = %s"),
+            (tahun, bulan),
+        )
+        # Bulan yang tagihannya sudah habis (misal penggunaan dihapus)
+        # tidak lagi muncul di hasil SELECT di atas, jadi dihapus di sini.
+        execute(
+            conn,
+            f"""
+            DELETE FROM {SUMMARY_TABLE}
+            WHERE tahun = %s AND bulan = %s
+              AND NOT EXISTS (SELECT 1 FROM tagihan WHERE tahun = %s AND bulan = %s)
+            """,
+            (tahun, bulan, tahun, bulan),
+        )
+
+
+def refresh_month(conn: MySQLConnection, tahun: int, bulan: int) -> None:
+    """Menghitung ulang rekap satu bulan."""
+    refresh_months(conn, [(tahun, bulan)])
+
+
+def usage_period(conn: MySQLConnection, id_penggunaan: int) -> Optional[Tuple[int, int]]:
+    """Mengambil (tahun, bulan) sebuah penggunaan, None jika tidak ada."""
+    rows = fetch_all(
+        conn,
+        "SELECT tahun, bulan FROM penggunaan WHERE id_penggunaan = %s",
+        (id_penggunaan,),
+    )
+    return (int(rows[0]["tahun"]), int(rows[0]["bulan"])) if rows else None
+
+
+def refresh_bill_month(conn: MySQLConnection, id_tagihan: int) -> None:
+    """Menghitung ulang rekap bulan milik sebuah tagihan."""
+    rows = fetch_all(
+        conn,
+        "SELECT tahun, bulan FROM tagihan WHERE id_tagihan = %s",
+        (id_tagihan,),
+    )
+    if rows:
+        refresh_month(conn, int(rows[0]["tahun"]), int(rows[0]["bulan"]))
+
+
+# =====================
+# BACA, REBUILD, VERIFIKASI
+# =====================
+def _rebuild(conn: MySQLConnection) -> int:
+    execute(conn, _UPSERT_SQL.format(where=""))
+    execute(
+        conn,
+        f"""
+        DELETE s FROM {SUMMARY_TABLE} s
+        LEFT JOIN (SELECT DISTINCT tahun, bulan FROM tagihan) t
+          ON t.tahun = s.tahun AND t.bulan = s.bulan
+        WHERE t.tahun IS NULL
+        """,
+    )
+    rows = fetch_all(conn, f"SELECT COUNT(*) AS total FROM {SUMMARY_TABLE}")
+    return int(rows[0]["total"])
+
+
+def rebuild_summary(conn: MySQLConnection) -> int:
+    """
+    Membangun ulang seluruh rekap dari tabel tagihan.
+
+    Args:
+        conn: Koneksi MySQL.
+
+    Returns:
+        Jumlah bulan di tabel rekap setelah rebuild.
+    """
+    create_summary_table(conn)
+    return _rebuild(conn)
+
+
+def verify_summary(conn: MySQLConnection) -> List[Dict[str, Any]]:
+    """
+    Membandingkan isi rekap dengan agregat yang dihitung langsung dari tagihan.
+
+    Args:
+        conn: Koneksi MySQL.
+
+    Returns:
+        Daftar selisih per bulan; list kosong berarti rekap sudah sesuai.
+    """
+    expected = {
+        (int(row["tahun"]), int(row["bulan"])): row
+        for row in fetch_all(conn, _AGGREGATE_SQL.format(where=""))
+    }
+    actual = {
+        (int(row["tahun"]), int(row["bulan"])): row
+        for row in fetch_all(conn, f"SELECT * FROM {SUMMARY_TABLE}")
+    }
+    periods: Set[Tuple[int, int]] = set(expected) | set(actual)
+    mismatches = []
+    for period in sorted(periods):
+        want, have = expected.get(period), actual.get(period)
+        for column in SUMMARY_COLUMNS:
+            want_value = int(want[column] or 0) if want else None
+            have_value = int(have[column] or 0) if have else None
+            if want_value != have_value:
+                mismatches.append(
+                    {
+                        "tahun": period[0],
+                        "bulan": period[1],
+                        "kolom": column,
+                        "seharusnya": want_value,
+                        "tersimpan": have_value,
+                    }
+                )
+    return mismatches
@@ -0,0 +1,137 @@
+"""
+security.py - Hash dan verifikasi password.
+
+Password baru disimpan dengan PBKDF2-HMAC-SHA256 dalam format
+`pbkdf2_sha256$<iterasi>$<salt>$<hash>`. Format lama tetap bisa
+diverifikasi agar pengguna lama tetap bisa login:
+
+- hex SHA2-256 (hasil `SHA2(password, 256)` di MySQL), dan
+- password plain (data lama pelanggan, hanya jika diizinkan).
+
+Setelah login berhasil dengan format lama atau jumlah iterasi yang lebih
+rendah dari konfigurasi, password sebaiknya di-hash ulang (lihat
+`needs_rehash`).
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import os
+import re
+
+ALGORITHM = "pbkdf2_sha256"
+DEFAULT_ITERATIONS = 600_000
+SALT_BYTES = 16
+
+_SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
+
+_iterations = DEFAULT_ITERATIONS
+
+
+# =====================
+# KONFIGURASI
+# =====================
+def configure_password_hashing(iterations: int) -> None:
+    """
+    Mengatur jumlah iterasi PBKDF2 untuk hash baru.
+
+    Args:
+        iterations: Jumlah iterasi (minimal 1).
+
+    Raises:
+        ValueError: Jika iterasi kurang dari 1.
+    """
+    global _iterations
+    if iterations < 1:
+        raise ValueError("Iterasi PBKDF2 minimal 1")
+    _iterations = iterations
+
+
+def get_hash_iterations() -> int:
+    """Jumlah iterasi PBKDF2 yang sedang dipakai."""
+    return _iterations
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+# =====================
+# HASH & VERIFIKASI
+# =====================
+def hash_password(password_plain: str, iterations: int | None = None) -> str:
+    """
+    Membuat hash PBKDF2 dengan salt acak.
+
+    Args:
+        password_plain: Password plain.
+        iterations: Jumlah iterasi (default: konfigurasi aktif).
+
+    Returns:
+        String hash siap disimpan di kolom password.
+    """
+    iterations = iterations or _iterations
+    salt = os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password_plain.encode("utf-8"), salt, iterations)
+    return f"{ALGORITHM}${iterations}${_b64encode(salt)}${_b64encode(digest)}"
+
+
+def legacy_sha256(password_plain: str) -> str:
+    """Hash SHA2-256 hex, sama dengan `SHA2(password, 256)` di MySQL."""
+    return hashlib.sha256(password_plain.encode("utf-8")).hexdigest()
+
+
+def verify_password(password_plain: str, stored: str | None, allow_plain: bool = False) -> bool:
+    """
+    Mencocokkan password dengan hash yang tersimpan.
+
+    Args:
+        password_plain: Password input.
+        stored: Isi kolom password (PBKDF2, hex SHA2-256, atau plain).
+        allow_plain: Izinkan pencocokan password plain (data lama pelanggan).
+
+    Returns:
+        True jika cocok.
+    """
+    if not stored:
+        return False
+    if stored.startswith(ALGORITHM + "$"):
+        try:
+            _, iterations, salt, expected = stored.split("$", 3)
+            digest = hashlib.pbkdf2_hmac(
+                "sha256", password_plain.encode("utf-8"), _b64decode(salt), int(iterations)
+            )
+        except (ValueError, TypeError):
+            return False
+        return hmac.compare_digest(digest, _b64decode(expected))
+    if _SHA256_HEX.match(stored.lower()) and hmac.compare_digest(
+        legacy_sha256(password_plain), stored.lower()
+    ):
+        return True
+    if not allow_plain:
+        return False
+    # Data lama pelanggan masih ada yang menyimpan password plain.
+    return hmac.compare_digest(password_plain.encode("utf-8"), stored.encode("utf-8"))
+
+
+def needs_rehash(stored: str | None, iterations: int | None = None) -> bool:
+    """
+    True jika hash tersimpan perlu diganti dengan hash PBKDF2 terbaru.
+
+    Args:
+        stored: Isi kolom password.
+        iterations: Iterasi target (default: konfigurasi aktif).
+    """
+    iterations = iterations or _iterations
+    if not stored or not stored.startswith(ALGORITHM + "$"):
+        return True
+    try:
+        return int(stored.split("$", 2)[1]) < iterations
+    except (IndexError, ValueError):
+        return True
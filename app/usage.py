@@ -5,9 +5,12 @@ Berisi fungsi untuk menambah, mengubah, menghapus, dan membaca data penggunaan l
 """
 
 from __future__ import annotations
-from typing import Any, Dict, List
+import csv
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, TextIO, Tuple
 from mysql.connector import MySQLConnection
-from .db import execute, fetch_all
+from .db import DatabaseError, execute, execute_many, fetch_all
+from .report_summary import refresh_month, refresh_months, usage_period
 
 
 def create_usage(
@@ -23,6 +26,7 @@ def create_usage(
 
     Catatan:
         Jika database memiliki trigger, maka insert penggunaan dapat otomatis membuat tagihan.
+        Rekap laporan bulan tersebut ikut dihitung ulang.
 
     Args:
         conn: Koneksi MySQL.
@@ -35,7 +39,7 @@ def create_usage(
     Returns:
         ID penggunaan yang baru dibuat.
     """
-    return execute(
+    id_penggunaan = execute(
         conn,
         """
         INSERT INTO penggunaan (id_pelanggan, bulan, tahun, meter_awal, meter_akhir)
@@ -43,6 +47,8 @@ def create_usage(
         """,
         (id_pelanggan, bulan, tahun, meter_awal, meter_akhir),
     )
+    refresh_month(conn, tahun, bulan)
+    return id_penggunaan
 
 
 def list_usage_by_customer(
@@ -77,6 +83,8 @@ def update_usage(
     """
     Mengubah data meter pada penggunaan.
 
+    Rekap laporan bulan penggunaan tersebut ikut dihitung ulang.
+
     Args:
         conn: Koneksi MySQL.
         id_penggunaan: ID penggunaan.
@@ -92,12 +100,17 @@ def update_usage(
         """,
         (meter_awal, meter_akhir, id_penggunaan),
     )
+    period = usage_period(conn, id_penggunaan)
+    if period:
+        refresh_month(conn, *period)
 
 
 def delete_usage(conn: MySQLConnection, id_penggunaan: int) -> None:
     """
     Menghapus data penggunaan.
 
+    Rekap laporan bulan penggunaan tersebut ikut dihitung ulang.
+
     Perhatian:
         Jika tabel tagihan punya FK ke penggunaan tanpa CASCADE,
         maka data tagihan terkait harus dihapus dulu.
@@ -106,4 +119,224 @@ def delete_usage(conn: MySQLConnection, id_penggunaan: int) -> None:
         conn: Koneksi MySQL.
         id_penggunaan: ID penggunaan yang akan dihapus.
     """
+    period = usage_period(conn, id_penggunaan)
     execute(conn, "DELETE FROM penggunaan WHERE id_penggunaan = %s", (id_penggunaan,))
+    if period:
+        refresh_month(conn, *period)
+
+
+# =====================
+# IMPORT MASSAL (CSV)
+# =====================
+@dataclass
+class ImportReject:
+    """Baris CSV yang ditolak beserta alasannya."""
+
+    line: int
+    reason: str
+
+
+@dataclass
+class ImportResult:
+    """Ringkasan hasil import penggunaan."""
+
+    total_rows: int = 0
+    inserted: int = 0
+    rejected: int = 0
+    rejects: List[ImportReject] = field(default_factory=list)
+
+    def reject(self, line: int, reason: str, max_rejects: int) -> None:
+        self.rejected += 1
+        if len(self.rejects) < max_rejects:
+            self.rejects.append(ImportReject(line, reason))
+
+
+_USAGE_FIELDS = ("bulan", "tahun", "meter_awal", "meter_akhir")
+
+
+def _parse_usage_row(row: Dict[str, Optional[str]]) -> Tuple[Optional[Dict[str, Any]], str]:
+    parsed: Dict[str, Any] = {}
+    for name in _USAGE_FIELDS:
+        raw = (row.get(name) or "").strip()
+        try:
+            parsed[name] = int(raw)
+        except ValueError:
+            return None, f"Kolom {name} harus berupa angka (nilai: '{raw}')"
+
+    id_raw = (row.get("id_pelanggan") or "").strip()
+    nomor_kwh = (row.get("nomor_kwh") or "").strip()
+    if id_raw:
+        try:
+            parsed["id_pelanggan"] = int(id_raw)
+        except ValueError:
+            return None, f"Kolom id_pelanggan harus berupa angka (nilai: '{id_raw}')"
+    elif nomor_kwh:
+        parsed["nomor_kwh"] = nomor_kwh
+    else:
+        return None, "Kolom nomor_kwh atau id_pelanggan wajib diisi"
+
+    if not 1 <= parsed["bulan"] <= 12:
+        return None, "Bulan harus 1-12"
+    if parsed["tahun"] < 2000:
+        return None, "Tahun tidak valid"
+    if parsed["meter_awal"] < 0 or parsed["meter_akhir"] < parsed["meter_awal"]:
+        return None, "Meter akhir harus lebih besar atau sama dengan meter awal"
+    return parsed, ""
+
+
+def _placeholders(count: int, width: int = 1) -> str:
+    group = "%s" if width == 1 else "(" + ", ".join(["%s"] * width) + ")"
+    return ", ".join([group] * count)
+
+
+def _resolve_customers(
+    conn: MySQLConnection, rows: List[Tuple[int, Dict[str, Any]]]
+) -> Dict[Any, int]:
+    ids = {row["id_pelanggan"] for _, row in rows if "id_pelanggan" in row}
+    kwh = {row["nomor_kwh"] for _, row in rows if "nomor_kwh" in row}
+    resolved: Dict[Any, int] = {}
+    if ids:
+        for found in fetch_all(
+            conn,
+            f"SELECT id_pelanggan FROM pelanggan WHERE id_pelanggan IN ({_placeholders(len(ids))})",
+            tuple(ids),
+        ):
+            resolved[int(found["id_pelanggan"])] = int(found["id_pelanggan"])
+    if kwh:
+        for found in fetch_all(
+            conn,
+            f"SELECT id_pelanggan, nomor_kwh FROM pelanggan WHERE nomor_kwh IN ({_placeholders(len(kwh))})",
+            tuple(kwh),
+        ):
+            resolved[str(found["nomor_kwh"])] = int(found["id_pelanggan"])
+    return resolved
+
+
+def _existing_periods(
+    conn: MySQLConnection, keys: List[Tuple[int, int, int]]
+) -> set:
+    if not keys:
+        return set()
+    params: List[int] = []
+    for key in keys:
+        params.extend(key)
+    rows = fetch_all(
+        conn,
+        f"""
+        SELECT id_pelanggan, bulan, tahun
+        FROM penggunaan
+        WHERE (id_pelanggan, bulan, tahun) IN ({_placeholders(len(keys), 3)})
+        """,
+        tuple(params),
+    )
+    return {(int(r["id_pelanggan"]), int(r["bulan"]), int(r["tahun"])) for r in rows}
+
+
+_INSERT_USAGE_SQL = """
+    INSERT INTO penggunaan (id_pelanggan, bulan, tahun, meter_awal, meter_akhir)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+
+def _import_chunk(
+    conn: MySQLConnection,
+    chunk: List[Tuple[int, Dict[str, Any]]],
+    result: ImportResult,
+    max_rejects: int,
+) -> Set[Tuple[int, int]]:
+    customers = _resolve_customers(conn, chunk)
+    candidates: List[Tuple[int, Tuple[int, int, int, int, int]]] = []
+    seen = set()
+    for line, row in chunk:
+        key = row.get("id_pelanggan", row.get("nomor_kwh"))
+        id_pelanggan = customers.get(key)
+        if id_pelanggan is None:
+            result.reject(line, f"Pelanggan '{key}' tidak ditemukan", max_rejects)
+            continue
+        period = (id_pelanggan, row["bulan"], row["tahun"])
+        if period in seen:
+            result.reject(line, "Duplikat periode pelanggan di dalam file", max_rejects)
+            continue
+        seen.add(period)
+        candidates.append(
+            (line, (id_pelanggan, row["bulan"], row["tahun"], row["meter_awal"], row["meter_akhir"]))
+        )
+
+    existing = _existing_periods(conn, [values[:3] for _, values in candidates])
+    batch: List[Tuple[int, Tuple[int, int, int, int, int]]] = []
+    for line, values in candidates:
+        if values[:3] in existing:
+            result.reject(line, "Penggunaan untuk periode ini sudah ada", max_rejects)
+            continue
+        batch.append((line, values))
+
+    inserted = [values for _, values in batch]
+    try:
+        execute_many(conn, _INSERT_USAGE_SQL, inserted, commit=False)
+        conn.commit()
+    except DatabaseError:
+        # Satu baris yang gagal membatalkan seluruh chunk; ulangi per baris
+        # agar hanya baris yang benar-benar bermasalah yang ditolak.
+        inserted = []
+        for line, values in batch:
+            try:
+                execute(conn, _INSERT_USAGE_SQL, values)
+            except DatabaseError as exc:
+                result.reject(line, str(exc), max_rejects)
+                continue
+            inserted.append(values)
+    result.inserted += len(inserted)
+    return {(values[2], values[1]) for values in inserted}
+
+
+def import_usage_csv(
+    conn: MySQLConnection,
+    stream: TextIO,
+    chunk_size: int = 1000,
+    max_rejects: int = 1000,
+) -> ImportResult:
+    """
+    Import massal data penggunaan dari CSV secara streaming.
+
+    Kolom CSV: nomor_kwh atau id_pelanggan, bulan, tahun, meter_awal,
+    meter_akhir. File dibaca per chunk; setiap chunk divalidasi, dicek
+    duplikatnya, lalu di-insert dengan satu executemany multi-row dalam satu
+    transaksi. Memori tetap datar karena hanya satu chunk yang ditahan.
+    Jika insert chunk gagal, baris chunk itu di-insert ulang satu per satu
+    sehingga hanya baris yang gagal yang ditolak.
+
+    Catatan:
+        Jika database memiliki trigger, setiap baris yang masuk tetap
+        membuat tagihan seperti `create_usage`.
+
+    Args:
+        conn: Koneksi MySQL.
+        stream: File CSV (mode teks) dengan baris header.
+        chunk_size: Jumlah baris per transaksi.
+        max_rejects: Batas detail baris ditolak yang disimpan di hasil.
+
+    Returns:
+        ImportResult berisi jumlah baris, baris masuk, dan baris ditolak.
+    """
+    result = ImportResult()
+    periods: Set[Tuple[int, int]] = set()
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+    reader = csv.DictReader(stream)
+    for row in reader:
+        result.total_rows += 1
+        line = reader.line_num
+        parsed, reason = _parse_usage_row(row)
+        if parsed is None:
+            result.reject(line, reason, max_rejects)
+            continue
+        chunk.append((line, parsed))
+        if len(chunk) >= chunk_size:
+            periods |= _import_chunk(conn, chunk, result, max_rejects)
+            chunk = []
+    if chunk:
+        periods |= _import_chunk(conn, chunk, result, max_rejects)
+    # Rekap dihitung ulang sekali per bulan setelah semua chunk masuk, bukan
+    # per chunk, karena setiap refresh mengagregasi ulang seluruh bulan.
+    refresh_months(conn, periods)
+    result.rejects.sort(key=lambda reject: reject.line)
+    return result
@@ -0,0 +1,88 @@
+import argparse
+import io
+import time
+
+from webapp import pdf
+
+SAMPLE_BILL = {
+    "id_tagihan": 1,
+    "id_pelanggan": 1,
+    "bulan": 2,
+    "tahun": 2024,
+    "jumlah_meter": 120,
+    "status": "SUDAH BAYAR",
+    "nama_pelanggan": "Andi Saputra",
+    "username": "andi",
+    "nomor_kwh": "1234567890",
+    "alamat": "Jl. Melati No. 1",
+    "tarifperkwh": 1500,
+    "total_bayar": 180000,
+}
+SAMPLE_USAGE = {"meter_awal": 1000, "meter_akhir": 1120}
+SAMPLE_REPORT = {
+    "bulan": 2,
+    "tahun": 2024,
+    "total_pelanggan": 50,
+    "total_tagihan": 50,
+    "tagihan_lunas": 30,
+    "tagihan_belum": 20,
+    "total_bayar": 9000000,
+}
+SAMPLE_DETAILS = [
+    {
+        "nama_pelanggan": f"Pelanggan {i}",
+        "nomor_kwh": f"{1000000000 + i}",
+        "alamat": "Jl. Melati",
+        "meter_awal": 1000,
+        "meter_akhir": 1120,
+        "jumlah_meter": 120,
+        "tarifperkwh": 1500,
+        "total_bayar": 180000,
+        "status": "SUDAH BAYAR" if i % 2 else "BELUM BAYAR",
+    }
+    for i in range(50)
+]
+
+
+def clear_caches() -> None:
+    pdf.get_styles.cache_clear()
+    pdf.get_table_styles.cache_clear()
+    pdf.get_logo.cache_clear()
+
+
+def render(kind: str) -> int:
+    output = io.BytesIO()
+    if kind == "proof":
+        pdf.build_bill_proof_pdf(SAMPLE_BILL, SAMPLE_USAGE, output)
+    else:
+        pdf.build_monthly_report_pdf(SAMPLE_REPORT, SAMPLE_DETAILS, output)
+    return output.tell()
+
+
+def run(kind: str, iterations: int, cold: bool):
+    render(kind)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        if cold:
+            clear_caches()
+        size = render(kind)
+    elapsed = time.perf_counter() - started
+    return iterations / elapsed, elapsed / iterations * 1000, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmark render PDF (bukti bayar dan laporan bulanan)")
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    # "cold" mengosongkan cache style/logo sebelum setiap render, sama seperti
+    # perilaku lama yang membangun ulang semuanya di setiap request.
+    print(f"{'dokumen':<8} {'mode':<5} {'render/s':>10} {'ms/render':>10} {'ukuran':>10}")
+    for kind in ("proof", "report"):
+        for mode in ("cold", "warm"):
+            per_second, ms, size = run(kind, args.iterations, cold=mode == "cold")
+            print(f"{kind:<8} {mode:<5} {per_second:>10.1f} {ms:>10.1f} {size:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import json
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+# Dijalankan di proses terpisah supaya modul yang sudah ter-import di proses
+# ini tidak memengaruhi hasil pengukuran cold start.
+STARTUP_CODE = "from webapp import create_app; create_app()"
+
+
+def measure(code: str = STARTUP_CODE):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise SystemExit(result.stderr)
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        # Format: "import time:  self [us] | cumulative | imported package"
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        imports.append(
+            {
+                "module": name.strip(),
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+            }
+        )
+    return wall_ms, imports
+
+
+def summarize_packages(imports):
+    totals = defaultdict(int)
+    for item in imports:
+        totals[item["module"].split(".")[0]] += item["self_us"]
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Laporan waktu import saat create_app()")
+    parser.add_argument("--top", type=int, default=20, help="Jumlah modul/paket yang ditampilkan")
+    parser.add_argument("--json", dest="json_path", help="Simpan hasil ke file JSON untuk dibandingkan antar rilis")
+    args = parser.parse_args()
+
+    wall_ms, imports = measure()
+    total_us = sum(item["self_us"] for item in imports)
+    packages = summarize_packages(imports)
+
+    print(f"Wall time create_app(): {wall_ms:.1f} ms")
+    print(f"Total waktu import    : {total_us / 1000:.1f} ms ({len(imports)} modul)")
+    print(f"ReportLab ter-import  : {'ya' if any(p == 'reportlab' for p, _ in packages) else 'tidak'}")
+
+    print(f"\nTop {args.top} paket (self time):")
+    for name, self_us in packages[: args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    print(f"\nTop {args.top} modul (cumulative):")
+    for item in sorted(imports, key=lambda item: item["cumulative_us"], reverse=True)[: args.top]:
+        print(f"  {item['cumulative_us'] / 1000:8.1f} ms  {item['module']}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump(
+                {
+                    "wall_ms": round(wall_ms, 1),
+                    "import_ms": round(total_us / 1000, 1),
+                    "modules": len(imports),
+                    "packages": [{"name": name, "self_ms": round(us / 1000, 1)} for name, us in packages],
+                },
+                handle,
+                indent=2,
+            )
+        print(f"\nHasil disimpan ke {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
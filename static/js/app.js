@@ -32,8 +32,8 @@ document.addEventListener('DOMContentLoaded', () => {
   const adminEditModal = document.getElementById('adminEditModal');
   const closeAdminEditModal = document.getElementById('closeAdminEditModal');
   const adminEditForm = document.getElementById('adminEditForm');
-  const notifBadge = document.getElementById('notifBadge');
-  const latestNotifId = notifBadge ? parseInt(notifBadge.getAttribute('data-latest-id') || '0', 10) : 0;
+  let notifBadge = document.getElementById('notifBadge');
+  let latestNotifId = notifBadge ? parseInt(notifBadge.getAttribute('data-latest-id') || '0', 10) : 0;
 
   function formatRupiah(amount) {
     return new Intl.NumberFormat('id-ID', {
@@ -200,16 +200,18 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   }
 
-  document.querySelectorAll('.notif-item').forEach((item) => {
+  function bindNotifItem(item) {
     item.addEventListener('click', () => {
       if (notifBadge && latestNotifId) {
         localStorage.setItem('adminNotifSeenId', String(latestNotifId));
         notifBadge.style.display = 'none';
       }
     });
-  });
+  }
 
-  const notifItems = Array.from(document.querySelectorAll('.notif-item'));
+  document.querySelectorAll('.notif-item').forEach(bindNotifItem);
+
+  let notifItems = Array.from(document.querySelectorAll('.notif-item'));
   const notifMore = document.getElementById('notifMore');
   const notifLess = document.getElementById('notifLess');
   const batchSize = 5;
@@ -245,6 +247,78 @@ document.addEventListener('DOMContentLoaded', () => {
     });
   }
 
+  const notifMenu = document.querySelector('.nav-menu-notif');
+  const notifBell = document.querySelector('.nav-bell');
+  const notifPollInterval = 30000;
+
+  function escapeHtml(text) {
+    return String(text)
+      .replace(/&/g, '&amp;')
+      .replace(/</g, '&lt;')
+      .replace(/>/g, '&gt;')
+      .replace(/"/g, '&quot;');
+  }
+
+  function prependNotifications(rows) {
+    const title = notifMenu.querySelector('.nav-menu-title');
+    const empty = notifMenu.querySelector('.nav-menu-empty');
+    if (empty) {
+      empty.remove();
+    }
+    rows.slice().reverse().forEach((row) => {
+      const item = document.createElement('a');
+      item.className = 'nav-menu-link notif-item';
+      item.href = `/admin/customers/${row.id_pelanggan}/history`;
+      item.innerHTML = `
+        <div class="notif-title">${escapeHtml(row.nama_pelanggan)} sudah membayar</div>
+        <div class="notif-meta">Tagihan #${row.id_tagihan} · ${escapeHtml(row.tanggal_pembayaran)}</div>
+      `;
+      bindNotifItem(item);
+      title.insertAdjacentElement('afterend', item);
+    });
+    notifItems = Array.from(notifMenu.querySelectorAll('.notif-item'));
+    updateNotifVisibility();
+  }
+
+  function updateNotifBadge(newCount) {
+    if (!notifBadge) {
+      notifBadge = document.createElement('span');
+      notifBadge.className = 'notif-badge';
+      notifBadge.id = 'notifBadge';
+      notifBell.appendChild(notifBadge);
+    }
+    const seenId = parseInt(localStorage.getItem('adminNotifSeenId') || '0', 10);
+    const current = seenId >= parseInt(notifBadge.getAttribute('data-latest-id') || '0', 10)
+      ? 0
+      : parseInt(notifBadge.textContent || '0', 10) || 0;
+    notifBadge.textContent = String(current + newCount);
+    notifBadge.setAttribute('data-latest-id', String(latestNotifId));
+    notifBadge.style.display = '';
+  }
+
+  async function pollNotifications() {
+    try {
+      const response = await fetch(`/admin/api/notifications?since=${latestNotifId}`);
+      if (!response.ok) {
+        return;
+      }
+      const data = await response.json();
+      const rows = Array.isArray(data.notifications) ? data.notifications : [];
+      if (!rows.length) {
+        return;
+      }
+      latestNotifId = data.latest_id || latestNotifId;
+      prependNotifications(rows);
+      updateNotifBadge(rows.length);
+    } catch (error) {
+      console.error('Notification poll error:', error);
+    }
+  }
+
+  if (notifMenu && notifBell) {
+    setInterval(pollNotifications, notifPollInterval);
+  }
+
   function setupSearchSuggestions() {
     document.querySelectorAll('[data-suggest-section]').forEach((input) => {
       const section = input.getAttribute('data-suggest-section');
@@ -300,4 +374,78 @@ document.addEventListener('DOMContentLoaded', () => {
   }
 
   setupSearchSuggestions();
+
+  function setupCustomerPickers() {
+    document.querySelectorAll('[data-customer-picker]').forEach((picker) => {
+      const endpoint = picker.getAttribute('data-customer-picker');
+      const search = picker.querySelector('[data-picker-search]');
+      const select = picker.querySelector('[data-picker-select]');
+      const more = picker.querySelector('[data-picker-more]');
+      let page = 1;
+      let query = '';
+      let timer = null;
+
+      if (!endpoint || !search || !select) {
+        return;
+      }
+
+      async function load(reset) {
+        try {
+          const params = new URLSearchParams({ q: query, page: String(page) });
+          const response = await fetch(`${endpoint}?${params.toString()}`);
+          if (!response.ok) {
+            return;
+          }
+          const data = await response.json();
+          const results = Array.isArray(data.results) ? data.results : [];
+          if (reset) {
+            // Pilihan yang sedang aktif tetap dipertahankan walau tidak ada di hasil pencarian.
+            Array.from(select.options).forEach((option) => {
+              if (!option.selected) {
+                option.remove();
+              }
+            });
+          }
+          const existing = new Set(Array.from(select.options).map((option) => option.value));
+          results.forEach((item) => {
+            const value = String(item.id);
+            if (existing.has(value)) {
+              return;
+            }
+            const option = document.createElement('option');
+            option.value = value;
+            option.textContent = item.nomor_kwh ? `${item.label} - ${item.nomor_kwh}` : item.label;
+            select.appendChild(option);
+          });
+          if (more) {
+            more.hidden = !data.has_more;
+          }
+        } catch (error) {
+          console.error('Customer picker error:', error);
+        }
+      }
+
+      search.addEventListener('input', () => {
+        if (timer) {
+          clearTimeout(timer);
+        }
+        timer = setTimeout(() => {
+          query = search.value.trim();
+          page = 1;
+          load(true);
+        }, 200);
+      });
+
+      if (more) {
+        more.addEventListener('click', () => {
+          page += 1;
+          load(false);
+        });
+      }
+
+      load(true);
+    });
+  }
+
+  setupCustomerPickers();
 });
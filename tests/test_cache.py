@@ -0,0 +1,93 @@
+import threading
+import unittest
+from unittest import mock
+
+from webapp.cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_entri_kedaluwarsa(self):
+        """Entri tidak dipakai lagi setelah TTL lewat"""
+        cache = TTLCache(ttl=10)
+        loader = mock.Mock(side_effect=["lama", "baru"])
+        with mock.patch("webapp.cache.time.monotonic", return_value=100.0):
+            self.assertEqual(cache.get_or_load("dashboard", loader), "lama")
+            self.assertEqual(cache.get_or_load("dashboard", loader), "lama")
+        with mock.patch("webapp.cache.time.monotonic", return_value=111.0):
+            self.assertEqual(cache.get_or_load("dashboard", loader), "baru")
+        self.assertEqual(loader.call_count, 2)
+        self.assertEqual((cache.stats()["size"], cache.stats()["hits"]), (1, 1))
+
+    def test_ttl_nol_tanpa_cache(self):
+        """TTL <= 0 selalu memanggil loader"""
+        cache = TTLCache(ttl=0)
+        loader = mock.Mock(return_value=1)
+        cache.get_or_load("a", loader)
+        cache.get_or_load("a", loader)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_invalidate(self):
+        """Invalidate satu key atau seluruh cache"""
+        cache = TTLCache(ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.invalidate("a")
+        self.assertEqual((cache.get("a"), cache.get("b")), ((False, None), (True, 2)))
+        cache.invalidate()
+        self.assertEqual(cache.get("b"), (False, None))
+
+    def test_maxsize(self):
+        """Entri tertua dibuang saat cache penuh"""
+        cache = TTLCache(ttl=60, maxsize=2)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+        self.assertFalse(cache.get("a")[0])
+        self.assertTrue(cache.get("c")[0])
+
+    def test_single_flight(self):
+        """Thread yang meminta key sama menunggu satu pemuatan saja"""
+        cache = TTLCache(ttl=60)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "data"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(results, ["data"] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache._load_locks, {})
+
+    def test_key_lain_tidak_tertahan(self):
+        """Pemuatan yang lambat untuk satu key tidak menahan key lain"""
+        cache = TTLCache(ttl=60)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_loader():
+            started.set()
+            release.wait(5)
+            return "lambat"
+
+        thread = threading.Thread(target=cache.get_or_load, args=("dashboard", slow_loader))
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(release.set)
+        started.wait(5)
+        self.assertEqual(cache.get_or_load("notifications", lambda: "cepat"), "cepat")
+        self.assertTrue(thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
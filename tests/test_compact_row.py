@@ -0,0 +1,69 @@
+import unittest
+
+from jinja2 import Template
+
+from app.db import compact_row, fetch_all
+
+
+class FakeCursor:
+    column_names = ("id_tagihan", "nama_pelanggan", "status")
+
+    def __init__(self, dictionary=False):
+        self.dictionary = dictionary
+
+    def execute(self, query, params=()):
+        pass
+
+    def fetchall(self):
+        rows = [(1, "Andi", "BELUM BAYAR"), (2, "Budi", "SUDAH BAYAR")]
+        if self.dictionary:
+            return [dict(zip(self.column_names, row)) for row in rows]
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def cursor(self, **kwargs):
+        return FakeCursor(**kwargs)
+
+
+class TestCompactRow(unittest.TestCase):
+    def setUp(self):
+        self.rows = fetch_all(FakeConnection(), "SELECT", row_factory=compact_row)
+
+    def test_akses_atribut_dan_key(self):
+        """Baris ringkas bisa diakses seperti objek maupun dict"""
+        row = self.rows[0]
+        self.assertEqual(row.nama_pelanggan, "Andi")
+        self.assertEqual(row["status"], "BELUM BAYAR")
+        self.assertEqual(row.get("alamat", "-"), "-")
+        self.assertIn("status", row)
+        self.assertEqual(dict(row), {"id_tagihan": 1, "nama_pelanggan": "Andi", "status": "BELUM BAYAR"})
+        with self.assertRaises(KeyError):
+            row["alamat"]
+
+    def test_kelas_dipakai_ulang(self):
+        """Satu kelas Row per susunan kolom, tanpa __dict__ per baris"""
+        self.assertIs(type(self.rows[0]), type(self.rows[1]))
+        self.assertFalse(hasattr(self.rows[0], "__dict__"))
+
+    def test_kolom_bentrok_dengan_method(self):
+        """Kolom bernama seperti method tuple tetap bisa dibaca lewat key"""
+        row = compact_row(("count", "id"))((5, 1))
+        self.assertEqual(row["count"], 5)
+        self.assertEqual(row.id, 1)
+
+    def test_template(self):
+        """Template Jinja tetap bekerja dengan baris ringkas"""
+        html = Template("{% for b in bills %}{{ b.nama_pelanggan }}:{{ b['status'] }};{% endfor %}").render(bills=self.rows)
+        self.assertEqual(html, "Andi:BELUM BAYAR;Budi:SUDAH BAYAR;")
+
+    def test_default_tetap_dict(self):
+        """Tanpa row_factory, fetch_all tetap mengembalikan dict"""
+        self.assertIsInstance(fetch_all(FakeConnection(), "SELECT")[0], dict)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+from unittest import mock
+
+from app.db import add_query_hook, execute, fetch_all, iter_rows, query_fingerprint, remove_query_hook
+from webapp import create_app
+from webapp.instrumentation import get_query_stats
+
+
+class FakeCursor:
+    column_names = ("id",)
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+        self.lastrowid = 0
+        self._rows = []
+
+    def execute(self, query, params=()):
+        self.conn.queries.append(query)
+        self._rows = [(i,) for i in range(3)]
+        self.rowcount = 2
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchmany(self, size):
+        batch, self._rows = self._rows[:size], self._rows[size:]
+        return batch
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    unread_result = False
+
+    def __init__(self):
+        self.queries = []
+
+    def cursor(self, dictionary=False, buffered=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class TestQueryFingerprint(unittest.TestCase):
+    def test_nilai_diganti_tanda_tanya(self):
+        """Query dengan nilai berbeda menghasilkan fingerprint yang sama"""
+        self.assertEqual(
+            query_fingerprint("SELECT *  FROM tagihan\n WHERE status = 'BELUM BAYAR' AND tahun = 2024 LIMIT %s"),
+            "SELECT * FROM tagihan WHERE status = ? AND tahun = ? LIMIT ?",
+        )
+
+    def test_daftar_in_diringkas(self):
+        """Panjang daftar IN dan multi-row VALUES tidak membuat fingerprint baru"""
+        self.assertEqual(
+            query_fingerprint("SELECT * FROM tagihan WHERE id_tagihan IN (%s, %s)"),
+            query_fingerprint("SELECT * FROM tagihan WHERE id_tagihan IN (%s, %s, %s, %s)"),
+        )
+        self.assertEqual(
+            query_fingerprint("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)"),
+            "INSERT INTO t (a, b) VALUES (...)",
+        )
+
+
+class TestQueryHook(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.hook = lambda *args: self.calls.append(args)
+        add_query_hook(self.hook)
+        self.addCleanup(remove_query_hook, self.hook)
+
+    def test_hook_menerima_durasi_dan_jumlah_baris(self):
+        """fetch_all, execute, dan iter_rows memanggil hook setelah query selesai"""
+        conn = FakeConnection()
+        fetch_all(conn, "SELECT id FROM tagihan")
+        execute(conn, "UPDATE tagihan SET status = %s", ("SUDAH BAYAR",))
+        list(iter_rows(conn, "SELECT id FROM tagihan", batch_size=2))
+
+        self.assertEqual([(kind, rows) for kind, _, _, rows in self.calls], [("select", 3), ("execute", 2), ("iter", 3)])
+        self.assertTrue(all(seconds >= 0 for _, _, seconds, _ in self.calls))
+
+    def test_hook_gagal_tidak_mengganggu_query(self):
+        """Exception dari hook diabaikan"""
+        failing = mock.Mock(side_effect=RuntimeError("hook rusak"))
+        add_query_hook(failing)
+        self.addCleanup(remove_query_hook, failing)
+        self.assertEqual(len(fetch_all(FakeConnection(), "SELECT id FROM tagihan")), 3)
+        failing.assert_called_once()
+
+
+class TestRequestInstrumentation(unittest.TestCase):
+    def make_app(self, **env):
+        environ = {"WEBHOOK_WORKERS": "0", "DB_N_PLUS_ONE_THRESHOLD": "3", "DB_SLOW_QUERY_MS": "0", **env}
+        with mock.patch.dict("os.environ", environ):
+            app = create_app()
+        conn = FakeConnection()
+
+        def bills_page():
+            for id_tagihan in range(4):
+                fetch_all(conn, "SELECT * FROM pembayaran WHERE id_tagihan = %s", (id_tagihan,))
+            return "<html><body><p>Tagihan</p></body></html>"
+
+        app.add_url_rule("/_test/bills", "test_bills", bills_page)
+        return app
+
+    def test_header_dan_deteksi_n_plus_one(self):
+        """Jumlah query per request dikirim di header dan query berulang dicatat"""
+        app = self.make_app()
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["role"] = "admin"
+        response = client.get("/_test/bills")
+
+        self.assertEqual(response.headers["X-DB-Queries"], "4")
+        self.assertIn("db;dur=", response.headers["Server-Timing"])
+        self.assertNotIn("db-debug-footer", response.get_data(as_text=True))
+        with app.app_context():
+            stats = get_query_stats().stats()
+        self.assertEqual(stats["queries"][0]["fingerprint"], "SELECT * FROM pembayaran WHERE id_tagihan = ?")
+        self.assertEqual(stats["queries"][0]["count"], 4)
+        self.assertEqual(stats["n_plus_one"][0]["endpoint"], "test_bills")
+        self.assertEqual(stats["n_plus_one"][0]["max_repeats"], 4)
+
+    def test_header_tidak_dikirim_ke_pengunjung(self):
+        """Tanpa sesi admin header waktu query hanya dikirim jika DB_TIMING_HEADERS aktif"""
+        response = self.make_app().test_client().get("/_test/bills")
+        self.assertNotIn("X-DB-Queries", response.headers)
+        self.assertNotIn("Server-Timing", response.headers)
+
+        response = self.make_app(DB_TIMING_HEADERS="true").test_client().get("/_test/bills")
+        self.assertEqual(response.headers["X-DB-Queries"], "4")
+
+    def test_footer_debug(self):
+        """Ringkasan query disisipkan sebelum </body> jika DB_DEBUG_FOOTER aktif"""
+        app = self.make_app(DB_DEBUG_FOOTER="true")
+        html = app.test_client().get("/_test/bills").get_data(as_text=True)
+        self.assertIn("DB: 4 query", html)
+        self.assertLess(html.index("db-debug-footer"), html.index("</body>"))
+
+    def test_instrumentasi_bisa_dimatikan(self):
+        """Tanpa instrumentasi tidak ada header statistik query"""
+        app = self.make_app(DB_INSTRUMENTATION="false", DB_TIMING_HEADERS="true")
+        response = app.test_client().get("/_test/bills")
+        self.assertNotIn("X-DB-Queries", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import threading
+import unittest
+
+from app.db import ConnectionPool, DBConfig, PoolConfig, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        if not self.healthy:
+            raise ConnectionError("server gone away")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionPool(unittest.TestCase):
+    def make_pool(self, **kwargs):
+        self.created = []
+
+        def connect(_cfg):
+            conn = FakeConnection()
+            self.created.append(conn)
+            return conn
+
+        return ConnectionPool(DBConfig(), PoolConfig(**kwargs), connect=connect)
+
+    def test_koneksi_dipakai_ulang(self):
+        """Koneksi yang dikembalikan dipinjamkan lagi tanpa koneksi baru"""
+        pool = self.make_pool(pool_size=2, max_overflow=0)
+        conn = pool.acquire()
+        pool.release(conn)
+        self.assertIs(pool.acquire(), conn)
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(conn.rollbacks, 1)
+
+    def test_overflow_ditutup_saat_dikembalikan(self):
+        """Koneksi overflow tidak disimpan sebagai koneksi idle"""
+        pool = self.make_pool(pool_size=1, max_overflow=1)
+        first = pool.acquire()
+        second = pool.acquire()
+        pool.release(first)
+        pool.release(second)
+        self.assertFalse(first.closed)
+        self.assertTrue(second.closed)
+        self.assertEqual(pool.stats()["idle"], 1)
+
+    def test_timeout_saat_pool_penuh(self):
+        """Checkout melewati batas waktu saat semua koneksi dipakai"""
+        pool = self.make_pool(pool_size=1, max_overflow=0, timeout=0.05)
+        pool.acquire()
+        with self.assertRaises(PoolTimeoutError):
+            pool.acquire()
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_menunggu_koneksi_dikembalikan(self):
+        """Checkout yang menunggu mendapat koneksi setelah dikembalikan"""
+        pool = self.make_pool(pool_size=1, max_overflow=0, timeout=2)
+        conn = pool.acquire()
+        timer = threading.Timer(0.05, pool.release, args=(conn,))
+        timer.start()
+        self.assertIs(pool.acquire(), conn)
+        timer.join()
+        self.assertGreater(pool.stats()["wait_max_ms"], 0)
+
+    def test_koneksi_rusak_diganti(self):
+        """Health check saat checkout mengganti koneksi yang putus"""
+        pool = self.make_pool(pool_size=1, max_overflow=0)
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.healthy = False
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()["in_use"], 1)
+
+    def test_koneksi_kedaluwarsa_didaur_ulang(self):
+        """Koneksi yang melewati umur recycle ditutup saat dikembalikan"""
+        pool = self.make_pool(pool_size=1, max_overflow=0, recycle=0.01)
+        conn = pool.acquire()
+        threading.Event().wait(0.02)
+        pool.release(conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()["open"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
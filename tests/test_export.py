@@ -0,0 +1,50 @@
+import csv
+import io
+import unittest
+from decimal import Decimal
+
+from webapp import export
+from webapp.export import REPORT_EXPORT_COLUMNS, stream_report_csv, stream_report_xlsx, xlsx_available
+
+
+def make_rows(count):
+    for i in range(count):
+        yield {
+            "tahun": 2024,
+            "bulan": 1 + i % 12,
+            "nama_pelanggan": f"Pelanggan {i}",
+            "nomor_kwh": f"{1000000000 + i}",
+            "alamat": "Jl. Melati, No. 1",
+            "meter_awal": None,
+            "meter_akhir": 120,
+            "jumlah_meter": 120,
+            "tarifperkwh": 1500,
+            "total_bayar": Decimal("180000"),
+            "status": "BELUM BAYAR",
+        }
+
+
+class TestReportExport(unittest.TestCase):
+    def test_csv_dikirim_bertahap(self):
+        """CSV dikirim per potongan, bukan satu string besar"""
+        chunks = list(stream_report_csv(make_rows(export.CSV_FLUSH_ROWS * 2 + 3)))
+        self.assertEqual(len(chunks), 3)
+        rows = list(csv.reader(io.StringIO("".join(chunks))))
+        self.assertEqual(rows[0], [label for _, label in REPORT_EXPORT_COLUMNS])
+        self.assertEqual(len(rows), export.CSV_FLUSH_ROWS * 2 + 4)
+        self.assertEqual(rows[1][4], "Jl. Melati, No. 1")
+        self.assertEqual(rows[1][5], "")
+
+    def test_csv_tanpa_data(self):
+        """Export tanpa baris tetap berisi header"""
+        self.assertEqual("".join(stream_report_csv([])).strip(), ",".join(label for _, label in REPORT_EXPORT_COLUMNS))
+
+    @unittest.skipUnless(xlsx_available(), "xlsxwriter tidak terpasang")
+    def test_xlsx(self):
+        """XLSX dihasilkan sebagai arsip zip"""
+        data = b"".join(stream_report_xlsx(make_rows(10)))
+        self.assertTrue(data.startswith(b"PK"))
+
+
+if __name__ == "__main__":
+    unittest.main()
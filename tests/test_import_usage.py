@@ -0,0 +1,68 @@
+import io
+import unittest
+from unittest import mock
+
+from app.db import DatabaseError
+from app.usage import import_usage_csv
+
+CSV = """id_pelanggan,bulan,tahun,meter_awal,meter_akhir
+1,1,2024,100,150
+2,1,2024,200,260
+3,1,2024,300,330
+"""
+
+
+class TestImportUsage(unittest.TestCase):
+    def setUp(self):
+        self.conn = mock.Mock()
+        customers = [{"id_pelanggan": i} for i in (1, 2, 3)]
+        patcher = mock.patch("app.usage.fetch_all", side_effect=[customers, []])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("app.usage.refresh_months")
+        self.refresh_months = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_satu_chunk_satu_insert(self):
+        """Chunk yang valid di-insert dengan satu executemany"""
+        with mock.patch("app.usage.execute_many") as execute_many, mock.patch("app.usage.execute") as execute:
+            result = import_usage_csv(self.conn, io.StringIO(CSV))
+        self.assertEqual((result.inserted, result.rejected), (3, 0))
+        self.assertEqual(len(execute_many.call_args.args[2]), 3)
+        execute.assert_not_called()
+        self.refresh_months.assert_called_once_with(self.conn, {(2024, 1)})
+
+    def test_chunk_gagal_diulang_per_baris(self):
+        """Jika chunk gagal, hanya baris yang gagal saat diulang yang ditolak"""
+
+        def insert_row(conn, query, values):
+            if values[0] == 2:
+                raise DatabaseError("Eksekusi gagal: trigger menolak meter")
+            return 1
+
+        with mock.patch(
+            "app.usage.execute_many", side_effect=DatabaseError("Eksekusi batch gagal")
+        ), mock.patch("app.usage.execute", side_effect=insert_row) as execute:
+            result = import_usage_csv(self.conn, io.StringIO(CSV))
+
+        self.assertEqual(execute.call_count, 3)
+        self.assertEqual((result.inserted, result.rejected), (2, 1))
+        self.assertEqual(result.rejects[0].line, 3)
+        self.assertIn("trigger menolak meter", result.rejects[0].reason)
+        self.refresh_months.assert_called_once_with(self.conn, {(2024, 1)})
+
+    def test_rekap_sekali_per_import(self):
+        """Rekap dihitung ulang sekali setelah chunk terakhir, bukan per chunk"""
+        csv_text = CSV + "1,2,2024,150,170\n"
+        customers = [{"id_pelanggan": i} for i in (1, 2, 3)]
+        with mock.patch(
+            "app.usage.fetch_all", side_effect=[customers[:2], [], customers[2:] + customers[:1], []]
+        ), mock.patch("app.usage.execute_many") as execute_many:
+            result = import_usage_csv(self.conn, io.StringIO(csv_text), chunk_size=2)
+        self.assertEqual(execute_many.call_count, 2)
+        self.assertEqual(result.inserted, 4)
+        self.refresh_months.assert_called_once_with(self.conn, {(2024, 1), (2024, 2)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+from app.db import DatabaseError, iter_rows
+
+
+class FakeCursor:
+    def __init__(self, conn, dictionary=False, buffered=None):
+        self.conn = conn
+        self.dictionary = dictionary
+        self.buffered = buffered
+        self.column_names = ("id", "nama")
+        self.fetch_sizes = []
+        self.closed = False
+        self._rows = []
+
+    def execute(self, query, params=()):
+        if query == "GAGAL":
+            raise RuntimeError("syntax error")
+        self._rows = [(i, f"baris {i}") for i in range(self.conn.total)]
+        self.conn.unread_result = True
+
+    def fetchmany(self, size):
+        self.fetch_sizes.append(size)
+        batch, self._rows = self._rows[:size], self._rows[size:]
+        if not batch:
+            self.conn.unread_result = False
+        if self.dictionary:
+            return [dict(zip(self.column_names, row)) for row in batch]
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, total):
+        self.total = total
+        self.unread_result = False
+        self.consumed = False
+        self.cursors = []
+
+    def cursor(self, **kwargs):
+        cur = FakeCursor(self, **kwargs)
+        self.cursors.append(cur)
+        return cur
+
+    def consume_results(self):
+        self.consumed = True
+        self.unread_result = False
+
+
+class TestIterRows(unittest.TestCase):
+    def test_baris_diambil_per_batch(self):
+        """Baris diambil dengan cursor unbuffered per batch"""
+        conn = FakeConnection(total=5)
+        rows = list(iter_rows(conn, "SELECT", batch_size=2))
+        self.assertEqual(rows[0], {"id": 0, "nama": "baris 0"})
+        self.assertEqual(len(rows), 5)
+        cur = conn.cursors[0]
+        self.assertFalse(cur.buffered)
+        self.assertEqual(cur.fetch_sizes, [2, 2, 2, 2])
+        self.assertTrue(cur.closed)
+        self.assertFalse(conn.consumed)
+
+    def test_tipe_baris(self):
+        """Baris bisa berupa tuple atau namedtuple"""
+        conn = FakeConnection(total=2)
+        self.assertEqual(list(iter_rows(conn, "SELECT", row_type="tuple")), [(0, "baris 0"), (1, "baris 1")])
+        row = next(iter(list(iter_rows(conn, "SELECT", row_type="namedtuple"))))
+        self.assertEqual((row.id, row.nama), (0, "baris 0"))
+        with self.assertRaises(ValueError):
+            list(iter_rows(conn, "SELECT", row_type="set"))
+
+    def test_sisa_hasil_dibuang_saat_berhenti_lebih_awal(self):
+        """Generator yang ditutup lebih awal membuang sisa hasil di koneksi"""
+        conn = FakeConnection(total=10)
+        rows = iter_rows(conn, "SELECT", batch_size=3)
+        next(rows)
+        rows.close()
+        self.assertTrue(conn.consumed)
+        self.assertTrue(conn.cursors[0].closed)
+
+    def test_query_gagal(self):
+        """Query yang gagal dibungkus DatabaseError"""
+        conn = FakeConnection(total=1)
+        with self.assertRaises(DatabaseError):
+            list(iter_rows(conn, "GAGAL"))
+        self.assertTrue(conn.cursors[0].closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from unittest import mock
+
+import requests
+
+from webapp.midtrans import CircuitOpenError, MidtransClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server.requests += 1
+        server.client_ports.add(self.client_address[1])
+        status, delay = server.responses.pop(0) if server.responses else (200, 0)
+        if delay:
+            time.sleep(delay)
+        body = json.dumps({"token": "snap-token"} if status == 200 else {"error": "gagal"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestMidtransClient(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.requests = 0
+        self.server.client_ports = set()
+        self.server.responses = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def make_client(self, **kwargs):
+        options = {"read_timeout": 2, "retries": 2, "backoff": 0, "breaker_threshold": 2, "breaker_reset": 60}
+        options.update(kwargs)
+        client = MidtransClient("SB-server", base_url=f"http://127.0.0.1:{self.server.server_port}", **options)
+        self.addCleanup(client.close)
+        return client
+
+    def test_koneksi_dipakai_ulang(self):
+        """Beberapa transaksi memakai koneksi keep-alive yang sama"""
+        client = self.make_client()
+        for i in range(3):
+            self.assertEqual(client.create_snap_token(f"INV-{i}", 1000, {"name": "Andi"}), "snap-token")
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(len(self.server.client_ports), 1)
+        self.assertEqual(client.stats()["latency"]["ok"]["count"], 3)
+
+    def test_retry_saat_gateway_error(self):
+        """503 diulang sampai berhasil tanpa membuka circuit breaker"""
+        self.server.responses = [(503, 0), (503, 0)]
+        client = self.make_client()
+        self.assertEqual(client.create_snap_token("INV-1", 1000, {}), "snap-token")
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(client.breaker.state, "closed")
+
+    def test_gateway_timeout_tidak_diulang(self):
+        """504 tidak diulang karena transaksi mungkin sudah dibuat"""
+        self.server.responses = [(504, 0)]
+        client = self.make_client()
+        with self.assertRaises(requests.HTTPError):
+            client.create_snap_token("INV-1", 1000, {})
+        self.assertEqual(self.server.requests, 1)
+
+    def test_read_timeout_tidak_diulang(self):
+        """Read timeout tidak diulang agar order_id tidak terkirim dua kali"""
+        self.server.responses = [(200, 0.5)]
+        client = self.make_client(read_timeout=0.1)
+        with self.assertRaises(requests.Timeout):
+            client.create_snap_token("INV-1", 1000, {})
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(client.stats()["latency"]["timeout"]["count"], 1)
+
+    def test_circuit_breaker(self):
+        """Setelah gagal berturut-turut panggilan langsung ditolak tanpa request"""
+        self.server.responses = [(500, 0)] * 2
+        client = self.make_client(retries=0)
+        for _ in range(2):
+            with self.assertRaises(requests.HTTPError):
+                client.create_snap_token("INV-1", 1000, {})
+        self.assertEqual(client.breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            client.create_snap_token("INV-2", 1000, {})
+        self.assertEqual(self.server.requests, 2)
+
+        client.breaker.reset_timeout = 0
+        self.assertEqual(client.create_snap_token("INV-3", 1000, {}), "snap-token")
+        self.assertEqual(client.breaker.state, "closed")
+
+    def test_error_lain_saat_half_open(self):
+        """Error requests lain saat panggilan percobaan tidak membuat breaker macet"""
+        client = self.make_client(breaker_threshold=1, breaker_reset=0)
+        client.breaker.record_failure()
+        self.assertEqual(client.breaker.state, "half_open")
+        with mock.patch.object(
+            client.session, "post", side_effect=requests.exceptions.ChunkedEncodingError("putus")
+        ):
+            with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+                client.create_snap_token("INV-1", 1000, {})
+        self.assertFalse(client.breaker._probing)
+        self.assertEqual(client.create_snap_token("INV-2", 1000, {}), "snap-token")
+        self.assertEqual(client.breaker.state, "closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import datetime
+import unittest
+from unittest import mock
+
+from webapp import cache
+from webapp.notifications import get_notification_feed, get_notifications_since, serialize_notification
+from webapp.queries import create_payment
+from webapp.settlement import SettlementResult, after_settlement
+
+FEED = [
+    {"id_pembayaran": 12, "id_tagihan": 5, "id_pelanggan": 3, "nama_pelanggan": "Andi",
+     "tanggal_pembayaran": datetime.date(2024, 3, 9), "total_bayar": 150000},
+    {"id_pembayaran": 11, "id_tagihan": 4, "id_pelanggan": 2, "nama_pelanggan": "Budi",
+     "tanggal_pembayaran": None, "total_bayar": None},
+]
+
+
+class TestNotifications(unittest.TestCase):
+    def setUp(self):
+        cache.get_cache("notifications").invalidate()
+        patcher = mock.patch("webapp.notifications.list_recent_payments", return_value=FEED)
+        self.list_recent_payments = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("webapp.notifications.list_payments_since", return_value=[FEED[0]])
+        self.list_payments_since = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_feed_di_cache(self):
+        """Feed notifikasi hanya dimuat sekali selama TTL"""
+        self.assertEqual(get_notification_feed(None, ttl=30), FEED)
+        get_notification_feed(None, ttl=30)
+        self.assertEqual(self.list_recent_payments.call_count, 1)
+
+    def test_since_tanpa_data_baru(self):
+        """Polling dengan since terbaru dijawab dari feed tanpa query"""
+        self.assertEqual(get_notifications_since(None, 12, ttl=30), [])
+        self.assertEqual(get_notifications_since(None, 20, ttl=30), [])
+        self.list_payments_since.assert_not_called()
+
+    def test_since_dengan_data_baru(self):
+        """Polling dengan since lama mengambil pembayaran sesudahnya"""
+        self.assertEqual(get_notifications_since(None, 11, ttl=30), [FEED[0]])
+        self.list_payments_since.assert_called_once_with(None, 11, limit=20)
+
+    def test_since_tanpa_cache(self):
+        """Tanpa TTL polling selalu bertanya ke database"""
+        get_notifications_since(None, 12, ttl=0)
+        self.list_payments_since.assert_called_once_with(None, 12, limit=20)
+
+    def test_pembayaran_baru_membuang_cache(self):
+        """Pembayaran baru (manual maupun pelunasan) membuang feed yang di-cache"""
+        get_notification_feed(None, ttl=30)
+        with mock.patch("webapp.queries.execute", return_value=13):
+            create_payment(None, 6, 3, "2024-03-10", 3, 0, 1000, 1)
+        get_notification_feed(None, ttl=30)
+        self.assertEqual(self.list_recent_payments.call_count, 2)
+
+        after_settlement(None, SettlementResult(settled=[6]))
+        get_notification_feed(None, ttl=30)
+        self.assertEqual(self.list_recent_payments.call_count, 3)
+
+    def test_serialize(self):
+        """Baris pembayaran diubah ke JSON dengan tanggal dd-mm-yyyy"""
+        self.assertEqual(
+            [serialize_notification(row) for row in FEED],
+            [
+                {"id_pembayaran": 12, "id_tagihan": 5, "id_pelanggan": 3, "nama_pelanggan": "Andi",
+                 "tanggal_pembayaran": "09-03-2024", "total_bayar": 150000.0},
+                {"id_pembayaran": 11, "id_tagihan": 4, "id_pelanggan": 2, "nama_pelanggan": "Budi",
+                 "tanggal_pembayaran": "-", "total_bayar": 0.0},
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import io
+import unittest
+
+from benchmark_pdf import SAMPLE_BILL, SAMPLE_DETAILS, SAMPLE_REPORT, SAMPLE_USAGE
+from webapp import pdf
+
+
+class TestPdf(unittest.TestCase):
+    def test_render_bukti_pembayaran(self):
+        """Bukti pembayaran menghasilkan dokumen PDF"""
+        output = io.BytesIO()
+        pdf.build_bill_proof_pdf(SAMPLE_BILL, SAMPLE_USAGE, output)
+        self.assertTrue(output.getvalue().startswith(b"%PDF"))
+
+    def test_render_laporan_bulanan(self):
+        """Laporan bulanan menghasilkan dokumen PDF"""
+        output = io.BytesIO()
+        pdf.build_monthly_report_pdf(SAMPLE_REPORT, SAMPLE_DETAILS, output)
+        self.assertTrue(output.getvalue().startswith(b"%PDF"))
+
+    def test_style_dan_logo_dibuat_sekali(self):
+        """Style, table style, dan logo dipakai ulang antar render"""
+        self.assertIs(pdf.get_styles(), pdf.get_styles())
+        self.assertIs(pdf.get_table_styles(), pdf.get_table_styles())
+        self.assertIs(pdf.get_logo(), pdf.get_logo())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+from webapp.proof_cache import ProofCache, proof_version
+
+
+def make_bill(**overrides):
+    bill = {
+        "id_tagihan": 3,
+        "id_pelanggan": 1,
+        "bulan": 2,
+        "tahun": 2024,
+        "jumlah_meter": 100,
+        "status": "SUDAH BAYAR",
+        "nama_pelanggan": "Andi Saputra",
+        "username": "andi",
+        "nomor_kwh": "1234567890",
+        "alamat": "Jl. Melati 1",
+        "tarifperkwh": 1500,
+        "total_bayar": 150000,
+    }
+    bill.update(overrides)
+    return bill
+
+
+class TestProofCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ProofCache(Flask(__name__), self.tmpdir.name)
+        patcher = mock.patch(
+            "webapp.proof_cache.get_usage_by_customer_period",
+            return_value={"meter_awal": 10, "meter_akhir": 110},
+        )
+        self.get_usage = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_render_sekali(self):
+        """PDF yang sudah ada di disk dipakai ulang tanpa render ulang"""
+        bill = make_bill()
+        with mock.patch("webapp.pdf.build_bill_proof_pdf") as build:
+            build.side_effect = lambda bill, usage, output: output.write(b"%PDF")
+            first = self.cache.get_or_render(None, bill)
+            second = self.cache.get_or_render(None, bill)
+        self.assertEqual(first, second)
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(self.get_usage.call_count, 1)
+
+    def test_versi_baru_menggantikan_versi_lama(self):
+        """Perubahan data tagihan menghasilkan file baru dan menghapus yang lama"""
+        old = make_bill()
+        new = make_bill(jumlah_meter=120, total_bayar=180000)
+        self.assertNotEqual(proof_version(old), proof_version(new))
+        with mock.patch("webapp.pdf.build_bill_proof_pdf") as build:
+            build.side_effect = lambda bill, usage, output: output.write(b"%PDF")
+            self.cache.get_or_render(None, old)
+            path = self.cache.get_or_render(None, new)
+        self.assertEqual(os.listdir(self.tmpdir.name), ["3"])
+        self.assertEqual(os.listdir(os.path.dirname(path)), [os.path.basename(path)])
+
+    def test_lock_tetap(self):
+        """Jumlah lock render tidak bertambah mengikuti jumlah tagihan"""
+        locks = {id(self.cache._bill_lock(id_tagihan)) for id_tagihan in range(1000)}
+        self.assertEqual(len(locks), len(self.cache._locks))
+        self.assertIs(self.cache._bill_lock(5), self.cache._bill_lock(5 + len(self.cache._locks)))
+
+    def test_meter_bergeser_tanpa_jumlah_berubah(self):
+        """Meter awal/akhir yang bergeser bersama tetap menghasilkan versi baru"""
+        old = make_bill(meter_awal=10, meter_akhir=110)
+        new = make_bill(meter_awal=20, meter_akhir=120)
+        self.assertNotEqual(proof_version(old), proof_version(new))
+        with mock.patch("webapp.pdf.build_bill_proof_pdf") as build:
+            build.side_effect = lambda bill, usage, output: output.write(b"%PDF")
+            self.cache.get_or_render(None, new)
+        self.assertEqual(build.call_args.args[1], {"meter_awal": 20, "meter_akhir": 120})
+        self.get_usage.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+from unittest import mock
+
+from webapp.queries import (
+    CUSTOMER_SEARCH_COLUMNS,
+    decode_cursor,
+    encode_cursor,
+    list_bills_page,
+    list_customers_page,
+    list_monthly_reports,
+    list_monthly_reports_page,
+)
+
+
+def bill(id_tagihan, tahun=2024, bulan=1):
+    return {"id_tagihan": id_tagihan, "tahun": tahun, "bulan": bulan}
+
+
+class TestCursor(unittest.TestCase):
+    def test_encode_decode(self):
+        """Cursor membawa arah, kunci baris batas, halaman, dan total"""
+        token = encode_cursor("n", (2024, 3, 17), 4, 120)
+        self.assertNotIn("=", token)
+        self.assertEqual(decode_cursor(token), ("n", (2024, 3, 17), 4, 120))
+
+    def test_cursor_tanpa_total(self):
+        """Cursor lama tanpa total tetap diterima"""
+        self.assertEqual(decode_cursor(encode_cursor("p", (2023, 12, 5), 2)), ("p", (2023, 12, 5), 2, None))
+
+    def test_cursor_tidak_valid(self):
+        """Token rusak atau arah tidak dikenal dianggap tanpa cursor"""
+        for token in (None, "", "!!!", encode_cursor("x", (2024, 1, 1), 1), "bi4xLjI"):
+            self.assertIsNone(decode_cursor(token))
+        self.assertEqual(decode_cursor(encode_cursor("n", (2024, 1, 1), 0, 5))[2], 1)
+
+
+class TestKeysetPage(unittest.TestCase):
+    def test_halaman_cursor_tanpa_count(self):
+        """Halaman dari cursor memakai row constructor dan total dari cursor"""
+        cursor = encode_cursor("n", (2024, 5, 40), 3, 23)
+        rows = [bill(39, 2024, 5), bill(38, 2024, 4), bill(37, 2024, 4)]
+        with mock.patch("webapp.queries.fetch_all", return_value=rows) as fetch_all:
+            result = list_bills_page(None, per_page=2, cursor=cursor)
+
+        fetch_all.assert_called_once()
+        sql, params = fetch_all.call_args.args[1:3]
+        self.assertIn("(t.tahun, t.bulan, t.id_tagihan) < (%s, %s, %s)", sql)
+        self.assertNotIn("COUNT(*)", sql)
+        self.assertEqual(params, (2024, 5, 40, 3))
+        self.assertEqual([row["id_tagihan"] for row in result.rows], [39, 38])
+        self.assertEqual((result.total, result.page), (23, 3))
+        self.assertEqual(decode_cursor(result.next_cursor), ("n", (2024, 4, 38), 4, 23))
+        self.assertEqual(decode_cursor(result.prev_cursor), ("p", (2024, 5, 39), 2, 23))
+
+    def test_halaman_sebelumnya(self):
+        """Arah mundur mengurutkan naik lalu membalik hasilnya"""
+        cursor = encode_cursor("p", (2024, 4, 38), 1, 23)
+        with mock.patch("webapp.queries.fetch_all", return_value=[bill(39, 2024, 5), bill(40, 2024, 5)]):
+            result = list_bills_page(None, per_page=2, cursor=cursor)
+        self.assertEqual([row["id_tagihan"] for row in result.rows], [40, 39])
+        self.assertIsNone(result.prev_cursor)
+        self.assertIsNotNone(result.next_cursor)
+
+    def test_cursor_lama_menghitung_total(self):
+        """Cursor tanpa total menjalankan COUNT(*) sekali"""
+        cursor = encode_cursor("n", (2024, 5, 40), 2)
+        with mock.patch(
+            "webapp.queries.fetch_all", side_effect=[[bill(39)], [{"total": 6}]]
+        ) as fetch_all:
+            result = list_bills_page(None, per_page=5, cursor=cursor)
+        self.assertIn("COUNT(*)", fetch_all.call_args.args[1])
+        self.assertEqual(result.total, 6)
+
+
+class TestListPage(unittest.TestCase):
+    def test_count_dan_limit_offset(self):
+        """Pencarian dan paging dikerjakan SQL: satu COUNT lalu LIMIT/OFFSET"""
+        rows = [{"id_pelanggan": i} for i in range(5)]
+        with mock.patch("webapp.queries.fetch_all", side_effect=[[{"total": 12}], rows]) as fetch_all:
+            result = list_customers_page(None, "50%_", page=2, per_page=5)
+
+        (count_sql, count_params), (page_sql, page_params) = [call.args[1:3] for call in fetch_all.call_args_list]
+        pattern = "%50\\%\\_%"
+        self.assertIn("SELECT COUNT(*) AS total", count_sql)
+        self.assertIn("pl.nama_pelanggan LIKE %s", count_sql)
+        self.assertEqual(count_params, (pattern,) * len(CUSTOMER_SEARCH_COLUMNS))
+        self.assertIn("LIMIT %s OFFSET %s", page_sql)
+        self.assertEqual(page_params, (pattern,) * len(CUSTOMER_SEARCH_COLUMNS) + (5, 5))
+        self.assertEqual((result.total, result.page, result.total_pages, result.rows), (12, 2, 3, rows))
+
+    def test_halaman_dibatasi(self):
+        """Nomor halaman di luar jangkauan dipotong ke halaman terakhir"""
+        with mock.patch("webapp.queries.fetch_all", side_effect=[[{"total": 12}], []]) as fetch_all:
+            result = list_customers_page(None, page=99, per_page=5)
+        self.assertNotIn("WHERE", fetch_all.call_args_list[0].args[1])
+        self.assertIsNone(fetch_all.call_args_list[0].args[2])
+        self.assertEqual(fetch_all.call_args.args[2], (5, 10))
+        self.assertEqual(result.page, 3)
+
+    def test_tanpa_baris(self):
+        """Jika COUNT nol, query halaman tidak dijalankan"""
+        with mock.patch("webapp.queries.fetch_all", return_value=[{"total": 0}]) as fetch_all:
+            result = list_customers_page(None, "tidak-ada")
+        fetch_all.assert_called_once()
+        self.assertEqual((result.rows, result.page, result.total_pages), ([], 1, 1))
+
+
+class TestMonthlyReports(unittest.TestCase):
+    def test_filter_tahun_bulan_di_sql(self):
+        """Filter tahun dan bulan dikirim sebagai WHERE ke tabel rekap"""
+        rows = [[{"total": 1}], [{"tahun": 2024, "bulan": 3}]]
+        with mock.patch("webapp.queries.fetch_all", side_effect=rows) as fetch_all:
+            result = list_monthly_reports_page(None, year=2024, month=3)
+
+        count_sql, count_params = fetch_all.call_args_list[0].args[1:3]
+        page_sql, page_params = fetch_all.call_args.args[1:3]
+        self.assertIn("WHERE tahun = %s AND bulan = %s", count_sql)
+        self.assertEqual(count_params, (2024, 3))
+        self.assertIn("ORDER BY tahun DESC, bulan DESC LIMIT %s OFFSET %s", " ".join(page_sql.split()))
+        self.assertEqual(page_params, (2024, 3, 5, 0))
+        self.assertEqual(result.total, 1)
+
+    def test_tanpa_filter(self):
+        """Tanpa filter semua bulan diambil tanpa WHERE"""
+        with mock.patch("webapp.queries.fetch_all", return_value=[]) as fetch_all:
+            list_monthly_reports(None)
+            list_monthly_reports(None, month=12)
+        (all_sql, all_params), (month_sql, month_params) = [call.args[1:3] for call in fetch_all.call_args_list]
+        self.assertNotIn("WHERE", all_sql)
+        self.assertIsNone(all_params)
+        self.assertIn("WHERE bulan = %s", month_sql)
+        self.assertEqual(month_params, (12,))
+
+
+if __name__ == "__main__":
+    unittest.main()
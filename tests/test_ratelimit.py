@@ -0,0 +1,65 @@
+import unittest
+from unittest import mock
+
+from webapp import create_app
+from webapp.ratelimit import LoginRateLimiter, MemoryBucketStore
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_bucket_habis_lalu_terisi(self):
+        """Token habis setelah burst dan terisi lagi sesuai rate"""
+        store = MemoryBucketStore()
+        with mock.patch("webapp.ratelimit.time.monotonic", return_value=100.0):
+            results = [store.take("k", capacity=3, rate=1.0)[0] for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+        with mock.patch("webapp.ratelimit.time.monotonic", return_value=101.0):
+            self.assertTrue(store.take("k", capacity=3, rate=1.0)[0])
+            self.assertFalse(store.take("k", capacity=3, rate=1.0)[0])
+
+    def test_store_dibatasi(self):
+        """Bucket yang paling lama tidak dipakai dibuang"""
+        store = MemoryBucketStore(maxsize=2)
+        for key in ("a", "b", "c"):
+            store.take(key, capacity=1, rate=1.0)
+        self.assertEqual(store.size(), 2)
+        self.assertTrue(store.take("a", capacity=1, rate=1.0)[0])
+
+    def test_limiter_per_username_dan_ip(self):
+        """Username dan IP dibatasi terpisah, login berhasil mereset username"""
+        limiter = LoginRateLimiter(MemoryBucketStore(), user_burst=2, user_per_minute=1, ip_burst=3, ip_per_minute=1)
+        self.assertIsNone(limiter.check("Budi", "10.0.0.1"))
+        self.assertIsNone(limiter.check("budi", "10.0.0.2"))
+        self.assertGreater(limiter.check("BUDI", "10.0.0.3"), 0)
+        limiter.reset_username("budi")
+        self.assertIsNone(limiter.check("budi", "10.0.0.3"))
+
+        for name in ("a", "b"):
+            self.assertIsNone(limiter.check(name, "10.0.0.9"))
+        self.assertIsNone(limiter.check("c", "10.0.0.9"))
+        self.assertIsNotNone(limiter.check("d", "10.0.0.9"))
+
+        stats = limiter.stats()
+        self.assertEqual(stats["throttled_username"], 1)
+        self.assertEqual(stats["throttled_ip"], 1)
+        self.assertEqual(stats["allowed"], 6)
+
+
+class TestLoginThrottle(unittest.TestCase):
+    def test_login_ditolak_sebelum_query(self):
+        """Percobaan berlebih mendapat 429 tanpa memanggil authenticate"""
+        with mock.patch.dict("os.environ", {"LOGIN_USER_BURST": "2", "LOGIN_RATE_LIMIT_STORAGE": ""}):
+            app = create_app()
+        client = app.test_client()
+        with mock.patch("webapp.routes.get_db"), mock.patch(
+            "webapp.routes.authenticate", return_value=None
+        ) as authenticate:
+            statuses = [
+                client.post("/login", data={"username": "budi", "password": "x"}).status_code
+                for _ in range(3)
+            ]
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(authenticate.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+
+from webapp import cache
+from webapp.reference_data import (
+    get_customer_option,
+    get_tariffs,
+    invalidate_customers,
+    search_customer_options,
+)
+
+CUSTOMERS = [
+    {"id_pelanggan": i, "nama_pelanggan": f"Pelanggan {i:02d}", "username": f"pel{i}", "nomor_kwh": f"5500{i:02d}"}
+    for i in range(1, 46)
+]
+
+
+class TestReferenceData(unittest.TestCase):
+    def setUp(self):
+        cache.get_cache("reference").invalidate()
+        patcher = mock.patch("webapp.reference_data.list_customer_options", return_value=CUSTOMERS)
+        self.list_customer_options = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_picker_dipaging_dari_cache(self):
+        """Pencarian dan halaman picker memakai daftar pelanggan yang sama dari cache"""
+        first = search_customer_options(None, page=1, per_page=20, ttl=60)
+        last = search_customer_options(None, page=3, per_page=20, ttl=60)
+        found = search_customer_options(None, "550012", ttl=60)
+        self.assertEqual((first["total"], len(first["results"]), first["has_more"]), (45, 20, True))
+        self.assertEqual((len(last["results"]), last["has_more"]), (5, False))
+        self.assertEqual([item["id"] for item in found["results"]], [12])
+        self.assertEqual(get_customer_option(None, 7, ttl=60)["username"], "pel7")
+        self.assertEqual(self.list_customer_options.call_count, 1)
+
+    def test_pelanggan_baru_di_luar_cache(self):
+        """Id yang belum ada di cache dicek langsung ke database lewat primary key"""
+        search_customer_options(None, ttl=60)
+        with mock.patch(
+            "webapp.reference_data.get_customer", side_effect=[{"id_pelanggan": 99, "username": "pel99"}, None]
+        ) as get_customer:
+            self.assertEqual(get_customer_option(None, 99, ttl=60)["username"], "pel99")
+            self.assertIsNone(get_customer_option(None, 100, ttl=60))
+            get_customer_option(None, 7, ttl=60)
+        self.assertEqual([call.args[1] for call in get_customer.call_args_list], [99, 100])
+        self.assertEqual(self.list_customer_options.call_count, 1)
+
+    def test_versi_naik_saat_pelanggan_ditulis(self):
+        """Penulisan pelanggan menaikkan versi sehingga daftar dimuat ulang"""
+        search_customer_options(None, ttl=60)
+        invalidate_customers()
+        search_customer_options(None, ttl=60)
+        self.assertEqual(self.list_customer_options.call_count, 2)
+
+    def test_tarif_di_cache(self):
+        """Tarif hanya dimuat sekali selama TTL"""
+        with mock.patch("webapp.reference_data.list_tariffs", return_value=[{"id_tarif": 1}]) as list_tariffs:
+            get_tariffs(None, ttl=60)
+            get_tariffs(None, ttl=60)
+        self.assertEqual(list_tariffs.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+from webapp.report_jobs import ReportJobManager, report_version
+
+REPORT = {
+    "tahun": 2024,
+    "bulan": 3,
+    "total_tagihan": 10,
+    "tagihan_lunas": 4,
+    "tagihan_belum": 6,
+    "total_pelanggan": 10,
+    "total_bayar": 150000,
+    "versi": 7,
+}
+
+
+class TestReportVersion(unittest.TestCase):
+    def test_detail_berubah_tanpa_agregat_berubah(self):
+        """Rekap yang dihitung ulang tanpa total bergeser tetap mengganti versi"""
+        self.assertEqual(report_version(REPORT), report_version(dict(REPORT)))
+        self.assertNotEqual(report_version(REPORT), report_version(dict(REPORT, versi=8)))
+
+
+class TestReportJobManager(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.app = Flask(__name__)
+        # Dua manager dengan folder cache yang sama mewakili dua worker.
+        self.worker_a = ReportJobManager(self.app, self.cache_dir)
+        self.worker_b = ReportJobManager(self.app, self.cache_dir)
+        self.worker_a._executor = mock.Mock()
+        self.worker_b._executor = mock.Mock()
+
+    def test_status_terbaca_dari_worker_lain(self):
+        """Polling status bisa dijawab worker yang tidak membuat job"""
+        job = self.worker_a.submit(REPORT)
+        self.assertEqual(self.worker_b.get(job.id).status, "queued")
+        self.assertEqual(self.worker_b.submit(REPORT).status, "queued")
+        self.worker_b._executor.submit.assert_not_called()
+
+        with open(job.path, "wb") as output:
+            output.write(b"%PDF")
+        self.assertEqual(self.worker_b.get(job.id).status, "done")
+        self.assertIsNone(self.worker_b.get("../../etc/passwd"))
+        self.assertIsNone(self.worker_b.get("2024_03_0000000000000000"))
+
+    def test_job_gagal_tercatat(self):
+        """Job yang gagal terlihat gagal dari worker lain lalu bisa dicoba ulang"""
+        job = self.worker_a.submit(REPORT)
+        with mock.patch("webapp.report_jobs.get_db"), mock.patch(
+            "webapp.report_jobs.iter_report_details", side_effect=RuntimeError("db")
+        ):
+            self.worker_a._run(job, REPORT)
+
+        state = self.worker_b.get(job.id)
+        self.assertEqual((state.status, state.error), ("failed", "Gagal membuat laporan PDF."))
+        self.assertEqual(self.worker_b.submit(REPORT).status, "queued")
+        self.worker_b._executor.submit.assert_called_once()
+
+    def test_versi_lama_dihapus(self):
+        """PDF dan status versi lama dibuang setelah versi baru selesai"""
+        old = os.path.join(self.cache_dir, "laporan_2024_03_aaaaaaaaaaaaaaaa")
+        for ext in (".pdf", ".json"):
+            with open(old + ext, "w") as output:
+                output.write("x")
+        job = self.worker_a.submit(REPORT)
+        details = mock.MagicMock()
+        with mock.patch("webapp.report_jobs.get_db"), mock.patch(
+            "webapp.report_jobs.iter_report_details", return_value=details
+        ) as iter_details, mock.patch("webapp.pdf.build_monthly_report_pdf") as build:
+            self.worker_a._run(job, REPORT)
+
+        self.assertEqual(job.status, "done")
+        iter_details.assert_called_once_with(mock.ANY, 2024, 3)
+        self.assertIs(build.call_args.args[1], details)
+        details.close.assert_called_once()
+        self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(job.path)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import unittest
+
+from dotenv import load_dotenv
+
+from app.db import DBConfig, get_connection, execute, fetch_all
+from app.report_summary import SUMMARY_TABLE, rebuild_summary, verify_summary
+from app.usage import create_usage, delete_usage
+
+
+class TestReportSummary(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        load_dotenv()
+
+        cfg = DBConfig(
+            host=os.getenv("DB_HOST", "localhost"),
+            user=os.getenv("DB_USER", "app_admin"),
+            password=os.getenv("DB_PASSWORD", ""),
+            database=os.getenv("DB_NAME", "lsp_listrik"),
+            port=int(os.getenv("DB_PORT", "3306")),
+        )
+        cls.conn = get_connection(cfg)
+        # Tabel rekap dibuat lewat rebuild, sama seperti saat deploy.
+        rebuild_summary(cls.conn)
+
+        rows = fetch_all(
+            cls.conn,
+            "SELECT id_pelanggan FROM pelanggan WHERE username=%s",
+            ("pel_test",),
+        )
+        if not rows:
+            raise RuntimeError("Data uji pelanggan 'pel_test' tidak ditemukan.")
+        cls.id_pelanggan = int(rows[0]["id_pelanggan"])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def _hapus_data_uji(self, bulan, tahun):
+        execute(
+            self.conn,
+            """
+            DELETE t FROM tagihan t
+            JOIN penggunaan p ON p.id_penggunaan = t.id_penggunaan
+            WHERE p.id_pelanggan = %s AND p.bulan = %s AND p.tahun = %s
+            """,
+            (self.id_pelanggan, bulan, tahun),
+        )
+        execute(
+            self.conn,
+            "DELETE FROM penggunaan WHERE id_pelanggan=%s AND bulan=%s AND tahun=%s",
+            (self.id_pelanggan, bulan, tahun),
+        )
+
+    def test_rebuild_sesuai_tagihan(self):
+        """Rekap hasil rebuild sama dengan agregat langsung dari tagihan"""
+        rebuild_summary(self.conn)
+        self.assertEqual(verify_summary(self.conn), [])
+
+    def test_rekap_ikut_berubah_saat_penggunaan_berubah(self):
+        """Insert dan hapus penggunaan memperbarui rekap bulan terkait"""
+        bulan, tahun = 11, 2099
+        self._hapus_data_uji(bulan, tahun)
+        rebuild_summary(self.conn)
+
+        id_penggunaan = create_usage(self.conn, self.id_pelanggan, bulan, tahun, 1000, 1100)
+        rows = fetch_all(
+            self.conn,
+            f"SELECT total_tagihan FROM {SUMMARY_TABLE} WHERE tahun=%s AND bulan=%s",
+            (tahun, bulan),
+        )
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(verify_summary(self.conn), [])
+
+        execute(self.conn, "DELETE FROM tagihan WHERE id_penggunaan=%s", (id_penggunaan,))
+        delete_usage(self.conn, id_penggunaan)
+        self.assertEqual(verify_summary(self.conn), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
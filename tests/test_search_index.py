@@ -0,0 +1,129 @@
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+from webapp import search_index
+from webapp.search_index import SuggestionIndex
+
+
+def make_bill(id_tagihan, nama, status, bulan=1, tahun=2024):
+    return {
+        "id_tagihan": id_tagihan,
+        "nama_pelanggan": nama,
+        "status": status,
+        "bulan": bulan,
+        "tahun": tahun,
+    }
+
+
+class TestSuggestionIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SuggestionIndex(
+            "id_tagihan",
+            ["id_tagihan", "nama_pelanggan", "status"],
+            extra_values_fn=lambda row: [f"{row.get('bulan')}/{row.get('tahun')}"],
+            filter_field="status",
+        )
+        self.index.build(
+            [
+                make_bill(1, "Andi Saputra", "BELUM BAYAR"),
+                make_bill(2, "Budi Santoso", "SUDAH BAYAR", bulan=2),
+                make_bill(3, "Siti Aminah", "BELUM BAYAR"),
+            ]
+        )
+
+    def test_substring(self):
+        """Saran cocok di posisi mana pun dalam teks, sama seperti LIKE %q%"""
+        self.assertEqual(self.index.suggest("andi"), ["Andi Saputra"])
+        self.assertEqual(self.index.suggest("sant"), ["Budi Santoso"])
+        self.assertIn("2/2024", self.index.suggest("2024"))
+        self.assertEqual(self.index.suggest("aputr"), ["Andi Saputra"])
+        self.assertEqual(self.index.suggest("min"), ["Siti Aminah"])
+        self.assertEqual(self.index.suggest("aputx"), [])
+
+    def test_teks_unik(self):
+        """Teks yang sama dari banyak baris hanya muncul sekali"""
+        self.assertEqual(self.index.suggest("belum"), ["BELUM BAYAR"])
+
+    def test_filter_status(self):
+        """Saran dibatasi pada baris dengan status yang diminta"""
+        self.assertEqual(
+            self.index.suggest("s", filter_value="BELUM BAYAR"),
+            ["Andi Saputra", "Siti Aminah"],
+        )
+        self.assertEqual(
+            self.index.suggest("s", filter_value="SUDAH BAYAR"),
+            ["Budi Santoso", "SUDAH BAYAR"],
+        )
+
+    def test_upsert_dan_remove(self):
+        """Perubahan baris memperbarui indeks tanpa membangun ulang"""
+        self.index.upsert(make_bill(2, "Budi Santoso", "BELUM BAYAR", bulan=2))
+        self.assertEqual(self.index.suggest("sudah"), [])
+        self.index.remove(1)
+        self.assertEqual(self.index.suggest("andi"), [])
+        self.index.upsert(make_bill(4, "Dewi Lestari", "BELUM BAYAR"))
+        self.assertEqual(self.index.suggest("les"), ["Dewi Lestari"])
+
+    def test_batas_jumlah_saran(self):
+        """Jumlah saran tidak melebihi limit"""
+        self.index.build([make_bill(i, f"Pelanggan {i}", "BELUM BAYAR") for i in range(50)])
+        self.assertEqual(len(self.index.suggest("pel", limit=8)), 8)
+
+
+class TestGetIndex(unittest.TestCase):
+    def setUp(self):
+        search_index.invalidate("admins")
+        self.addCleanup(search_index.invalidate, "admins")
+        self.app = Flask(__name__)
+        patcher = mock.patch("webapp.search_index.list_admins")
+        self.list_admins = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("webapp.search_index.get_db")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("webapp.search_index._executor")
+        self.executor = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _admin(self, id_user, nama):
+        return {"id_user": id_user, "username": nama.lower(), "nama_admin": nama, "id_level": 1}
+
+    def test_indeks_kedaluwarsa_dibangun_di_background(self):
+        """Indeks kedaluwarsa tetap dipakai selama versi baru dibangun di background"""
+        self.list_admins.return_value = [self._admin(1, "Rina")]
+        with self.app.app_context():
+            index = search_index.get_index(None, "admins", max_age=60)
+            with mock.patch("webapp.search_index.time.monotonic", return_value=index.built_at + 61):
+                self.assertIs(search_index.get_index(None, "admins", max_age=60), index)
+                self.assertIs(search_index.get_index(None, "admins", max_age=60), index)
+        self.assertEqual(self.list_admins.call_count, 1)
+        self.executor.submit.assert_called_once()
+
+        # Baris yang berubah selama rebuild diterapkan ke indeks baru.
+        search_index.refresh_rows(None, "admins", [2])
+        self.list_admins.side_effect = lambda conn, id_user=None: (
+            [self._admin(2, "Dodi")] if id_user == 2 else [self._admin(1, "Rina")]
+        )
+        func, *args = self.executor.submit.call_args.args
+        func(*args)
+        fresh = search_index.get_index(None, "admins", max_age=60)
+        self.assertIsNot(fresh, index)
+        self.assertIn("Dodi", fresh.suggest("dodi"))
+
+    def test_invalidate_saat_rebuild(self):
+        """Hasil rebuild yang berjalan saat invalidate tidak dipasang"""
+        self.list_admins.return_value = [self._admin(1, "Rina")]
+        with self.app.app_context():
+            index = search_index.get_index(None, "admins", max_age=60)
+            with mock.patch("webapp.search_index.time.monotonic", return_value=index.built_at + 61):
+                search_index.get_index(None, "admins", max_age=60)
+        search_index.invalidate("admins")
+        func, *args = self.executor.submit.call_args.args
+        func(*args)
+        self.assertNotIn("admins", search_index._indexes)
+
+
+if __name__ == "__main__":
+    unittest.main()
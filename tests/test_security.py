@@ -0,0 +1,115 @@
+import unittest
+
+from app import auth
+from app.security import (
+    DEFAULT_ITERATIONS,
+    configure_password_hashing,
+    hash_password,
+    legacy_sha256,
+    needs_rehash,
+    verify_password,
+)
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.lastrowid = 0
+        self._rows = []
+
+    def execute(self, query, params=()):
+        self.conn.queries.append((query, params))
+        if query.lstrip().startswith("UPDATE"):
+            self.conn.password = params[0]
+            return
+        username = params[0]
+        self._rows = []
+        if username == "budi":
+            self._rows = [
+                {"role": "pelanggan", "id": 7, "username": "budi", "nama": "Budi", "password": self.conn.password}
+            ]
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, password):
+        self.password = password
+        self.queries = []
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class TestPasswordHash(unittest.TestCase):
+    def setUp(self):
+        configure_password_hashing(1000)
+        self.addCleanup(configure_password_hashing, DEFAULT_ITERATIONS)
+
+    def test_hash_pbkdf2(self):
+        """Hash PBKDF2 bersalt dan bisa diverifikasi"""
+        first, second = hash_password("rahasia"), hash_password("rahasia")
+        self.assertNotEqual(first, second)
+        self.assertTrue(verify_password("rahasia", first))
+        self.assertFalse(verify_password("salah", first))
+        self.assertFalse(needs_rehash(first))
+
+    def test_format_lama(self):
+        """Hash SHA2 lama diterima, password plain hanya jika diizinkan"""
+        self.assertTrue(verify_password("pel123", legacy_sha256("pel123")))
+        self.assertFalse(verify_password("pel123", "pel123"))
+        self.assertTrue(verify_password("pel123", "pel123", allow_plain=True))
+        self.assertTrue(needs_rehash(legacy_sha256("pel123")))
+        self.assertTrue(needs_rehash(hash_password("x", iterations=10)))
+
+
+class TestAuthenticate(unittest.TestCase):
+    def setUp(self):
+        configure_password_hashing(1000)
+        self.addCleanup(configure_password_hashing, DEFAULT_ITERATIONS)
+        auth.unknown_usernames.clear()
+        self.addCleanup(setattr, auth.unknown_usernames, "ttl", auth.unknown_usernames.ttl)
+        auth._storage_ready = True
+        self.addCleanup(setattr, auth, "_storage_ready", None)
+
+    def test_login_dan_rehash(self):
+        """Login dengan hash lama berhasil lalu password di-hash ulang"""
+        conn = FakeConnection(legacy_sha256("pel123"))
+        user = auth.authenticate(conn, "budi", "pel123")
+        self.assertEqual(user, {"role": "pelanggan", "id": 7, "username": "budi", "nama": "Budi"})
+        self.assertTrue(conn.password.startswith("pbkdf2_sha256$"))
+        self.assertIsNotNone(auth.authenticate(conn, "budi", "pel123"))
+        self.assertIsNone(auth.authenticate(conn, "budi", "salah"))
+
+    def test_username_tidak_dikenal_tanpa_query_ulang(self):
+        """Username yang tidak ada ditolak dari cache tanpa query kedua"""
+        auth.unknown_usernames.ttl = 60
+        conn = FakeConnection(legacy_sha256("x"))
+        self.assertIsNone(auth.authenticate(conn, "acak", "x"))
+        self.assertIsNone(auth.authenticate(conn, "ACAK", "x"))
+        self.assertEqual(len(conn.queries), 1)
+        auth.forget_unknown_username("acak")
+        auth.authenticate(conn, "acak", "x")
+        self.assertEqual(len(conn.queries), 2)
+
+    def test_cache_nonaktif_secara_default(self):
+        """Tanpa TTL setiap login dengan username tidak dikenal tetap query"""
+        auth.unknown_usernames.ttl = 0
+        conn = FakeConnection(legacy_sha256("x"))
+        auth.authenticate(conn, "acak", "x")
+        auth.authenticate(conn, "acak", "x")
+        self.assertEqual(len(conn.queries), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
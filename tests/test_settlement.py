@@ -0,0 +1,122 @@
+import io
+import unittest
+from unittest import mock
+
+from webapp.settlement import bulk_settle, bulk_settle_csv, settle_bills
+
+
+class TestSettleBills(unittest.TestCase):
+    def setUp(self):
+        self.conn = mock.Mock()
+        patcher = mock.patch("webapp.settlement.after_settlement")
+        self.after_settlement = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_satu_transaksi_untuk_banyak_tagihan(self):
+        """Banyak tagihan diselesaikan dengan tiga statement dan satu commit"""
+        bills = [
+            {"id_tagihan": 1, "tahun": 2024, "bulan": 1, "status": "BELUM BAYAR"},
+            {"id_tagihan": 2, "tahun": 2024, "bulan": 2, "status": "SUDAH BAYAR"},
+        ]
+        with mock.patch("webapp.settlement.fetch_all", return_value=bills) as fetch_all, mock.patch(
+            "webapp.settlement.execute"
+        ) as execute:
+            result = settle_bills(self.conn, [2, 1, 3, 1], id_user=9)
+
+        self.assertEqual(result.settled, [1, 2])
+        self.assertEqual(result.newly_paid, [1])
+        self.assertEqual(result.missing, [3])
+        self.assertEqual(result.periods, {(2024, 1), (2024, 2)})
+        self.assertIn("FOR UPDATE", fetch_all.call_args.args[1])
+        self.assertEqual(fetch_all.call_args.args[2], (1, 2, 3))
+
+        self.assertEqual(execute.call_count, 2)
+        insert, update = execute.call_args_list
+        self.assertIn("NOT EXISTS", insert.args[1])
+        self.assertEqual(insert.args[2], (9, 1, 2, 9))
+        self.assertEqual(update.args[2], ("SUDAH BAYAR", 1))
+        self.assertTrue(all(call.kwargs["commit"] is False for call in execute.call_args_list))
+        self.conn.commit.assert_called_once()
+        self.after_settlement.assert_called_once_with(self.conn, result)
+
+    def test_rollback_jika_gagal(self):
+        """Semua perubahan dibatalkan jika salah satu statement gagal"""
+        bills = [{"id_tagihan": 1, "tahun": 2024, "bulan": 1, "status": "BELUM BAYAR"}]
+        with mock.patch("webapp.settlement.fetch_all", return_value=bills), mock.patch(
+            "webapp.settlement.execute", side_effect=RuntimeError("gagal")
+        ):
+            with self.assertRaises(RuntimeError):
+                settle_bills(self.conn, [1])
+        self.conn.rollback.assert_called_once()
+        self.conn.commit.assert_not_called()
+        self.after_settlement.assert_not_called()
+
+
+BILLS = {
+    1: {"id_tagihan": 1, "tahun": 2024, "bulan": 1, "status": "BELUM BAYAR"},
+    2: {"id_tagihan": 2, "tahun": 2024, "bulan": 1, "status": "SUDAH BAYAR"},
+    3: {"id_tagihan": 3, "tahun": 2024, "bulan": 2, "status": "BELUM BAYAR"},
+}
+
+
+def fake_fetch_all(conn, query, params=()):
+    if "FOR UPDATE" in query:
+        return [BILLS[id_tagihan] for id_tagihan in params if id_tagihan in BILLS]
+    # Pencarian tagihan dari nomor_kwh + bulan + tahun.
+    periods = [params[i:i + 3] for i in range(0, len(params), 3)]
+    return [
+        {"id_tagihan": 3, "nomor_kwh": "111", "bulan": 2, "tahun": 2024}
+        for period in periods
+        if tuple(period) == ("111", 2, 2024)
+    ]
+
+
+class TestBulkSettle(unittest.TestCase):
+    def setUp(self):
+        self.conn = mock.Mock()
+        for target, kwargs in (
+            ("webapp.settlement.after_settlement", {}),
+            ("webapp.settlement.execute", {}),
+            ("webapp.settlement.fetch_all", {"side_effect": fake_fetch_all}),
+        ):
+            patcher = mock.patch(target, **kwargs)
+            setattr(self, target.rsplit(".", 1)[1], patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def test_hasil_per_tagihan(self):
+        """Setiap id mendapat status hasil masing-masing"""
+        result = bulk_settle(self.conn, ["1", 2, "9", "x", 1], id_user=5)
+        statuses = [(item.reference, item.status) for item in result.items]
+        self.assertEqual(
+            statuses,
+            [("1", "paid"), ("2", "already_paid"), ("9", "not_found"), ("x", "rejected"), ("1", "duplicate")],
+        )
+        self.assertEqual((result.total, result.paid, result.already_paid, result.not_found, result.rejected), (5, 1, 1, 1, 2))
+        self.conn.commit.assert_called_once()
+        combined = self.after_settlement.call_args.args[1]
+        self.assertEqual(combined.newly_paid, [1])
+
+    def test_file_rekonsiliasi_per_batch(self):
+        """File rekonsiliasi dibaca per batch, satu transaksi per batch"""
+        stream = io.StringIO(
+            "id_tagihan,order_id,nomor_kwh,bulan,tahun\n"
+            "1,,,,\n"
+            ",INV-2-1700000000,,,\n"
+            ",,111,2,2024\n"
+            ",,222,2,2024\n"
+            ",INV-abc,,,\n"
+        )
+        result = bulk_settle_csv(self.conn, stream, batch_size=2)
+        by_line = {item.line: item for item in result.items}
+        self.assertEqual(by_line[2].status, "paid")
+        self.assertEqual(by_line[3].status, "already_paid")
+        self.assertEqual((by_line[4].status, by_line[4].id_tagihan), ("paid", 3))
+        self.assertEqual(by_line[5].status, "not_found")
+        self.assertEqual(by_line[6].status, "rejected")
+        self.assertEqual(self.conn.commit.call_count, 3)
+        self.after_settlement.assert_called_once()
+        self.assertEqual(self.after_settlement.call_args.args[1].newly_paid, [1, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
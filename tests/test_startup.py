@@ -0,0 +1,26 @@
+import subprocess
+import sys
+import unittest
+
+from profile_startup import measure
+
+
+class TestStartup(unittest.TestCase):
+    def test_reportlab_tidak_diimport_saat_start(self):
+        """create_app() tidak memuat ReportLab sebelum PDF pertama dibuat"""
+        code = (
+            "import sys; from webapp import create_app; create_app(); "
+            "print('reportlab' in sys.modules)"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "False")
+
+    def test_laporan_importtime(self):
+        """Output -X importtime diringkas per modul"""
+        wall_ms, imports = measure("import json")
+        self.assertGreater(wall_ms, 0)
+        self.assertIn("json", [item["module"] for item in imports])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+from app.db import disable_statement_cache, enable_statement_cache, execute, fetch_all
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.closed = False
+        self.prepared = []
+        self.lastrowid = 0
+
+    def execute(self, query, params=()):
+        if query not in self.prepared:
+            self.prepared.append(query)
+            self.conn.prepare_count += 1
+        self.lastrowid = 7
+
+    def fetchall(self):
+        return [{"ok": 1}]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self):
+        self.connection_id = 1
+        self.prepare_count = 0
+        self.cursors = []
+
+    def cursor(self, **kwargs):
+        cur = FakeCursor(self)
+        self.cursors.append(cur)
+        return cur
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class TestStatementCache(unittest.TestCase):
+    def setUp(self):
+        self.conn = FakeConnection()
+        self.cache = enable_statement_cache(self.conn, maxsize=2)
+
+    def tearDown(self):
+        disable_statement_cache(self.conn)
+
+    def test_statement_di_prepare_sekali(self):
+        """Query yang sama memakai ulang cursor prepared"""
+        for _ in range(5):
+            self.assertEqual(fetch_all(self.conn, "SELECT 1"), [{"ok": 1}])
+        self.assertEqual(self.conn.prepare_count, 1)
+        self.assertEqual(self.cache.hits, 4)
+
+    def test_lru_eviction(self):
+        """Statement paling lama tidak dipakai ditutup saat cache penuh"""
+        fetch_all(self.conn, "SELECT 1")
+        fetch_all(self.conn, "SELECT 2")
+        fetch_all(self.conn, "SELECT 1")
+        fetch_all(self.conn, "SELECT 3")
+        self.assertTrue(self.conn.cursors[1].closed)
+        self.assertFalse(self.conn.cursors[0].closed)
+
+    def test_reconnect_mengosongkan_cache(self):
+        """Statement di-prepare ulang setelah koneksi tersambung ulang"""
+        execute(self.conn, "UPDATE t SET a = 1")
+        self.conn.connection_id = 2
+        self.assertEqual(execute(self.conn, "UPDATE t SET a = 1"), 7)
+        self.assertEqual(self.conn.prepare_count, 2)
+        self.assertTrue(self.conn.cursors[0].closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
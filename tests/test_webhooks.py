@@ -0,0 +1,157 @@
+import os
+import unittest
+from unittest import mock
+
+from dotenv import load_dotenv
+from flask import Flask
+
+from app.db import DBConfig, execute, fetch_all, get_connection
+from webapp import create_app
+from webapp.settlement import SettlementResult
+from webapp.webhooks import QUEUE_TABLE, WebhookQueue, parse_notification
+
+
+class TestParseNotification(unittest.TestCase):
+    def test_order_id(self):
+        """id_tagihan diambil dari order_id INV-<id>-<waktu>"""
+        payload = {"order_id": "INV-12-1700000000", "transaction_status": "settlement"}
+        self.assertEqual(parse_notification(payload), ("INV-12-1700000000", "settlement", 12))
+        self.assertIsNone(parse_notification({"order_id": "INV-x-1", "transaction_status": "settlement"}))
+        self.assertIsNone(parse_notification({"order_id": "INV-12-1"}))
+
+
+class TestNotifyEndpoint(unittest.TestCase):
+    def test_notifikasi_langsung_dibalas(self):
+        """Endpoint hanya menyimpan notifikasi, tanpa menyelesaikan tagihan"""
+        with mock.patch.dict("os.environ", {"WEBHOOK_WORKERS": "0"}):
+            app = create_app()
+        client = app.test_client()
+        with mock.patch("webapp.routes.get_db"), mock.patch.object(
+            WebhookQueue, "enqueue", return_value=True
+        ) as enqueue, mock.patch.object(WebhookQueue, "process_batch") as process_batch:
+            response = client.post(
+                "/payments/notify",
+                json={"order_id": "INV-7-1700000000", "transaction_status": "settlement"},
+            )
+            invalid = client.post("/payments/notify", json={"order_id": "INV-7-1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(enqueue.call_args.args[1:4], ("INV-7-1700000000", "settlement", 7))
+        self.assertEqual(invalid.status_code, 400)
+        process_batch.assert_not_called()
+
+    def test_worker_jalan_saat_request_pertama(self):
+        """Worker dijalankan pada request pertama, bukan menunggu notifikasi baru"""
+        with mock.patch.object(WebhookQueue, "start") as start:
+            app = create_app()
+            start.assert_not_called()
+            app.test_client().get("/login")
+        start.assert_called_once()
+
+    def test_perintah_drain_webhooks(self):
+        """Perintah CLI memproses antrean per batch sampai kosong"""
+        with mock.patch.dict("os.environ", {"WEBHOOK_WORKERS": "0"}):
+            app = create_app()
+        with mock.patch("webapp.webhooks.get_db"), mock.patch.object(
+            WebhookQueue, "process_batch", side_effect=[100, 20, 0]
+        ) as process_batch:
+            result = app.test_cli_runner().invoke(args=["drain-webhooks"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("120", result.output)
+        self.assertEqual(process_batch.call_count, 3)
+
+
+class TestProcessBatch(unittest.TestCase):
+    def test_satu_baris_gagal_dalam_batch(self):
+        """Batch yang gagal diulang per baris; hanya baris yang gagal dilepas"""
+        queue = WebhookQueue(Flask(__name__), workers=0)
+        queue._table_ready = True
+        rows = [
+            {"id": row_id, "order_id": f"INV-{row_id}-1", "transaction_status": "settlement", "id_tagihan": row_id}
+            for row_id in (1, 2, 3)
+        ]
+
+        def apply(conn, token, batch):
+            if any(row["id"] == 2 for row in batch):
+                raise RuntimeError("tagihan 2 terkunci")
+            ids = [row["id_tagihan"] for row in batch]
+            return SettlementResult(settled=ids, newly_paid=ids, periods={(2024, 1)})
+
+        with mock.patch.object(queue, "_claim", return_value=("token", rows)), mock.patch.object(
+            queue, "_apply", side_effect=apply
+        ) as apply_mock, mock.patch("webapp.webhooks.execute") as execute_mock, mock.patch(
+            "webapp.webhooks.after_settlement"
+        ) as after_settlement:
+            self.assertEqual(queue.process_batch(None), 3)
+
+        self.assertEqual(apply_mock.call_count, 4)
+        execute_mock.assert_called_once()
+        self.assertEqual(execute_mock.call_args.args[2][2:], ("token", 2))
+        self.assertIn("tagihan 2 terkunci", execute_mock.call_args.args[2][1])
+        self.assertEqual(after_settlement.call_args.args[1].settled, [1, 3])
+        self.assertEqual(queue._counters["failed_batches"], 1)
+
+
+class TestWebhookQueue(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        load_dotenv()
+
+        cfg = DBConfig(
+            host=os.getenv("DB_HOST", "localhost"),
+            user=os.getenv("DB_USER", "app_admin"),
+            password=os.getenv("DB_PASSWORD", ""),
+            database=os.getenv("DB_NAME", "lsp_listrik"),
+            port=int(os.getenv("DB_PORT", "3306")),
+        )
+        cls.conn = get_connection(cfg)
+
+        rows = fetch_all(
+            cls.conn,
+            """
+            SELECT t.id_tagihan FROM tagihan t
+            JOIN pelanggan pl ON pl.id_pelanggan = t.id_pelanggan
+            WHERE pl.username = %s AND t.status <> 'SUDAH BAYAR'
+            LIMIT 1
+            """,
+            ("pel_test",),
+        )
+        if not rows:
+            raise RuntimeError("Tagihan uji milik 'pel_test' yang belum dibayar tidak ditemukan.")
+        cls.id_tagihan = int(rows[0]["id_tagihan"])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def setUp(self):
+        self.order_id = f"INV-{self.id_tagihan}-1"
+        self.queue = WebhookQueue(Flask(__name__), workers=0)
+        self.addCleanup(self._kembalikan_data)
+
+    def _kembalikan_data(self):
+        execute(self.conn, f"DELETE FROM {QUEUE_TABLE} WHERE order_id = %s", (self.order_id,))
+        execute(self.conn, "DELETE FROM pembayaran WHERE id_tagihan = %s", (self.id_tagihan,))
+        execute(self.conn, "UPDATE tagihan SET status = 'BELUM BAYAR' WHERE id_tagihan = %s", (self.id_tagihan,))
+
+    def test_notifikasi_ganda_satu_pembayaran(self):
+        """Notifikasi yang dikirim ulang hanya menghasilkan satu pembayaran"""
+        payload = {"order_id": self.order_id, "transaction_status": "settlement"}
+        self.assertTrue(self.queue.enqueue(self.conn, self.order_id, "settlement", self.id_tagihan, payload))
+        self.assertFalse(self.queue.enqueue(self.conn, self.order_id, "settlement", self.id_tagihan, payload))
+
+        with mock.patch("webapp.webhooks.after_settlement") as after_settlement:
+            self.assertEqual(self.queue.process_batch(self.conn), 1)
+            self.queue.enqueue(self.conn, self.order_id, "capture", self.id_tagihan, payload)
+            self.assertEqual(self.queue.process_batch(self.conn), 1)
+        self.assertEqual(after_settlement.call_count, 2)
+
+        payments = fetch_all(
+            self.conn, "SELECT COUNT(*) AS total FROM pembayaran WHERE id_tagihan = %s", (self.id_tagihan,)
+        )
+        self.assertEqual(int(payments[0]["total"]), 1)
+        bill = fetch_all(self.conn, "SELECT status FROM tagihan WHERE id_tagihan = %s", (self.id_tagihan,))
+        self.assertEqual(bill[0]["status"], "SUDAH BAYAR")
+
+
+if __name__ == "__main__":
+    unittest.main()
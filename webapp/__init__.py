@@ -3,8 +3,17 @@ import os
 from dotenv import load_dotenv
 from flask import Flask
 
+from app.auth import unknown_usernames
+from app.security import configure_password_hashing
+
 from .db import init_app as init_db
+from .instrumentation import init_app as init_instrumentation
+from .midtrans import init_app as init_midtrans
+from .proof_cache import init_app as init_proof_cache
+from .ratelimit import init_app as init_login_limiter
+from .report_jobs import init_app as init_report_jobs
 from .routes import register_routes
+from .webhooks import init_app as init_webhooks
 
 
 def create_app() -> Flask:
@@ -19,11 +28,65 @@ def create_app() -> Flask:
     app.config["DB_NAME"] = os.getenv("DB_NAME", "lsp_listrik")
     app.config["DB_PORT"] = int(os.getenv("DB_PORT", "3306"))
 
+    app.config["DB_POOL_SIZE"] = int(os.getenv("DB_POOL_SIZE", "5"))
+    app.config["DB_POOL_MAX_OVERFLOW"] = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))
+    app.config["DB_POOL_TIMEOUT"] = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    app.config["DB_POOL_RECYCLE"] = float(os.getenv("DB_POOL_RECYCLE", "3600"))
+    app.config["DB_POOL_PRE_PING"] = (
+        os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    )
+    app.config["DB_STATEMENT_CACHE_SIZE"] = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "0"))
+    app.config["DB_INSTRUMENTATION"] = (
+        os.getenv("DB_INSTRUMENTATION", "true").lower() == "true"
+    )
+    app.config["DB_SLOW_QUERY_MS"] = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+    app.config["DB_N_PLUS_ONE_THRESHOLD"] = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "10"))
+    app.config["DB_DEBUG_FOOTER"] = (
+        os.getenv("DB_DEBUG_FOOTER", "false").lower() == "true"
+    )
+    app.config["DB_TIMING_HEADERS"] = (
+        os.getenv("DB_TIMING_HEADERS", "false").lower() == "true"
+    )
+
+    app.config["DASHBOARD_CACHE_TTL"] = float(os.getenv("DASHBOARD_CACHE_TTL", "5"))
+    app.config["NOTIFICATION_CACHE_TTL"] = float(os.getenv("NOTIFICATION_CACHE_TTL", "30"))
+    app.config["USAGE_IMPORT_CHUNK_SIZE"] = int(os.getenv("USAGE_IMPORT_CHUNK_SIZE", "1000"))
+    app.config["SEARCH_INDEX_MAX_AGE"] = float(os.getenv("SEARCH_INDEX_MAX_AGE", "300"))
+    app.config["REFERENCE_CACHE_TTL"] = float(os.getenv("REFERENCE_CACHE_TTL", "300"))
+
+    app.config["REPORT_CACHE_DIR"] = os.getenv("REPORT_CACHE_DIR", "")
+    app.config["REPORT_WORKERS"] = int(os.getenv("REPORT_WORKERS", "2"))
+    app.config["REPORT_EXPORT_CHUNK_SIZE"] = int(os.getenv("REPORT_EXPORT_CHUNK_SIZE", "1000"))
+    app.config["PROOF_CACHE_DIR"] = os.getenv("PROOF_CACHE_DIR", "")
+    app.config["PROOF_WORKERS"] = int(os.getenv("PROOF_WORKERS", "1"))
+
+    app.config["PASSWORD_HASH_ITERATIONS"] = int(os.getenv("PASSWORD_HASH_ITERATIONS", "600000"))
+    app.config["LOGIN_UNKNOWN_USER_TTL"] = float(os.getenv("LOGIN_UNKNOWN_USER_TTL", "0"))
+    app.config["LOGIN_RATE_LIMIT_ENABLED"] = (
+        os.getenv("LOGIN_RATE_LIMIT_ENABLED", "true").lower() == "true"
+    )
+    app.config["LOGIN_RATE_LIMIT_STORAGE"] = os.getenv("LOGIN_RATE_LIMIT_STORAGE", "")
+    app.config["LOGIN_USER_BURST"] = float(os.getenv("LOGIN_USER_BURST", "5"))
+    app.config["LOGIN_USER_PER_MINUTE"] = float(os.getenv("LOGIN_USER_PER_MINUTE", "5"))
+    app.config["LOGIN_IP_BURST"] = float(os.getenv("LOGIN_IP_BURST", "30"))
+    app.config["LOGIN_IP_PER_MINUTE"] = float(os.getenv("LOGIN_IP_PER_MINUTE", "30"))
+
     app.config["MIDTRANS_SERVER_KEY"] = os.getenv("MIDTRANS_SERVER_KEY", "")
     app.config["MIDTRANS_CLIENT_KEY"] = os.getenv("MIDTRANS_CLIENT_KEY", "")
     app.config["MIDTRANS_IS_PRODUCTION"] = (
         os.getenv("MIDTRANS_IS_PRODUCTION", "false").lower() == "true"
     )
+    app.config["MIDTRANS_BASE_URL"] = os.getenv("MIDTRANS_BASE_URL", "")
+    app.config["MIDTRANS_CONNECT_TIMEOUT"] = float(os.getenv("MIDTRANS_CONNECT_TIMEOUT", "3.05"))
+    app.config["MIDTRANS_READ_TIMEOUT"] = float(os.getenv("MIDTRANS_READ_TIMEOUT", "10"))
+    app.config["MIDTRANS_RETRIES"] = int(os.getenv("MIDTRANS_RETRIES", "2"))
+    app.config["MIDTRANS_POOL_SIZE"] = int(os.getenv("MIDTRANS_POOL_SIZE", "10"))
+    app.config["MIDTRANS_BREAKER_THRESHOLD"] = int(os.getenv("MIDTRANS_BREAKER_THRESHOLD", "5"))
+    app.config["MIDTRANS_BREAKER_RESET"] = float(os.getenv("MIDTRANS_BREAKER_RESET", "30"))
+    app.config["WEBHOOK_WORKERS"] = int(os.getenv("WEBHOOK_WORKERS", "2"))
+    app.config["WEBHOOK_BATCH_SIZE"] = int(os.getenv("WEBHOOK_BATCH_SIZE", "100"))
+    app.config["WEBHOOK_POLL_INTERVAL"] = float(os.getenv("WEBHOOK_POLL_INTERVAL", "5"))
+    app.config["BULK_SETTLE_BATCH_SIZE"] = int(os.getenv("BULK_SETTLE_BATCH_SIZE", "500"))
 
     @app.template_filter("rupiah")
     def format_rupiah(value) -> str:
@@ -34,6 +97,19 @@ def create_app() -> Flask:
         formatted = f"{amount:,.0f}".replace(",", ".")
         return f"Rp {formatted}"
 
+    configure_password_hashing(app.config["PASSWORD_HASH_ITERATIONS"])
+    # Rate limit per username sudah meredam tebakan username acak, jadi
+    # cache username tidak dikenal (yang per proses) hanya dipakai tanpanya.
+    unknown_usernames.ttl = (
+        0 if app.config["LOGIN_RATE_LIMIT_ENABLED"] else app.config["LOGIN_UNKNOWN_USER_TTL"]
+    )
+
     init_db(app)
+    init_instrumentation(app)
+    init_report_jobs(app)
+    init_proof_cache(app)
+    init_login_limiter(app)
+    init_midtrans(app)
+    init_webhooks(app)
     register_routes(app)
     return app
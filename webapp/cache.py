@@ -0,0 +1,119 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class TTLCache:
+    """Cache in-process sederhana dengan masa berlaku per entri.
+
+    TTL <= 0 berarti cache nonaktif: loader selalu dipanggil.
+    """
+
+    def __init__(self, ttl: float = 0.0, maxsize: int = 256) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        # Lock pemuatan per key beserta jumlah thread yang memakainya.
+        self._load_locks: Dict[Hashable, List[Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            return True, value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return loader()
+        hit, value = self.get(key)
+        if hit:
+            return value
+        # Satu thread per key yang memuat ulang; thread lain untuk key yang sama
+        # menunggu lalu memakai hasilnya, key lain tidak ikut tertahan.
+        entry = self._acquire_load_lock(key)
+        try:
+            with entry[0]:
+                hit, value = self.get(key)
+                if hit:
+                    return value
+                value = loader()
+                self.set(key, value, ttl)
+                return value
+        finally:
+            self._release_load_lock(key, entry)
+
+    def _acquire_load_lock(self, key: Hashable) -> List[Any]:
+        with self._lock:
+            entry = self._load_locks.get(key)
+            if entry is None:
+                entry = self._load_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+            return entry
+
+    def _release_load_lock(self, key: Hashable, entry: List[Any]) -> None:
+        with self._lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._load_locks[key]
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+_caches: Dict[str, TTLCache] = {}
+_versions: Dict[str, int] = {}
+_registry_lock = threading.Lock()
+
+
+def get_cache(name: str) -> TTLCache:
+    with _registry_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = _caches[name] = TTLCache()
+        return cache
+
+
+def invalidate(*names: str) -> None:
+    for name in names:
+        get_cache(name).invalidate()
+
+
+def get_version(name: str) -> int:
+    with _registry_lock:
+        return _versions.get(name, 0)
+
+
+def bump_version(*names: str) -> None:
+    """Menaikkan versi data; entri cache dengan versi lama tidak dipakai lagi."""
+    with _registry_lock:
+        for name in names:
+            _versions[name] = _versions.get(name, 0) + 1
@@ -0,0 +1,15 @@
+from typing import Any, Dict
+
+from .cache import get_cache
+from .queries import get_admin_stats, list_recent_bills
+
+
+def get_admin_dashboard(conn, ttl: float = 0.0) -> Dict[str, Any]:
+    return get_cache("dashboard").get_or_load(
+        "admin",
+        lambda: {
+            "stats": get_admin_stats(conn),
+            "bills": list_recent_bills(conn, limit=5),
+        },
+        ttl,
+    )
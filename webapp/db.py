@@ -1,26 +1,40 @@
 from flask import current_app, g
 
-from app.db import DBConfig, get_connection
+from app.db import ConnectionPool, DBConfig, PoolConfig
+
+
+def get_pool(app=None) -> ConnectionPool:
+    app = app or current_app
+    return app.extensions["db_pool"]
 
 
 def get_db():
     if "db" not in g:
-        cfg = DBConfig(
-            host=current_app.config["DB_HOST"],
-            user=current_app.config["DB_USER"],
-            password=current_app.config["DB_PASSWORD"],
-            database=current_app.config["DB_NAME"],
-            port=current_app.config["DB_PORT"],
-        )
-        g.db = get_connection(cfg)
+        g.db = get_pool().acquire()
     return g.db
 
 
-def close_db(_exc=None):
+def close_db(exc=None):
     db = g.pop("db", None)
     if db is not None:
-        db.close()
+        get_pool().release(db, discard=exc is not None)
 
 
 def init_app(app):
-    app.teardown_appcontext(close_db)
+    cfg = DBConfig(
+        host=app.config["DB_HOST"],
+        user=app.config["DB_USER"],
+        password=app.config["DB_PASSWORD"],
+        database=app.config["DB_NAME"],
+        port=app.config["DB_PORT"],
+    )
+    pool_cfg = PoolConfig(
+        pool_size=app.config["DB_POOL_SIZE"],
+        max_overflow=app.config["DB_POOL_MAX_OVERFLOW"],
+        timeout=app.config["DB_POOL_TIMEOUT"],
+        recycle=app.config["DB_POOL_RECYCLE"],
+        pre_ping=app.config["DB_POOL_PRE_PING"],
+        statement_cache_size=app.config["DB_STATEMENT_CACHE_SIZE"],
+    )
+    app.extensions["db_pool"] = ConnectionPool(cfg, pool_cfg)
+    app.teardown_appcontext(close_db)
@@ -0,0 +1,78 @@
+import csv
+import io
+import os
+import tempfile
+from typing import Any, Dict, Iterable, Iterator
+
+REPORT_EXPORT_COLUMNS = [
+    ("tahun", "Tahun"),
+    ("bulan", "Bulan"),
+    ("nama_pelanggan", "Nama Pelanggan"),
+    ("nomor_kwh", "No KWH"),
+    ("alamat", "Alamat"),
+    ("meter_awal", "Meter Awal"),
+    ("meter_akhir", "Meter Akhir"),
+    ("jumlah_meter", "Jumlah Meter"),
+    ("tarifperkwh", "Tarif/kWh"),
+    ("total_bayar", "Total Bayar"),
+    ("status", "Status"),
+]
+
+CSV_FLUSH_ROWS = 500
+XLSX_READ_SIZE = 64 * 1024
+
+
+def xlsx_available() -> bool:
+    try:
+        import xlsxwriter  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def stream_report_csv(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([label for _, label in REPORT_EXPORT_COLUMNS])
+    pending = 0
+    for row in rows:
+        writer.writerow(["" if row[key] is None else row[key] for key, _ in REPORT_EXPORT_COLUMNS])
+        pending += 1
+        if pending >= CSV_FLUSH_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def stream_report_xlsx(rows: Iterable[Dict[str, Any]], sheet_name: str = "Laporan") -> Iterator[bytes]:
+    # XLSX adalah arsip zip yang baru lengkap saat workbook ditutup, jadi
+    # ditulis dulu ke file sementara. Mode constant_memory membuat
+    # xlsxwriter langsung menulis setiap baris ke disk.
+    import xlsxwriter
+
+    handle, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(handle)
+    try:
+        workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+        sheet = workbook.add_worksheet(sheet_name)
+        header_format = workbook.add_format({"bold": True})
+        sheet.write_row(0, 0, [label for _, label in REPORT_EXPORT_COLUMNS], header_format)
+        for row_num, row in enumerate(rows, start=1):
+            values = []
+            for key, _ in REPORT_EXPORT_COLUMNS:
+                value = row[key]
+                # Decimal dari ROUND() ditulis sebagai angka, bukan teks.
+                values.append(float(value) if key == "total_bayar" and value is not None else value)
+            sheet.write_row(row_num, 0, values)
+        workbook.close()
+
+        with open(path, "rb") as output:
+            while True:
+                chunk = output.read(XLSX_READ_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
@@ -0,0 +1,240 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from flask import current_app, g, has_app_context, has_request_context, request, session
+from markupsafe import escape
+
+from app.db import add_query_hook, query_fingerprint
+
+# Fingerprint baru di atas batas ini tidak disimpan terpisah, hanya dihitung
+# di "dropped", agar query yang dibangun dinamis tidak memenuhi memori.
+MAX_FINGERPRINTS = 500
+SLOW_QUERY_HISTORY = 50
+SQL_PREVIEW_LENGTH = 500
+
+
+class RequestQueries:
+    __slots__ = ("count", "seconds", "by_fingerprint")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.by_fingerprint: Dict[str, int] = {}
+
+    def add(self, fingerprint: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.by_fingerprint[fingerprint] = self.by_fingerprint.get(fingerprint, 0) + 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        if threshold <= 0:
+            return []
+        return sorted(
+            ((fingerprint, total) for fingerprint, total in self.by_fingerprint.items() if total >= threshold),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+
+
+class QueryStats:
+    """Statistik query per fingerprint SQL untuk seluruh proses.
+
+    Query yang sama dengan parameter berbeda digabung lewat fingerprint
+    (lihat app.db.query_fingerprint). Query yang melebihi slow_query_ms
+    dicatat ke log dan ke daftar query lambat terakhir; fingerprint yang
+    berulang n_plus_one_threshold kali dalam satu request dicatat sebagai
+    dugaan N+1.
+    """
+
+    def __init__(
+        self,
+        slow_query_ms: float = 200,
+        n_plus_one_threshold: int = 10,
+        max_fingerprints: int = MAX_FINGERPRINTS,
+    ) -> None:
+        self.slow_query_ms = slow_query_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.max_fingerprints = max_fingerprints
+        self._queries: Dict[str, Dict[str, Any]] = {}
+        self._n_plus_one: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._slow: Deque[Dict[str, Any]] = deque(maxlen=SLOW_QUERY_HISTORY)
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, query: str, seconds: float, rowcount: int) -> str:
+        fingerprint = query_fingerprint(query)
+        with self._lock:
+            entry = self._queries.get(fingerprint)
+            if entry is None and len(self._queries) < self.max_fingerprints:
+                entry = self._queries[fingerprint] = {
+                    "kind": kind,
+                    "count": 0,
+                    "total": 0.0,
+                    "max": 0.0,
+                    "rows": 0,
+                }
+            if entry is None:
+                self._dropped += 1
+            else:
+                entry["count"] += 1
+                entry["total"] += seconds
+                entry["max"] = max(entry["max"], seconds)
+                entry["rows"] += rowcount
+
+        if self.slow_query_ms > 0 and seconds * 1000 >= self.slow_query_ms:
+            self._record_slow(fingerprint, query, seconds, rowcount)
+        return fingerprint
+
+    def _record_slow(self, fingerprint: str, query: str, seconds: float, rowcount: int) -> None:
+        endpoint = request.endpoint if has_request_context() else None
+        sql = " ".join(query.split())[:SQL_PREVIEW_LENGTH]
+        with self._lock:
+            self._slow.append(
+                {
+                    "fingerprint": fingerprint,
+                    "duration_ms": round(seconds * 1000, 1),
+                    "rows": rowcount,
+                    "endpoint": endpoint,
+                    "at": time.time(),
+                }
+            )
+        current_app.logger.warning(
+            "Query lambat %.1f ms (%d baris, endpoint %s): %s", seconds * 1000, rowcount, endpoint or "-", sql
+        )
+
+    def check_request(self, endpoint: Optional[str], queries: RequestQueries) -> List[Tuple[str, int]]:
+        repeated = queries.repeated(self.n_plus_one_threshold)
+        if not repeated:
+            return repeated
+        with self._lock:
+            for fingerprint, total in repeated:
+                key = (endpoint or "-", fingerprint)
+                entry = self._n_plus_one.get(key)
+                if entry is None:
+                    if len(self._n_plus_one) >= self.max_fingerprints:
+                        continue
+                    entry = self._n_plus_one[key] = {"requests": 0, "max_repeats": 0}
+                entry["requests"] += 1
+                entry["max_repeats"] = max(entry["max_repeats"], total)
+        for fingerprint, total in repeated:
+            current_app.logger.warning(
+                "Dugaan N+1 di endpoint %s: query diulang %d kali: %s", endpoint or "-", total, fingerprint
+            )
+        return repeated
+
+    def top_queries(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = sorted(self._queries.items(), key=lambda item: item[1]["total"], reverse=True)[:limit]
+            return [
+                {
+                    "fingerprint": fingerprint,
+                    "kind": entry["kind"],
+                    "count": entry["count"],
+                    "total_ms": round(entry["total"] * 1000, 1),
+                    "avg_ms": round(entry["total"] * 1000 / entry["count"], 2),
+                    "max_ms": round(entry["max"] * 1000, 1),
+                    "rows": entry["rows"],
+                }
+                for fingerprint, entry in items
+            ]
+
+    def stats(self, limit: int = 20) -> Dict[str, Any]:
+        top = self.top_queries(limit)
+        with self._lock:
+            n_plus_one = sorted(self._n_plus_one.items(), key=lambda item: item[1]["requests"], reverse=True)
+            return {
+                "enabled": True,
+                "slow_query_ms": self.slow_query_ms,
+                "n_plus_one_threshold": self.n_plus_one_threshold,
+                "fingerprints": len(self._queries),
+                "dropped": self._dropped,
+                "queries": top,
+                "slow_queries": list(reversed(self._slow)),
+                "n_plus_one": [
+                    {"endpoint": endpoint, "fingerprint": fingerprint, **entry}
+                    for (endpoint, fingerprint), entry in n_plus_one[:limit]
+                ],
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._queries.clear()
+            self._n_plus_one.clear()
+            self._slow.clear()
+            self._dropped = 0
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    return current_app.extensions.get("db_instrumentation")
+
+
+# Hook app.db berlaku untuk seluruh proses; statistik dicatat ke app yang
+# sedang aktif. Query di luar app context (misal script CLI) diabaikan.
+def _on_query(kind: str, query: str, seconds: float, rowcount: int) -> None:
+    if not has_app_context():
+        return
+    stats = current_app.extensions.get("db_instrumentation")
+    if stats is None:
+        return
+    fingerprint = stats.record(kind, query, seconds, rowcount)
+    if has_request_context():
+        queries = g.get("db_queries")
+        if queries is None:
+            queries = g.db_queries = RequestQueries()
+        queries.add(fingerprint, seconds)
+
+
+def _debug_footer(queries: RequestQueries, repeated: List[Tuple[str, int]]) -> str:
+    lines = "".join(
+        f"<li>{total}&times; <code>{escape(fingerprint)}</code></li>" for fingerprint, total in repeated
+    )
+    warning = f"<div>Query berulang (dugaan N+1):</div><ul>{lines}</ul>" if lines else ""
+    return (
+        '<div id="db-debug-footer" style="font:12px monospace;padding:6px 12px;'
+        'background:#fff3cd;border-top:1px solid #e0c36c">'
+        f"DB: {queries.count} query, {queries.seconds * 1000:.1f} ms{warning}</div>"
+    )
+
+
+def init_app(app) -> None:
+    if not app.config["DB_INSTRUMENTATION"]:
+        app.extensions["db_instrumentation"] = None
+        return
+    app.extensions["db_instrumentation"] = QueryStats(
+        slow_query_ms=app.config["DB_SLOW_QUERY_MS"],
+        n_plus_one_threshold=app.config["DB_N_PLUS_ONE_THRESHOLD"],
+    )
+    add_query_hook(_on_query)
+    debug_footer = app.config["DB_DEBUG_FOOTER"]
+    timing_headers = app.config["DB_TIMING_HEADERS"]
+
+    @app.after_request
+    def add_db_timing_headers(response):
+        queries = g.get("db_queries") or RequestQueries()
+        # Jumlah dan waktu query membocorkan detail backend (misal apakah
+        # username ada di cache login), jadi header hanya dikirim ke admin
+        # kecuali DB_TIMING_HEADERS diaktifkan untuk debugging.
+        if timing_headers or session.get("role") == "admin":
+            duration_ms = queries.seconds * 1000
+            # Respons streaming (export CSV/XLSX) masih menjalankan query setelah
+            # header dikirim; angka di header hanya mencakup query sebelumnya.
+            response.headers["X-DB-Queries"] = str(queries.count)
+            response.headers["X-DB-Time-Ms"] = f"{duration_ms:.1f}"
+            response.headers.add("Server-Timing", f'db;dur={duration_ms:.1f};desc="{queries.count} query"')
+        if debug_footer and response.mimetype == "text/html" and not (
+            response.is_streamed or response.direct_passthrough
+        ):
+            repeated = queries.repeated(app.extensions["db_instrumentation"].n_plus_one_threshold)
+            html = response.get_data(as_text=True)
+            position = html.rfind("</body>")
+            if position != -1:
+                response.set_data(html[:position] + _debug_footer(queries, repeated) + html[position:])
+        return response
+
+    @app.teardown_request
+    def check_repeated_queries(exc=None):
+        queries = g.pop("db_queries", None)
+        if queries is not None:
+            app.extensions["db_instrumentation"].check_request(request.endpoint, queries)
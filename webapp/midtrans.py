@@ -1,6 +1,20 @@
-from typing import Any, Dict, List, Optional
+import bisect
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ReadTimeoutError
+from urllib3.util.retry import Retry
+
+# Batas atas bucket histogram latensi (detik); bucket terakhir tak terbatas.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class CircuitOpenError(RuntimeError):
+    pass
 
 
 def is_midtrans_enabled(config: Dict[str, Any]) -> bool:
@@ -13,45 +27,229 @@ def get_snap_url(is_production: bool) -> str:
     return "https://app.sandbox.midtrans.com/snap/snap.js"
 
 
-def create_snap_token(
-    config: Dict[str, Any],
-    order_id: str,
-    gross_amount: int,
-    customer: Dict[str, Any],
-    item_details: Optional[List[Dict[str, Any]]] = None,
-) -> str:
-    base_url = "https://app.midtrans.com" if config["MIDTRANS_IS_PRODUCTION"] else "https://app.sandbox.midtrans.com"
-
-    payload = {
-        "transaction_details": {
-            "order_id": order_id,
-            "gross_amount": gross_amount,
-        },
-        "customer_details": {
-            "first_name": customer.get("name", "Pelanggan"),
-            "email": customer.get("email", "pelanggan@example.com"),
-        },
-        "item_details": item_details
-        or [
-            {
-                "id": "tagihan",
-                "price": gross_amount,
-                "quantity": 1,
-                "name": "Tagihan Listrik",
+def get_api_base_url(is_production: bool) -> str:
+    return "https://app.midtrans.com" if is_production else "https://app.sandbox.midtrans.com"
+
+
+class CircuitBreaker:
+    """Memutus panggilan ke gateway setelah beberapa kegagalan berturut-turut.
+
+    Saat terbuka, panggilan langsung gagal sampai reset_timeout lewat; lalu
+    satu panggilan percobaan diizinkan (half-open) untuk menentukan apakah
+    sirkuit ditutup kembali.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if now - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class LatencyHistogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self._data: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, outcome: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._data.setdefault(
+                outcome, {"counts": [0] * (len(self.buckets) + 1), "count": 0, "sum": 0.0}
+            )
+            entry["counts"][bisect.bisect_left(self.buckets, seconds)] += 1
+            entry["count"] += 1
+            entry["sum"] += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"le_{bound:g}" for bound in self.buckets] + ["le_inf"]
+        with self._lock:
+            return {
+                outcome: {
+                    "count": entry["count"],
+                    "sum_ms": round(entry["sum"] * 1000, 1),
+                    "buckets": dict(zip(labels, entry["counts"])),
+                }
+                for outcome, entry in self._data.items()
             }
-        ],
-    }
-
-    response = requests.post(
-        f"{base_url}/snap/v1/transactions",
-        auth=(config["MIDTRANS_SERVER_KEY"], ""),
-        json=payload,
-        headers={"Accept": "application/json", "Content-Type": "application/json"},
-        timeout=20,
+
+
+class MidtransClient:
+    def __init__(
+        self,
+        server_key: str,
+        is_production: bool = False,
+        base_url: str = "",
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        retries: int = 2,
+        backoff: float = 0.3,
+        pool_size: int = 10,
+        breaker_threshold: int = 5,
+        breaker_reset: float = 30.0,
+    ) -> None:
+        self.server_key = server_key
+        self.base_url = (base_url or get_api_base_url(is_production)).rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self.latency = LatencyHistogram()
+
+        # Hanya kegagalan yang pasti belum membuat transaksi yang diulang:
+        # koneksi gagal serta 429/503 (request ditolak sebelum diproses).
+        # Read timeout, 502, dan 504 tidak diulang karena Midtrans bisa saja
+        # sudah menerima order_id tersebut di balik gateway.
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            status_forcelist=(429, 503),
+            allowed_methods=frozenset({"POST"}),
+            backoff_factor=backoff,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.auth = (server_key, "")
+        self.session.headers.update({"Accept": "application/json", "Content-Type": "application/json"})
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.breaker.allow():
+            self.latency.observe("circuit_open", 0.0)
+            raise CircuitOpenError("Midtrans sedang tidak tersedia")
+
+        started = time.perf_counter()
+        outcome = "error"
+        recorded = False
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+            if response.status_code >= 500:
+                outcome = f"http_{response.status_code}"
+                self.breaker.record_failure()
+            else:
+                # 4xx berarti request ditolak, bukan gateway yang bermasalah.
+                outcome = "ok" if response.ok else f"http_{response.status_code}"
+                self.breaker.record_success()
+            recorded = True
+            response.raise_for_status()
+            return response.json()
+        except requests.ConnectionError as exc:
+            # Dengan Retry aktif, read timeout dari urllib3 dibungkus requests
+            # sebagai ConnectionError; kembalikan ke tipe timeout yang benar.
+            reason = exc.args[0].reason if exc.args and isinstance(exc.args[0], MaxRetryError) else None
+            if isinstance(reason, ReadTimeoutError):
+                outcome = "timeout"
+                raise requests.ReadTimeout(reason, request=exc.request) from exc
+            outcome = "connection_error"
+            raise
+        except requests.Timeout:
+            outcome = "timeout"
+            raise
+        finally:
+            # Semua kegagalan sebelum ada respons (termasuk ChunkedEncodingError,
+            # TooManyRedirects, InvalidHeader) dihitung sebagai gagal, sehingga
+            # panggilan percobaan saat half-open tidak pernah menggantung.
+            if not recorded:
+                self.breaker.record_failure()
+            self.latency.observe(outcome, time.perf_counter() - started)
+
+    def create_snap_token(
+        self,
+        order_id: str,
+        gross_amount: int,
+        customer: Dict[str, Any],
+        item_details: Optional[List[Dict[str, Any]]] = None,
+    ) -> str:
+        payload = {
+            "transaction_details": {
+                "order_id": order_id,
+                "gross_amount": gross_amount,
+            },
+            "customer_details": {
+                "first_name": customer.get("name", "Pelanggan"),
+                "email": customer.get("email", "pelanggan@example.com"),
+            },
+            "item_details": item_details
+            or [
+                {
+                    "id": "tagihan",
+                    "price": gross_amount,
+                    "quantity": 1,
+                    "name": "Tagihan Listrik",
+                }
+            ],
+        }
+        data = self._post("/snap/v1/transactions", payload)
+        token = data.get("token")
+        if not token:
+            raise RuntimeError("Snap token not returned")
+        return token
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "latency": self.latency.snapshot(),
+        }
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def get_midtrans_client() -> MidtransClient:
+    return current_app.extensions["midtrans"]
+
+
+def init_app(app) -> None:
+    app.extensions["midtrans"] = MidtransClient(
+        app.config["MIDTRANS_SERVER_KEY"],
+        is_production=app.config["MIDTRANS_IS_PRODUCTION"],
+        base_url=app.config["MIDTRANS_BASE_URL"],
+        connect_timeout=app.config["MIDTRANS_CONNECT_TIMEOUT"],
+        read_timeout=app.config["MIDTRANS_READ_TIMEOUT"],
+        retries=app.config["MIDTRANS_RETRIES"],
+        pool_size=app.config["MIDTRANS_POOL_SIZE"],
+        breaker_threshold=app.config["MIDTRANS_BREAKER_THRESHOLD"],
+        breaker_reset=app.config["MIDTRANS_BREAKER_RESET"],
     )
-    response.raise_for_status()
-    data = response.json()
-    token = data.get("token")
-    if not token:
-        raise RuntimeError("Snap token not returned")
-    return token
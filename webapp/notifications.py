@@ -0,0 +1,37 @@
+from typing import Any, Dict, List
+
+from .cache import get_cache
+from .queries import list_payments_since, list_recent_payments
+
+FEED_SIZE = 20
+
+
+def get_notification_feed(conn, ttl: float = 0.0) -> List[Dict[str, Any]]:
+    return get_cache("notifications").get_or_load(
+        "feed",
+        lambda: list_recent_payments(conn, limit=FEED_SIZE),
+        ttl,
+    )
+
+
+def get_notifications_since(conn, since_id: int, ttl: float = 0.0) -> List[Dict[str, Any]]:
+    # Feed yang masih segar sudah memuat pembayaran terbaru di proses ini
+    # (create_payment membuang cache), jadi polling tanpa data baru tidak
+    # perlu menyentuh database.
+    feed = get_notification_feed(conn, ttl)
+    latest_id = max((int(row["id_pembayaran"]) for row in feed), default=0)
+    if ttl > 0 and since_id >= latest_id:
+        return []
+    return list_payments_since(conn, since_id, limit=FEED_SIZE)
+
+
+def serialize_notification(row: Dict[str, Any]) -> Dict[str, Any]:
+    tanggal = row.get("tanggal_pembayaran")
+    return {
+        "id_pembayaran": int(row["id_pembayaran"]),
+        "id_tagihan": int(row["id_tagihan"]),
+        "id_pelanggan": int(row["id_pelanggan"]),
+        "nama_pelanggan": row.get("nama_pelanggan"),
+        "tanggal_pembayaran": tanggal.strftime("%d-%m-%Y") if tanggal else "-",
+        "total_bayar": float(row.get("total_bayar") or 0),
+    }
@@ -0,0 +1,366 @@
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Optional
+
+from PIL import Image as PILImage
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Flowable, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+MONTH_NAMES = [
+    "Januari",
+    "Februari",
+    "Maret",
+    "April",
+    "Mei",
+    "Juni",
+    "Juli",
+    "Agustus",
+    "September",
+    "Oktober",
+    "November",
+    "Desember",
+]
+
+LOGO_PATH = Path("assets/Logo-LSPBSI.png")
+LOGO_MAX_PX = 480
+
+# Modul ini sengaja hanya di-import saat PDF pertama kali dibuat (lihat
+# report_jobs dan proof_cache) supaya worker yang tidak pernah membuat PDF
+# tidak ikut menanggung biaya import ReportLab saat start.
+
+
+@lru_cache(maxsize=None)
+def get_styles() -> Dict[str, Any]:
+    styles = getSampleStyleSheet()
+
+    title_style = styles["Heading1"].clone("title_style")
+    title_style.alignment = TA_CENTER
+
+    style_title = styles["Heading1"].clone("style_title")
+    style_title.fontSize = 18
+    style_title.leading = 22
+    style_title.alignment = TA_RIGHT
+    style_title.fontName = "Helvetica-Bold"
+
+    style_label = styles["Normal"].clone("style_label")
+    style_label.fontSize = 10
+    style_label.textColor = colors.HexColor("#6e6258")
+
+    style_value = styles["Normal"].clone("style_value")
+    style_value.fontSize = 11
+    style_value.fontName = "Helvetica-Bold"
+
+    style_section = styles["Heading2"].clone("style_section")
+    style_section.fontSize = 12
+    style_section.leading = 16
+    style_section.textColor = colors.HexColor("#0f5b4a")
+
+    return {
+        "Normal": styles["Normal"],
+        "title_style": title_style,
+        "style_title": style_title,
+        "style_label": style_label,
+        "style_value": style_value,
+        "style_section": style_section,
+    }
+
+
+@lru_cache(maxsize=None)
+def get_table_styles() -> Dict[str, TableStyle]:
+    # TableStyle hanya dibaca saat setStyle(), jadi satu objek aman dipakai
+    # bersama oleh semua tabel dengan tata letak yang sama.
+    return {
+        "summary": TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0f5b4a")),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+                ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, 0), 11),
+                ("BACKGROUND", (0, 1), (-1, -1), colors.white),
+                ("TEXTCOLOR", (0, 1), (-1, -1), colors.black),
+                ("ALIGN", (0, 1), (0, -1), "LEFT"),
+                ("ALIGN", (1, 1), (1, -1), "LEFT"),
+                ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
+                ("FONTSIZE", (0, 1), (-1, -1), 11),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 10),
+                ("TOPPADDING", (0, 0), (-1, -1), 10),
+                ("LEFTPADDING", (0, 0), (-1, -1), 8),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 8),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("GRID", (0, 0), (-1, -1), 0.6, colors.HexColor("#d9d2c9")),
+            ]
+        ),
+        "detail": TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0f5b4a")),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, 0), 9),
+                ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("FONTSIZE", (0, 1), (-1, -1), 8),
+                ("GRID", (0, 0), (-1, -1), 0.4, colors.HexColor("#d9d2c9")),
+                ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f7f2eb")]),
+            ]
+        ),
+        "proof_header": TableStyle(
+            [
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("ALIGN", (2, 0), (2, 0), "RIGHT"),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+            ]
+        ),
+        "proof_meta": TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, -1), colors.HexColor("#f7f2eb")),
+                ("BOX", (0, 0), (-1, -1), 0.6, colors.HexColor("#d9d2c9")),
+                ("LEFTPADDING", (0, 0), (-1, -1), 8),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 8),
+                ("TOPPADDING", (0, 0), (-1, -1), 6),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+            ]
+        ),
+        "proof_customer": TableStyle(
+            [
+                ("TEXTCOLOR", (0, 0), (0, -1), colors.HexColor("#6e6258")),
+                ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, -1), 10),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+            ]
+        ),
+        "proof_bill": TableStyle(
+            [
+                ("TEXTCOLOR", (0, 0), (0, -1), colors.HexColor("#6e6258")),
+                ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, -1), 10),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+                ("LINEABOVE", (0, -1), (-1, -1), 0.8, colors.HexColor("#d9d2c9")),
+                ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
+            ]
+        ),
+        "proof_total": TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, -1), colors.HexColor("#e8f1ee")),
+                ("TEXTCOLOR", (0, 0), (-1, -1), colors.HexColor("#0f5b4a")),
+                ("ALIGN", (1, 0), (1, 0), "RIGHT"),
+                ("LEFTPADDING", (0, 0), (-1, -1), 10),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 10),
+                ("TOPPADDING", (0, 0), (-1, -1), 8),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+            ]
+        ),
+    }
+
+
+@lru_cache(maxsize=None)
+def get_logo() -> Optional[ImageReader]:
+    """Logo yang sudah diperkecil dan di-decode sekali per proses.
+
+    File aslinya jauh lebih besar dari ukuran cetaknya, sehingga decode dan
+    kompresi ulang di setiap PDF menjadi bagian terbesar waktu render.
+    """
+    if not LOGO_PATH.exists():
+        return None
+    with PILImage.open(LOGO_PATH) as source:
+        image = source.copy()
+    image.thumbnail((LOGO_MAX_PX, LOGO_MAX_PX), PILImage.LANCZOS)
+    reader = ImageReader(image)
+    reader.getRGBData()
+    return reader
+
+
+class LogoImage(Flowable):
+    def __init__(self, reader: ImageReader, width: float, height: float, hAlign: str = "CENTER") -> None:
+        super().__init__()
+        self.reader = reader
+        self.width = width
+        self.height = height
+        self.hAlign = hAlign
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self) -> None:
+        self.canv.drawImage(self.reader, 0, 0, self.width, self.height, mask="auto")
+
+
+def build_monthly_report_pdf(report: Dict[str, Any], details: Iterable[Dict[str, Any]], output: BinaryIO) -> None:
+    doc = SimpleDocTemplate(output, pagesize=landscape(letter), leftMargin=36, rightMargin=36, topMargin=36, bottomMargin=36)
+    styles = get_styles()
+    table_styles = get_table_styles()
+    title_style = styles["title_style"]
+
+    elements = []
+
+    logo = get_logo()
+    if logo is not None:
+        elements.append(LogoImage(logo, width=1.2 * inch, height=1.2 * inch))
+        elements.append(Spacer(1, 0.1 * inch))
+
+    elements.append(Paragraph("LAPORAN BULANAN TAGIHAN LISTRIK", title_style))
+    elements.append(Spacer(1, 0.25 * inch))
+
+    month = int(report["bulan"])
+    month_label = MONTH_NAMES[month - 1] if 1 <= month <= 12 else str(month)
+
+    summary_data = [
+        ["Keterangan", "Nilai"],
+        ["Periode", f"{report['bulan']}/{report['tahun']}"],
+        ["Total Pelanggan", str(report["total_pelanggan"])],
+        ["Total Tagihan", str(report["total_tagihan"])],
+        ["Tagihan Lunas", str(report["tagihan_lunas"])],
+        ["Belum Bayar", str(report["tagihan_belum"])],
+        [f"Total Pendapatan {month_label} {report['tahun']}", f"Rp {report['total_bayar']:,}".replace(",", ".")],
+    ]
+
+    table = Table(summary_data, colWidths=[2.8 * inch, 3.2 * inch])
+    table.setStyle(table_styles["summary"])
+
+    elements.append(table)
+    elements.append(Spacer(1, 0.3 * inch))
+    elements.append(Spacer(1, 0.25 * inch))
+
+    detail_header = [
+        "No",
+        "Nama Pelanggan",
+        "No KWH",
+        "Alamat",
+        "Meter Awal",
+        "Meter Akhir",
+        "Jumlah Meter",
+        "Tarif/kWh",
+        "Total Bayar",
+        "Status",
+    ]
+    detail_rows = [detail_header]
+    for idx, row in enumerate(details, start=1):
+        meter_awal = row.get("meter_awal")
+        meter_akhir = row.get("meter_akhir")
+        detail_rows.append(
+            [
+                str(idx),
+                row.get("nama_pelanggan") or "-",
+                row.get("nomor_kwh") or "-",
+                row.get("alamat") or "-",
+                "-" if meter_awal is None else str(meter_awal),
+                "-" if meter_akhir is None else str(meter_akhir),
+                str(row.get("jumlah_meter") or 0),
+                f"Rp {row['tarifperkwh']:,}".replace(",", "."),
+                f"Rp {row['total_bayar']:,}".replace(",", "."),
+                row.get("status") or "-",
+            ]
+        )
+
+    detail_col_widths = [0.45 * inch, 1.5 * inch, 1.0 * inch, 2.0 * inch, 0.85 * inch, 0.85 * inch, 0.95 * inch, 1.0 * inch, 1.1 * inch, 1.0 * inch]
+    detail_table = Table(detail_rows, colWidths=detail_col_widths, repeatRows=1)
+    detail_table.setStyle(table_styles["detail"])
+    elements.append(detail_table)
+
+    footer_text = "Ringkasan berdasarkan data tagihan."
+    printed_text = f"Tanggal Cetak: {time.strftime('%d-%m-%Y %H:%M:%S')}"
+
+    def draw_footer(canvas, doc):
+        canvas.saveState()
+        canvas.setFont("Helvetica", 9)
+        canvas.setFillColor(colors.grey)
+        canvas.drawString(doc.leftMargin, 18, footer_text)
+        canvas.drawRightString(doc.pagesize[0] - doc.rightMargin, 18, printed_text)
+        canvas.restoreState()
+
+    doc.build(elements, onFirstPage=draw_footer, onLaterPages=draw_footer)
+
+
+def build_bill_proof_pdf(bill: Dict[str, Any], usage: Optional[Dict[str, Any]], output: BinaryIO) -> None:
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    styles = get_styles()
+    table_styles = get_table_styles()
+    style_title = styles["style_title"]
+    style_label = styles["style_label"]
+    style_value = styles["style_value"]
+    style_section = styles["style_section"]
+
+    elements = []
+
+    logo = get_logo()
+    logo_img = None
+    if logo is not None:
+        logo_img = LogoImage(logo, width=1.1 * inch, height=1.1 * inch)
+
+    header_left = logo_img if logo_img else ""
+    header_center = Paragraph("<b>LSP Pascabayar</b><br/>Bukti Pembayaran Tagihan Listrik", styles["Normal"])
+    header_right = Paragraph(f"INVOICE<br/><b>#{bill['id_tagihan']}</b>", style_title)
+
+    header_table = Table(
+        [[header_left, header_center, header_right]],
+        colWidths=[1.3 * inch, 3.5 * inch, 1.7 * inch],
+    )
+    header_table.setStyle(table_styles["proof_header"])
+    elements.append(header_table)
+    elements.append(Spacer(1, 0.1 * inch))
+
+    meta_table = Table(
+        [
+            [
+                Paragraph("Tanggal Cetak", style_label),
+                Paragraph(time.strftime("%d-%m-%Y %H:%M:%S"), style_value),
+                Paragraph("Status", style_label),
+                Paragraph(bill["status"], style_value),
+            ]
+        ],
+        colWidths=[1.2 * inch, 2.0 * inch, 0.8 * inch, 1.5 * inch],
+    )
+    meta_table.setStyle(table_styles["proof_meta"])
+    elements.append(meta_table)
+    elements.append(Spacer(1, 0.2 * inch))
+
+    elements.append(Paragraph("Detail Pelanggan", style_section))
+    customer_data = [
+        ["Nama Pelanggan", bill["nama_pelanggan"]],
+        ["Nomor KWH", bill["nomor_kwh"]],
+        ["Alamat", bill["alamat"]],
+    ]
+    customer_table = Table(customer_data, colWidths=[1.7 * inch, 4.1 * inch])
+    customer_table.setStyle(table_styles["proof_customer"])
+    elements.append(customer_table)
+    elements.append(Spacer(1, 0.2 * inch))
+
+    elements.append(Paragraph("Detail Tagihan", style_section))
+    month_index = bill["bulan"] - 1 if 1 <= bill["bulan"] <= 12 else None
+    month_label = MONTH_NAMES[month_index] if month_index is not None else str(bill["bulan"])
+    prev_month_index = (month_index - 1) if month_index is not None else None
+    prev_month_label = MONTH_NAMES[prev_month_index] if prev_month_index is not None else "-"
+
+    meter_awal = usage["meter_awal"] if usage else None
+    meter_akhir = usage["meter_akhir"] if usage else None
+    bill_data = [
+        ["Periode", f"{month_label} {bill['tahun']}"],
+        [f"Meter Akhir {prev_month_label}", "-" if meter_awal is None else str(meter_awal)],
+        [f"Meter Akhir {month_label}", "-" if meter_akhir is None else str(meter_akhir)],
+        ["Total Meter", f"{bill['jumlah_meter']} KWH"],
+        ["Tarif/kWh", f"Rp {bill['tarifperkwh']:,}".replace(",", ".")],
+        ["Total Bayar", f"Rp {bill['total_bayar']:,}".replace(",", ".")],
+    ]
+    bill_table = Table(bill_data, colWidths=[1.7 * inch, 4.1 * inch])
+    bill_table.setStyle(table_styles["proof_bill"])
+    elements.append(bill_table)
+    elements.append(Spacer(1, 0.25 * inch))
+
+    total_box = Table(
+        [[Paragraph("TOTAL PEMBAYARAN", style_label), Paragraph(f"Rp {bill['total_bayar']:,}".replace(",", "."), style_value)]],
+        colWidths=[3.2 * inch, 2.6 * inch],
+    )
+    total_box.setStyle(table_styles["proof_total"])
+    elements.append(total_box)
+    elements.append(Spacer(1, 0.2 * inch))
+
+    elements.append(Paragraph("Ini adalah bukti pembayaran resmi. Harap simpan sebagai referensi Anda.", styles["Normal"]))
+    elements.append(Paragraph("Terima kasih atas pembayaran Anda.", styles["Normal"]))
+
+    doc.build(elements)
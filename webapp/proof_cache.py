@@ -0,0 +1,122 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from flask import current_app
+
+from .db import get_db
+from .queries import get_bill, get_usage_by_customer_period
+
+PROOF_FIELDS = (
+    "id_tagihan",
+    "id_pelanggan",
+    "bulan",
+    "tahun",
+    "jumlah_meter",
+    "status",
+    "nama_pelanggan",
+    "nomor_kwh",
+    "alamat",
+    "tarifperkwh",
+    "total_bayar",
+    "meter_awal",
+    "meter_akhir",
+)
+
+# Jumlah lock render yang dipakai bergiliran (id_tagihan % LOCK_STRIPES),
+# supaya jumlah lock tetap walau tagihan terus bertambah.
+LOCK_STRIPES = 64
+
+
+def proof_version(bill: Dict[str, Any]) -> str:
+    # Meter awal/akhir ikut di-hash karena tercetak di bukti dan bisa
+    # bergeser bersama tanpa mengubah jumlah_meter. get_bill sudah
+    # mengambil keduanya sehingga versi tetap dihitung tanpa query tambahan.
+    raw = "|".join(str(bill.get(key)) for key in PROOF_FIELDS)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def _bill_usage(conn, bill: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if "meter_awal" not in bill:
+        return get_usage_by_customer_period(conn, bill["id_pelanggan"], bill["bulan"], bill["tahun"])
+    if bill["meter_awal"] is None:
+        return None
+    return {"meter_awal": bill["meter_awal"], "meter_akhir": bill["meter_akhir"]}
+
+
+class ProofCache:
+    def __init__(self, app, cache_dir: str, max_workers: int = 1) -> None:
+        self.app = app
+        self.cache_dir = cache_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="proof")
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def _bill_dir(self, id_tagihan: int) -> str:
+        # Satu folder per tagihan: membersihkan versi lama cukup membaca
+        # folder kecil ini, bukan seluruh cache.
+        return os.path.join(self.cache_dir, str(id_tagihan))
+
+    def path_for(self, bill: Dict[str, Any]) -> str:
+        id_tagihan = bill["id_tagihan"]
+        return os.path.join(self._bill_dir(id_tagihan), f"bukti_{id_tagihan}_{proof_version(bill)}.pdf")
+
+    def _bill_lock(self, id_tagihan: int) -> threading.Lock:
+        return self._locks[id_tagihan % LOCK_STRIPES]
+
+    def get_or_render(self, conn, bill: Dict[str, Any]) -> str:
+        path = self.path_for(bill)
+        if os.path.exists(path):
+            return path
+        from .pdf import build_bill_proof_pdf
+
+        with self._bill_lock(bill["id_tagihan"]):
+            if os.path.exists(path):
+                return path
+            usage = _bill_usage(conn, bill)
+            os.makedirs(self._bill_dir(bill["id_tagihan"]), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "wb") as output:
+                    build_bill_proof_pdf(bill, usage, output)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self._remove_old_versions(bill["id_tagihan"], path)
+        return path
+
+    def render_async(self, id_tagihan: int) -> None:
+        self._executor.submit(self._render, id_tagihan)
+
+    def _render(self, id_tagihan: int) -> None:
+        try:
+            with self.app.app_context():
+                conn = get_db()
+                bill = get_bill(conn, id_tagihan)
+                if bill and bill["status"] == "SUDAH BAYAR":
+                    self.get_or_render(conn, bill)
+        except Exception as exc:
+            self.app.logger.error(f"Error pre-rendering proof PDF for bill {id_tagihan}: {exc}")
+
+    def _remove_old_versions(self, id_tagihan: int, keep_path: str) -> None:
+        bill_dir = self._bill_dir(id_tagihan)
+        keep = os.path.basename(keep_path)
+        for name in os.listdir(bill_dir):
+            if name.endswith(".pdf") and name != keep:
+                try:
+                    os.remove(os.path.join(bill_dir, name))
+                except OSError:
+                    pass
+
+
+def get_proof_cache() -> ProofCache:
+    return current_app.extensions["proof_cache"]
+
+
+def init_app(app) -> None:
+    cache_dir = app.config.get("PROOF_CACHE_DIR") or os.path.join(app.instance_path, "proof_cache")
+    app.extensions["proof_cache"] = ProofCache(
+        app, cache_dir, max_workers=app.config["PROOF_WORKERS"]
+    )
@@ -1,12 +1,239 @@
-from typing import Any, Dict, List, Optional
+import base64
+import binascii
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.auth import forget_unknown_username, make_password_hash
+from app.db import Row, compact_row, execute, fetch_all, iter_rows
+from app.report_summary import SUMMARY_TABLE, refresh_bill_month
+
+from .cache import invalidate
+
+
+@dataclass
+class Page:
+    rows: List[Row]
+    total: int
+    page: int
+    per_page: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+    @property
+    def total_pages(self) -> int:
+        return max(1, (self.total + self.per_page - 1) // self.per_page)
+
+
+CUSTOMER_SEARCH_COLUMNS = (
+    "pl.id_pelanggan",
+    "pl.nama_pelanggan",
+    "pl.username",
+    "pl.nomor_kwh",
+    "pl.alamat",
+    "pl.id_tarif",
+    "tr.daya",
+    "tr.tarifperkwh",
+    "CONCAT(tr.daya, ' VA')",
+)
+
+ADMIN_SEARCH_COLUMNS = ("id_user", "username", "nama_admin", "id_level")
+
+USAGE_SEARCH_COLUMNS = (
+    "p.id_penggunaan",
+    "p.id_pelanggan",
+    "pl.nama_pelanggan",
+    "pl.username",
+    "p.bulan",
+    "p.tahun",
+    "p.meter_awal",
+    "p.meter_akhir",
+    "(p.meter_akhir - p.meter_awal)",
+    "CONCAT(p.bulan, '/', p.tahun)",
+)
+
+BILL_SEARCH_COLUMNS = (
+    "t.id_tagihan",
+    "t.id_pelanggan",
+    "pl.nama_pelanggan",
+    "pl.username",
+    "pl.nomor_kwh",
+    "t.bulan",
+    "t.tahun",
+    "t.jumlah_meter",
+    "t.status",
+    "tr.tarifperkwh",
+    "ROUND(t.jumlah_meter * tr.tarifperkwh, 0)",
+    "CONCAT(t.bulan, '/', t.tahun)",
+)
+
+
+def _like_pattern(query: str) -> str:
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _search_clause(columns: Sequence[str], query: str) -> Tuple[str, List[Any]]:
+    pattern = _like_pattern(query)
+    clause = " OR ".join(f"{column} LIKE %s" for column in columns)
+    return f"({clause})", [pattern] * len(columns)
+
+
+# Kolom kunci keyset: (ekspresi SQL, nama field di hasil query).
+PeriodKey = Tuple[Tuple[str, str], Tuple[str, str], Tuple[str, str]]
+
+BILL_PERIOD_KEY: PeriodKey = (("t.tahun", "tahun"), ("t.bulan", "bulan"), ("t.id_tagihan", "id_tagihan"))
+USAGE_PERIOD_KEY: PeriodKey = (("p.tahun", "tahun"), ("p.bulan", "bulan"), ("p.id_penggunaan", "id_penggunaan"))
+
+
+# Cursor: (arah "n"/"p", kunci baris batas, nomor halaman, total baris).
+# Total dibawa dari halaman sebelumnya agar halaman cursor tidak perlu
+# menjalankan COUNT(*) lagi; cursor lama tanpa total tetap diterima.
+Cursor = Tuple[str, Tuple[int, int, int], int, Optional[int]]
+
+
+def encode_cursor(direction: str, key: Tuple[int, int, int], page: int, total: Optional[int] = None) -> str:
+    parts = [direction, *key, page] + ([total] if total is not None else [])
+    raw = ".".join(str(part) for part in parts)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str]) -> Optional[Cursor]:
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        parts = raw.split(".")
+        if len(parts) not in (5, 6):
+            return None
+        direction = parts[0]
+        key = (int(parts[1]), int(parts[2]), int(parts[3]))
+        page_num = int(parts[4])
+        total = max(0, int(parts[5])) if len(parts) == 6 else None
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+    if direction not in {"n", "p"}:
+        return None
+    return direction, key, max(1, page_num), total
+
+
+def _row_key(row: Dict[str, Any], key_columns: PeriodKey) -> Tuple[int, int, int]:
+    return tuple(int(row[field]) for _, field in key_columns)
+
+
+def _set_cursors(result: Page, key_columns: Optional[PeriodKey], has_prev: bool, has_next: bool) -> Page:
+    if key_columns is None or not result.rows:
+        return result
+    if has_prev:
+        result.prev_cursor = encode_cursor(
+            "p", _row_key(result.rows[0], key_columns), result.page - 1, result.total
+        )
+    if has_next:
+        result.next_cursor = encode_cursor(
+            "n", _row_key(result.rows[-1], key_columns), result.page + 1, result.total
+        )
+    return result
+
+
+def _count_rows(conn, from_sql: str, where_clauses: List[str], params: List[Any]) -> int:
+    where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+    rows = fetch_all(
+        conn,
+        f"SELECT COUNT(*) AS total {from_sql} {where_sql}",
+        tuple(params) if params else None,
+    )
+    return int(rows[0]["total"])
 
-from app.db import execute, fetch_all
+
+def _fetch_page(
+    conn,
+    select_sql: str,
+    from_sql: str,
+    where_clauses: List[str],
+    params: List[Any],
+    order_sql: str,
+    page: int,
+    per_page: int,
+    key_columns: Optional[PeriodKey] = None,
+) -> Page:
+    where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+    total = _count_rows(conn, from_sql, where_clauses, params)
+    result = Page(rows=[], total=total, page=1, per_page=per_page)
+    result.page = min(max(1, page), result.total_pages)
+    if total:
+        result.rows = fetch_all(
+            conn,
+            f"{select_sql} {from_sql} {where_sql} {order_sql} LIMIT %s OFFSET %s",
+            tuple(params) + (per_page, (result.page - 1) * per_page),
+            row_factory=compact_row,
+        )
+    return _set_cursors(result, key_columns, result.page > 1, result.page < result.total_pages)
 
 
-def list_customers(conn) -> List[Dict[str, Any]]:
+def _fetch_keyset_page(
+    conn,
+    select_sql: str,
+    from_sql: str,
+    where_clauses: List[str],
+    params: List[Any],
+    key_columns: PeriodKey,
+    cursor: Cursor,
+    per_page: int,
+) -> Page:
+    # Posisi halaman dicari lewat kunci (tahun, bulan, id) baris batas, bukan
+    # OFFSET. Perbandingan row constructor bisa dipakai MySQL sebagai range
+    # scan pada indeks (tahun, bulan, id) (lihat README), sehingga halaman
+    # ke-5000 sama murahnya dengan halaman pertama.
+    direction, key, page_num, total = cursor
+    (tahun_col, _), (bulan_col, _), (id_col, _) = key_columns
+    op, order = ("<", "DESC") if direction == "n" else (">", "ASC")
+
+    keyset_clause = f"({tahun_col}, {bulan_col}, {id_col}) {op} (%s, %s, %s)"
+    where_sql = f"WHERE {' AND '.join(where_clauses + [keyset_clause])}"
+    rows = fetch_all(
+        conn,
+        f"""
+        {select_sql} {from_sql} {where_sql}
+        ORDER BY {tahun_col} {order}, {bulan_col} {order}, {id_col} {order}
+        LIMIT %s
+        """,
+        tuple(params) + (*key, per_page + 1),
+        row_factory=compact_row,
+    )
+    if not rows:
+        return _fetch_page(
+            conn,
+            select_sql,
+            from_sql,
+            where_clauses,
+            params,
+            f"ORDER BY {tahun_col} DESC, {bulan_col} DESC, {id_col} DESC",
+            page_num,
+            per_page,
+            key_columns,
+        )
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == "p":
+        rows.reverse()
+
+    if total is None:
+        total = _count_rows(conn, from_sql, where_clauses, params)
+    # Total dari cursor bisa tertinggal jika data bertambah; jangan sampai
+    # lebih kecil dari jumlah baris yang sudah terlihat.
+    seen = (page_num - 1) * per_page + len(rows) + (1 if direction == "n" and has_more else 0)
+    result = Page(rows=rows, total=max(total, seen), page=page_num, per_page=per_page)
+    result.page = min(result.page, result.total_pages)
+    if direction == "n":
+        return _set_cursors(result, key_columns, True, has_more)
+    return _set_cursors(result, key_columns, has_more, True)
+
+
+def list_customers(conn, id_pelanggan: Optional[int] = None) -> List[Row]:
+    where_sql = "WHERE pl.id_pelanggan = %s" if id_pelanggan is not None else ""
     return fetch_all(
         conn,
-        """
+        f"""
         SELECT pl.id_pelanggan,
                pl.username,
                pl.nama_pelanggan,
@@ -17,8 +244,55 @@ def list_customers(conn) -> List[Dict[str, Any]]:
                tr.tarifperkwh
         FROM pelanggan pl
         JOIN tarif tr ON tr.id_tarif = pl.id_tarif
+        {where_sql}
         ORDER BY pl.nama_pelanggan
         """,
+        (id_pelanggan,) if id_pelanggan is not None else None,
+        row_factory=compact_row,
+    )
+
+
+def list_customers_page(conn, query: str = "", page: int = 1, per_page: int = 5) -> Page:
+    where_clauses: List[str] = []
+    params: List[Any] = []
+    if query:
+        clause, clause_params = _search_clause(CUSTOMER_SEARCH_COLUMNS, query)
+        where_clauses.append(clause)
+        params.extend(clause_params)
+
+    return _fetch_page(
+        conn,
+        """
+        SELECT pl.id_pelanggan,
+               pl.username,
+               pl.nama_pelanggan,
+               pl.nomor_kwh,
+               pl.alamat,
+               pl.id_tarif,
+               tr.daya,
+               tr.tarifperkwh
+        """,
+        """
+        FROM pelanggan pl
+        JOIN tarif tr ON tr.id_tarif = pl.id_tarif
+        """,
+        where_clauses,
+        params,
+        "ORDER BY pl.nama_pelanggan, pl.id_pelanggan",
+        page,
+        per_page,
+    )
+
+
+def list_customer_options(conn) -> List[Row]:
+    return fetch_all(
+        conn,
+        """
+        SELECT id_pelanggan, nama_pelanggan, username, nomor_kwh
+        FROM pelanggan
+        ORDER BY nama_pelanggan
+        """,
+        row_factory=compact_row,
     )
 
 
@@ -33,14 +307,37 @@ def list_tariffs(conn) -> List[Dict[str, Any]]:
     )
 
 
-def list_admins(conn) -> List[Dict[str, Any]]:
+def list_admins(conn, id_user: Optional[int] = None) -> List[Dict[str, Any]]:
+    where_sql = "WHERE id_user = %s" if id_user is not None else ""
     return fetch_all(
         conn,
-        """
+        f"""
         SELECT id_user, username, nama_admin, id_level
         FROM user
+        {where_sql}
         ORDER BY nama_admin
         """,
+        (id_user,) if id_user is not None else None,
+    )
+
+
+def list_admins_page(conn, query: str = "", page: int = 1, per_page: int = 5) -> Page:
+    where_clauses: List[str] = []
+    params: List[Any] = []
+    if query:
+        clause, clause_params = _search_clause(ADMIN_SEARCH_COLUMNS, query)
+        where_clauses.append(clause)
+        params.extend(clause_params)
+
+    return _fetch_page(
+        conn,
+        "SELECT id_user, username, nama_admin, id_level",
+        "FROM user",
+        where_clauses,
+        params,
+        "ORDER BY nama_admin, id_user",
+        page,
+        per_page,
     )
 
 
@@ -63,6 +360,26 @@ def list_recent_payments(conn, limit: int = 5) -> List[Dict[str, Any]]:
     )
 
 
+def list_payments_since(conn, since_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+    return fetch_all(
+        conn,
+        """
+        SELECT p.id_pembayaran,
+               p.id_tagihan,
+               p.id_pelanggan,
+               p.tanggal_pembayaran,
+               p.total_bayar,
+               pl.nama_pelanggan
+        FROM pembayaran p
+        JOIN pelanggan pl ON pl.id_pelanggan = p.id_pelanggan
+        WHERE p.id_pembayaran > %s
+        ORDER BY p.id_pembayaran DESC
+        LIMIT %s
+        """,
+        (since_id, limit),
+    )
+
+
 def get_default_admin_id(conn) -> Optional[int]:
     rows = fetch_all(
         conn,
@@ -90,7 +407,7 @@ def create_payment(
     total_bayar: float,
     id_user: int,
 ) -> int:
-    return execute(
+    id_pembayaran = execute(
         conn,
         """
         INSERT INTO pembayaran (id_tagihan, id_pelanggan, tanggal_pembayaran, bulan_bayar, biaya_admin, total_bayar, id_user)
@@ -98,55 +415,97 @@ def create_payment(
         """,
         (id_tagihan, id_pelanggan, tanggal_pembayaran, bulan_bayar, biaya_admin, total_bayar, id_user),
     )
+    invalidate("notifications")
+    return id_pembayaran
+
+
+REPORT_SUMMARY_SELECT = (
+    "SELECT tahun, bulan, total_tagihan, tagihan_lunas, tagihan_belum, "
+    "total_pelanggan, total_bayar, versi"
+)
+
 
+def _report_filters(year: Optional[int], month: Optional[int]) -> Tuple[List[str], List[Any]]:
+    where_clauses: List[str] = []
+    params: List[Any] = []
+    if year is not None:
+        where_clauses.append("tahun = %s")
+        params.append(year)
+    if month is not None:
+        where_clauses.append("bulan = %s")
+        params.append(month)
+    return where_clauses, params
 
-def list_monthly_reports(conn) -> List[Dict[str, Any]]:
+
+def list_monthly_reports(
+    conn, year: Optional[int] = None, month: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    where_clauses, params = _report_filters(year, month)
+    where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
     return fetch_all(
         conn,
-        """
-        SELECT t.tahun,
-               t.bulan,
-               COUNT(*) AS total_tagihan,
-               SUM(CASE WHEN t.status = 'SUDAH BAYAR' THEN 1 ELSE 0 END) AS tagihan_lunas,
-               SUM(CASE WHEN t.status <> 'SUDAH BAYAR' THEN 1 ELSE 0 END) AS tagihan_belum,
-               COUNT(DISTINCT t.id_pelanggan) AS total_pelanggan,
-               ROUND(SUM(t.jumlah_meter * tr.tarifperkwh), 0) AS total_bayar
-        FROM tagihan t
-        JOIN pelanggan pl ON pl.id_pelanggan = t.id_pelanggan
-        JOIN tarif tr ON tr.id_tarif = pl.id_tarif
-        GROUP BY t.tahun, t.bulan
-        ORDER BY t.tahun DESC, t.bulan DESC
+        f"""
+        {REPORT_SUMMARY_SELECT}
+        FROM {SUMMARY_TABLE}
+        {where_sql}
+        ORDER BY tahun DESC, bulan DESC
         """,
+        tuple(params) if params else None,
     )
 
 
+def list_monthly_reports_page(
+    conn,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    page: int = 1,
+    per_page: int = 5,
+) -> Page:
+    where_clauses, params = _report_filters(year, month)
+    return _fetch_page(
+        conn,
+        REPORT_SUMMARY_SELECT,
+        f"FROM {SUMMARY_TABLE}",
+        where_clauses,
+        params,
+        "ORDER BY tahun DESC, bulan DESC",
+        page,
+        per_page,
+    )
+
+
+def list_report_years(conn) -> List[int]:
+    rows = fetch_all(conn, f"SELECT DISTINCT tahun FROM {SUMMARY_TABLE} ORDER BY tahun DESC")
+    return [int(row["tahun"]) for row in rows]
+
+
 def get_monthly_report(conn, tahun: int, bulan: int) -> Optional[Dict[str, Any]]:
     rows = fetch_all(
         conn,
-        """
-        SELECT t.tahun,
-               t.bulan,
-               COUNT(*) AS total_tagihan,
-               SUM(CASE WHEN t.status = 'SUDAH BAYAR' THEN 1 ELSE 0 END) AS tagihan_lunas,
-               SUM(CASE WHEN t.status <> 'SUDAH BAYAR' THEN 1 ELSE 0 END) AS tagihan_belum,
-               COUNT(DISTINCT t.id_pelanggan) AS total_pelanggan,
-               ROUND(SUM(t.jumlah_meter * tr.tarifperkwh), 0) AS total_bayar
-        FROM tagihan t
-        JOIN pelanggan pl ON pl.id_pelanggan = t.id_pelanggan
-        JOIN tarif tr ON tr.id_tarif = pl.id_tarif
-        WHERE t.tahun = %s AND t.bulan = %s
-        GROUP BY t.tahun, t.bulan
+        f"""
+        {REPORT_SUMMARY_SELECT}
+        FROM {SUMMARY_TABLE}
+        WHERE tahun = %s AND bulan = %s
         """,
         (tahun, bulan),
     )
     return rows[0] if rows else None
 
 
-def list_monthly_report_details(conn, tahun: int, bulan: int) -> List[Dict[str, Any]]:
-    return fetch_all(
-        conn,
-        """
-        SELECT pl.nama_pelanggan,
+REPORT_DETAIL_FROM = """
+        FROM tagihan t
+        JOIN pelanggan pl ON pl.id_pelanggan = t.id_pelanggan
+        JOIN tarif tr ON tr.id_tarif = pl.id_tarif
+        LEFT JOIN penggunaan p
+          ON p.id_pelanggan = t.id_pelanggan
+         AND p.bulan = t.bulan
+         AND p.tahun = t.tahun
+"""
+
+REPORT_DETAIL_SELECT = """
+        SELECT t.tahun,
+               t.bulan,
+               pl.nama_pelanggan,
                pl.nomor_kwh,
                pl.alamat,
                p.meter_awal,
@@ -155,13 +514,14 @@ def list_monthly_report_details(conn, tahun: int, bulan: int) -> List[Dict[str,
                tr.tarifperkwh,
                t.status,
                ROUND(t.jumlah_meter * tr.tarifperkwh, 0) AS total_bayar
-        FROM tagihan t
-        JOIN pelanggan pl ON pl.id_pelanggan = t.id_pelanggan
-        JOIN tarif tr ON tr.id_tarif = pl.id_tarif
-        LEFT JOIN penggunaan p
-          ON p.id_pelanggan = t.id_pelanggan
-         AND p.bulan = t.bulan
-         AND p.tahun = t.tahun
+""" + REPORT_DETAIL_FROM
+
+
+def list_monthly_report_details(conn, tahun: int, bulan: int) -> List[Dict[str, Any]]:
+    return fetch_all(
+        conn,
+        REPORT_DETAIL_SELECT
+        + """
         WHERE t.tahun = %s AND t.bulan = %s
         ORDER BY pl.nama_pelanggan
         """,
@@ -169,6 +529,21 @@ def list_monthly_report_details(conn, tahun: int, bulan: int) -> List[Dict[str,
     )
 
 
+def iter_report_details(
+    conn, tahun: int, bulan: Optional[int] = None, chunk_size: int = 1000
+) -> Iterator[Dict[str, Any]]:
+    where = "WHERE t.tahun = %s"
+    params: List[Any] = [tahun]
+    if bulan is not None:
+        where += " AND t.bulan = %s"
+        params.append(bulan)
+    query = REPORT_DETAIL_SELECT + f"""
+        {where}
+        ORDER BY t.bulan, pl.nama_pelanggan
+        """
+    return iter_rows(conn, query, tuple(params), batch_size=chunk_size)
+
+
 def get_usage_by_customer_period(
     conn, id_pelanggan: int, bulan: int, tahun: int
 ) -> Optional[Dict[str, Any]]:
@@ -195,14 +570,17 @@ def create_customer(
     alamat: str,
     id_tarif: int,
 ) -> int:
-    return execute(
+    id_pelanggan = execute(
         conn,
         """
         INSERT INTO pelanggan (username, password, nomor_kwh, nama_pelanggan, alamat, id_tarif)
-        VALUES (%s, SHA2(%s, 256), %s, %s, %s, %s)
+        VALUES (%s, %s, %s, %s, %s, %s)
         """,
-        (username, password_plain, nomor_kwh, nama_pelanggan, alamat, id_tarif),
+        (username, make_password_hash(conn, password_plain), nomor_kwh, nama_pelanggan, alamat, id_tarif),
     )
+    forget_unknown_username(username)
+    invalidate("dashboard")
+    return id_pelanggan
 
 
 def create_admin(
@@ -212,14 +590,16 @@ def create_admin(
     nama_admin: str,
     id_level: int,
 ) -> int:
-    return execute(
+    id_user = execute(
         conn,
         """
         INSERT INTO user (username, password, nama_admin, id_level)
-        VALUES (%s, SHA2(%s, 256), %s, %s)
+        VALUES (%s, %s, %s, %s)
         """,
-        (username, password_plain, nama_admin, id_level),
+        (username, make_password_hash(conn, password_plain), nama_admin, id_level),
     )
+    forget_unknown_username(username)
+    return id_user
 
 
 def update_admin(
@@ -236,13 +616,14 @@ def update_admin(
             """
             UPDATE user
             SET username = %s,
-                password = SHA2(%s, 256),
+                password = %s,
                 nama_admin = %s,
                 id_level = %s
             WHERE id_user = %s
             """,
-            (username, password_plain, nama_admin, id_level, id_user),
+            (username, make_password_hash(conn, password_plain), nama_admin, id_level, id_user),
         )
+        forget_unknown_username(username)
         return
 
     execute(
@@ -256,6 +637,7 @@ def update_admin(
         """,
         (username, nama_admin, id_level, id_user),
     )
+    forget_unknown_username(username)
 
 
 def delete_admin(conn, id_user: int) -> None:
@@ -266,18 +648,64 @@ def delete_admin(conn, id_user: int) -> None:
     )
 
 
-def list_usages(conn) -> List[Dict[str, Any]]:
+def list_usages(conn, id_penggunaan: Optional[int] = None) -> List[Row]:
+    where_sql = "WHERE p.id_penggunaan = %s" if id_penggunaan is not None else ""
     return fetch_all(
         conn,
-        """
+        f"""
         SELECT p.id_penggunaan, p.id_pelanggan, p.bulan, p.tahun,
                p.meter_awal, p.meter_akhir,
                (p.meter_akhir - p.meter_awal) AS kwh,
                pl.nama_pelanggan, pl.username
         FROM penggunaan p
         JOIN pelanggan pl ON pl.id_pelanggan = p.id_pelanggan
+        {where_sql}
         ORDER BY p.tahun DESC, p.bulan DESC
         """,
+        (id_penggunaan,) if id_penggunaan is not None else None,
+        row_factory=compact_row,
+    )
+
+
+def list_usages_page(
+    conn,
+    query: str = "",
+    page: int = 1,
+    per_page: int = 5,
+    cursor: Optional[str] = None,
+) -> Page:
+    where_clauses: List[str] = []
+    params: List[Any] = []
+    if query:
+        clause, clause_params = _search_clause(USAGE_SEARCH_COLUMNS, query)
+        where_clauses.append(clause)
+        params.extend(clause_params)
+
+    select_sql = """
+        SELECT p.id_penggunaan, p.id_pelanggan, p.bulan, p.tahun,
+               p.meter_awal, p.meter_akhir,
+               (p.meter_akhir - p.meter_awal) AS kwh,
+               pl.nama_pelanggan, pl.username
+        """
+    from_sql = """
+        FROM penggunaan p
+        JOIN pelanggan pl ON pl.id_pelanggan = p.id_pelanggan
+        """
+    decoded = decode_cursor(cursor)
+    if decoded:
+        return _fetch_keyset_page(
+            conn, select_sql, from_sql, where_clauses, params, USAGE_PERIOD_KEY, decoded, per_page
+        )
+    return _fetch_page(
+        conn,
+        select_sql,
+        from_sql,
+        where_clauses,
+        params,
+        "ORDER BY p.tahun DESC, p.bulan DESC, p.id_penggunaan DESC",
+        page,
+        per_page,
+        USAGE_PERIOD_KEY,
     )
 
 
@@ -323,11 +751,18 @@ def get_customer(conn, id_pelanggan: int) -> Optional[Dict[str, Any]]:
 
 
 def list_bills(
-    conn, id_pelanggan: Optional[int] = None, status: Optional[str] = None
-) -> List[Dict[str, Any]]:
+    conn,
+    id_pelanggan: Optional[int] = None,
+    status: Optional[str] = None,
+    id_tagihan: Optional[int] = None,
+) -> List[Row]:
     where_clauses = []
     params = []
 
+    if id_tagihan is not None:
+        where_clauses.append("t.id_tagihan = %s")
+        params.append(id_tagihan)
+
     if id_pelanggan is not None:
         where_clauses.append("t.id_pelanggan = %s")
         params.append(id_pelanggan)
@@ -353,9 +788,88 @@ def list_bills(
         ORDER BY t.tahun DESC, t.bulan DESC
         """,
         tuple(params) if params else None,
+        row_factory=compact_row,
     )
 
 
+def list_bills_page(
+    conn,
+    query: str = "",
+    status: Optional[str] = None,
+    page: int = 1,
+    per_page: int = 5,
+    cursor: Optional[str] = None,
+) -> Page:
+    where_clauses: List[str] = []
+    params: List[Any] = []
+
+    if status is not None:
+        where_clauses.append("t.status = %s")
+        params.append(status)
+
+    if query:
+        clause, clause_params = _search_clause(BILL_SEARCH_COLUMNS, query)
+        where_clauses.append(clause)
+        params.extend(clause_params)
+
+    select_sql = """
+        SELECT t.id_tagihan, t.id_pelanggan, t.bulan, t.tahun,
+               t.jumlah_meter, t.status,
+               pl.nama_pelanggan, pl.username, pl.nomor_kwh,
+               tr.tarifperkwh,
+               ROUND(t.jumlah_meter * tr.tarifperkwh, 0) AS total_bayar
+        """
+    from_sql = """
+        FROM tagihan t
+        JOIN pelanggan pl ON pl.id_pelanggan = t.id_pelanggan
+        JOIN tarif tr ON tr.id_tarif = pl.id_tarif
+        """
+    decoded = decode_cursor(cursor)
+    if decoded:
+        return _fetch_keyset_page(
+            conn, select_sql, from_sql, where_clauses, params, BILL_PERIOD_KEY, decoded, per_page
+        )
+    return _fetch_page(
+        conn,
+        select_sql,
+        from_sql,
+        where_clauses,
+        params,
+        "ORDER BY t.tahun DESC, t.bulan DESC, t.id_tagihan DESC",
+        page,
+        per_page,
+        BILL_PERIOD_KEY,
+    )
+
+
+def list_recent_bills(conn, limit: int = 5) -> List[Dict[str, Any]]:
+    return fetch_all(
+        conn,
+        """
+        SELECT t.id_tagihan, t.id_pelanggan, t.bulan, t.tahun,
+               t.jumlah_meter, t.status,
+               pl.nama_pelanggan, pl.username, pl.nomor_kwh,
+               tr.tarifperkwh,
+               ROUND(t.jumlah_meter * tr.tarifperkwh, 0) AS total_bayar
+        FROM tagihan t
+        JOIN pelanggan pl ON pl.id_pelanggan = t.id_pelanggan
+        JOIN tarif tr ON tr.id_tarif = pl.id_tarif
+        ORDER BY t.tahun DESC, t.bulan DESC, t.id_tagihan DESC
+        LIMIT %s
+        """,
+        (limit,),
+    )
+
+
+def list_bill_ids_for_usage(conn, id_penggunaan: int) -> List[int]:
+    rows = fetch_all(
+        conn,
+        "SELECT id_tagihan FROM tagihan WHERE id_penggunaan = %s",
+        (id_penggunaan,),
+    )
+    return [int(row["id_tagihan"]) for row in rows]
+
+
 def get_bill(conn, id_tagihan: int) -> Optional[Dict[str, Any]]:
     rows = fetch_all(
         conn,
@@ -364,10 +878,15 @@ def get_bill(conn, id_tagihan: int) -> Optional[Dict[str, Any]]:
                t.jumlah_meter, t.status,
                pl.nama_pelanggan, pl.username, pl.nomor_kwh, pl.alamat,
                tr.tarifperkwh,
-               ROUND(t.jumlah_meter * tr.tarifperkwh, 0) AS total_bayar
+               ROUND(t.jumlah_meter * tr.tarifperkwh, 0) AS total_bayar,
+               p.meter_awal, p.meter_akhir
         FROM tagihan t
         JOIN pelanggan pl ON pl.id_pelanggan = t.id_pelanggan
         JOIN tarif tr ON tr.id_tarif = pl.id_tarif
+        LEFT JOIN penggunaan p
+          ON p.id_pelanggan = t.id_pelanggan
+         AND p.bulan = t.bulan
+         AND p.tahun = t.tahun
         WHERE t.id_tagihan = %s
         """,
         (id_tagihan,),
@@ -381,25 +900,25 @@ def update_bill_status(conn, id_tagihan: int, status: str) -> None:
         "UPDATE tagihan SET status = %s WHERE id_tagihan = %s",
         (status, id_tagihan),
     )
+    refresh_bill_month(conn, id_tagihan)
+    invalidate("dashboard")
 
 
 def get_admin_stats(conn) -> Dict[str, int]:
-    total_pelanggan = fetch_all(conn, "SELECT COUNT(*) AS total FROM pelanggan")[0][
-        "total"
-    ]
-    total_penggunaan = fetch_all(conn, "SELECT COUNT(*) AS total FROM penggunaan")[0][
-        "total"
-    ]
-    tagihan_belum = fetch_all(
-        conn, "SELECT COUNT(*) AS total FROM tagihan WHERE status <> 'SUDAH BAYAR'"
-    )[0]["total"]
-    tagihan_lunas = fetch_all(
-        conn, "SELECT COUNT(*) AS total FROM tagihan WHERE status = 'SUDAH BAYAR'"
-    )[0]["total"]
+    row = fetch_all(
+        conn,
+        """
+        SELECT (SELECT COUNT(*) FROM pelanggan) AS total_pelanggan,
+               (SELECT COUNT(*) FROM penggunaan) AS total_penggunaan,
+               COALESCE(SUM(status <> 'SUDAH BAYAR'), 0) AS tagihan_belum,
+               COALESCE(SUM(status = 'SUDAH BAYAR'), 0) AS tagihan_lunas
+        FROM tagihan
+        """,
+    )[0]
 
     return {
-        "total_pelanggan": int(total_pelanggan),
-        "total_penggunaan": int(total_penggunaan),
-        "tagihan_belum": int(tagihan_belum),
-        "tagihan_lunas": int(tagihan_lunas),
+        "total_pelanggan": int(row["total_pelanggan"]),
+        "total_penggunaan": int(row["total_penggunaan"]),
+        "tagihan_belum": int(row["tagihan_belum"]),
+        "tagihan_lunas": int(row["tagihan_lunas"]),
     }
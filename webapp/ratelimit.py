@@ -0,0 +1,177 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from flask import current_app
+
+
+class MemoryBucketStore:
+    """Token bucket in-process (per worker).
+
+    Bucket yang paling lama tidak dipakai dibuang jika jumlahnya melebihi
+    maxsize, jadi memori tetap terbatas saat diserang banyak IP/username.
+    """
+
+    def __init__(self, maxsize: int = 10_000) -> None:
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return allowed, tokens
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._buckets)
+
+
+class RedisBucketStore:
+    """Token bucket di Redis, dipakai bersama oleh semua worker/proses.
+
+    Isi bucket dihitung di dalam script Lua agar atomik.
+    """
+
+    SCRIPT = """
+        local capacity = tonumber(ARGV[1])
+        local rate = tonumber(ARGV[2])
+        local now = tonumber(ARGV[3])
+        local cost = tonumber(ARGV[4])
+        local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+        local tokens = tonumber(data[1]) or capacity
+        local ts = tonumber(data[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+        local allowed = 0
+        if tokens >= cost then
+            tokens = tokens - cost
+            allowed = 1
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+        redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+        return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url: str, prefix: str = "login-rl:") -> None:
+        import redis
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._take = self._client.register_script(self.SCRIPT)
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> Tuple[bool, float]:
+        allowed, tokens = self._take(keys=[self.prefix + key], args=[capacity, rate, time.time(), cost])
+        return bool(int(allowed)), float(tokens)
+
+    def reset(self, key: str) -> None:
+        self._client.delete(self.prefix + key)
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class LoginRateLimiter:
+    def __init__(
+        self,
+        store,
+        user_burst: float = 5,
+        user_per_minute: float = 5,
+        ip_burst: float = 30,
+        ip_per_minute: float = 30,
+    ) -> None:
+        self.store = store
+        self.user_burst = user_burst
+        self.user_rate = user_per_minute / 60.0
+        self.ip_burst = ip_burst
+        self.ip_rate = ip_per_minute / 60.0
+        self._lock = threading.Lock()
+        self._counters = {"allowed": 0, "throttled_ip": 0, "throttled_username": 0, "store_errors": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    @staticmethod
+    def _retry_after(tokens: float, rate: float) -> float:
+        return math.ceil(max(0.0, 1.0 - tokens) / rate) if rate > 0 else 60.0
+
+    def check(self, username: str, ip: Optional[str]) -> Optional[float]:
+        """Mengambil satu token dari bucket IP lalu username.
+
+        Mengembalikan None jika percobaan login boleh diteruskan, atau jumlah
+        detik yang harus ditunggu jika ditolak.
+        """
+        try:
+            # Bucket IP dicek lebih dulu agar username acak dari satu IP
+            # tidak ikut memenuhi store dengan bucket username.
+            allowed, tokens = self.store.take(f"ip:{ip or '-'}", self.ip_burst, self.ip_rate)
+            if not allowed:
+                self._count("throttled_ip")
+                return self._retry_after(tokens, self.ip_rate)
+            allowed, tokens = self.store.take(f"user:{username.lower()}", self.user_burst, self.user_rate)
+            if not allowed:
+                self._count("throttled_username")
+                return self._retry_after(tokens, self.user_rate)
+        except Exception:
+            # Store bersama (Redis) yang mati tidak boleh membuat login ikut mati.
+            self._count("store_errors")
+            current_app.logger.exception("Rate limiter login gagal diakses")
+        self._count("allowed")
+        return None
+
+    def reset_username(self, username: str) -> None:
+        """Login berhasil: salah ketik sebelumnya tidak lagi dihitung."""
+        try:
+            self.store.reset(f"user:{username.lower()}")
+        except Exception:
+            self._count("store_errors")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._counters)
+        stats["store"] = type(self.store).__name__
+        stats["buckets"] = self.store.size()
+        stats["limits"] = {
+            "user_burst": self.user_burst,
+            "user_per_minute": self.user_rate * 60,
+            "ip_burst": self.ip_burst,
+            "ip_per_minute": self.ip_rate * 60,
+        }
+        return stats
+
+
+def get_login_limiter() -> Optional[LoginRateLimiter]:
+    return current_app.extensions.get("login_limiter")
+
+
+def init_app(app) -> None:
+    if not app.config["LOGIN_RATE_LIMIT_ENABLED"]:
+        app.extensions["login_limiter"] = None
+        return
+    storage = app.config.get("LOGIN_RATE_LIMIT_STORAGE") or ""
+    if storage.startswith(("redis://", "rediss://", "unix://")):
+        store = RedisBucketStore(storage)
+    else:
+        store = MemoryBucketStore()
+    app.extensions["login_limiter"] = LoginRateLimiter(
+        store,
+        user_burst=app.config["LOGIN_USER_BURST"],
+        user_per_minute=app.config["LOGIN_USER_PER_MINUTE"],
+        ip_burst=app.config["LOGIN_IP_BURST"],
+        ip_per_minute=app.config["LOGIN_IP_PER_MINUTE"],
+    )
@@ -0,0 +1,75 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache import bump_version, get_cache, get_version
+from .queries import get_customer, list_customer_options, list_tariffs
+
+# Data referensi untuk form (tarif dan daftar pelanggan untuk picker).
+# Kunci cache daftar pelanggan memuat versi data: route yang menambah
+# pelanggan memanggil invalidate_customers sehingga entri lama langsung tidak
+# terpakai. Tarif tidak punya alur tulis di aplikasi. TTL membatasi umur data
+# yang diubah dari luar proses ini (worker lain atau langsung di database).
+CUSTOMERS = "customers"
+TARIFFS = "tariffs"
+
+
+def _cache():
+    return get_cache("reference")
+
+
+def get_tariffs(conn, ttl: float = 0.0) -> List[Dict[str, Any]]:
+    return _cache().get_or_load(TARIFFS, lambda: list_tariffs(conn), ttl)
+
+
+def _customer_options(conn, ttl: float) -> Tuple[List[Any], Dict[int, Any], List[str]]:
+    def load():
+        rows = list_customer_options(conn)
+        by_id = {int(row["id_pelanggan"]): row for row in rows}
+        haystacks = [
+            f"{row['nama_pelanggan']} {row['username']} {row['nomor_kwh']}".lower() for row in rows
+        ]
+        return rows, by_id, haystacks
+
+    key = (CUSTOMERS, get_version(CUSTOMERS))
+    return _cache().get_or_load(key, load, ttl)
+
+
+def get_customer_option(conn, id_pelanggan: int, ttl: float = 0.0) -> Optional[Any]:
+    # Pelanggan yang baru dibuat di worker lain belum ada di cache proses
+    # ini; id yang tidak ditemukan dicek langsung lewat primary key agar
+    # form tidak menolak pelanggan yang sebenarnya sudah ada.
+    _, by_id, _ = _customer_options(conn, ttl)
+    customer = by_id.get(int(id_pelanggan))
+    if customer is None:
+        customer = get_customer(conn, int(id_pelanggan))
+    return customer
+
+
+def search_customer_options(
+    conn, query: str = "", page: int = 1, per_page: int = 20, ttl: float = 0.0
+) -> Dict[str, Any]:
+    rows, _, haystacks = _customer_options(conn, ttl)
+    terms = query.lower().split()
+    if terms:
+        matches = [row for row, text in zip(rows, haystacks) if all(term in text for term in terms)]
+    else:
+        matches = rows
+    page = max(1, page)
+    start = (page - 1) * per_page
+    return {
+        "results": [
+            {
+                "id": int(row["id_pelanggan"]),
+                "label": f"{row['nama_pelanggan']} ({row['username']})",
+                "nomor_kwh": row["nomor_kwh"],
+            }
+            for row in matches[start:start + per_page]
+        ],
+        "page": page,
+        "total": len(matches),
+        "has_more": start + per_page < len(matches),
+    }
+
+
+def invalidate_customers() -> None:
+    bump_version(CUSTOMERS)
+
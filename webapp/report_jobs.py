@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from flask import current_app
+
+from .db import get_db
+from .queries import iter_report_details
+
+JOB_RETENTION_SECONDS = 3600
+# Status "running" di disk yang lebih tua dari ini dianggap ditinggal
+# worker yang mati, sehingga laporan boleh dibuat ulang.
+JOB_STALE_SECONDS = 600
+
+_JOB_ID_RE = re.compile(r"^(\d+)_(\d{2})_([0-9a-f]{16})$")
+
+
+@dataclass
+class ReportJob:
+    id: str
+    tahun: int
+    bulan: int
+    version: str
+    path: str
+    status: str = "queued"
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def filename(self) -> str:
+        return f"laporan_tagihan_{self.tahun}_{self.bulan:02d}.pdf"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "tahun": self.tahun,
+            "bulan": self.bulan,
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+def report_version(report: Dict[str, Any]) -> str:
+    # Angka agregat saja tidak cukup: perubahan yang tidak menggeser total
+    # (misal meter awal/akhir) tetap harus menghasilkan PDF baru. Kolom versi
+    # di rekap naik setiap kali bulan itu dihitung ulang, jadi ikut di-hash.
+    raw = "|".join(
+        str(report.get(key))
+        for key in ("total_tagihan", "tagihan_lunas", "tagihan_belum", "total_pelanggan", "total_bayar", "versi")
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+class ReportJobManager:
+    """Pembuatan PDF laporan bulanan di background.
+
+    Id job sama dengan nama file cache (tahun, bulan, versi data) dan status
+    job ditulis ke file JSON di sampingnya, sehingga polling status bisa
+    dijawab worker mana pun yang memakai REPORT_CACHE_DIR yang sama.
+    """
+
+    def __init__(self, app, cache_dir: str, max_workers: int = 2) -> None:
+        self.app = app
+        self.cache_dir = cache_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report")
+        self._jobs: Dict[str, ReportJob] = {}
+        self._active: Dict[str, ReportJob] = {}
+        self._lock = threading.Lock()
+
+    def _cache_path(self, tahun: int, bulan: int, version: str) -> str:
+        return os.path.join(self.cache_dir, f"laporan_{tahun}_{bulan:02d}_{version}.pdf")
+
+    def _state_path(self, job: ReportJob) -> str:
+        return os.path.splitext(job.path)[0] + ".json"
+
+    def _new_job(self, tahun: int, bulan: int, version: str) -> ReportJob:
+        path = self._cache_path(tahun, bulan, version)
+        return ReportJob(f"{tahun}_{bulan:02d}_{version}", tahun, bulan, version, path)
+
+    def _write_state(self, job: ReportJob) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        state_path = self._state_path(job)
+        tmp_path = f"{state_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as output:
+            json.dump({"status": job.status, "error": job.error}, output)
+        os.replace(tmp_path, state_path)
+
+    def _read_state(self, job: ReportJob) -> Optional[ReportJob]:
+        if os.path.exists(job.path):
+            job.status = "done"
+            job.finished_at = time.time()
+            return job
+        state_path = self._state_path(job)
+        try:
+            with open(state_path, encoding="utf-8") as state_file:
+                state = json.load(state_file)
+            updated_at = os.path.getmtime(state_path)
+        except (OSError, ValueError):
+            return None
+        job.status = state.get("status", "queued")
+        job.error = state.get("error")
+        if job.status == "failed":
+            job.finished_at = updated_at
+        elif updated_at < time.time() - JOB_STALE_SECONDS:
+            return None
+        return job
+
+    def submit(self, report: Dict[str, Any]) -> ReportJob:
+        tahun, bulan = int(report["tahun"]), int(report["bulan"])
+        version = report_version(report)
+        job = self._new_job(tahun, bulan, version)
+
+        with self._lock:
+            self._prune()
+            active = self._active.get(job.path)
+            if active is not None:
+                return active
+            # Worker lain mungkin sudah selesai atau sedang membuat versi
+            # yang sama; job gagal dicoba ulang.
+            existing = self._read_state(self._new_job(tahun, bulan, version))
+            if existing is not None and existing.status != "failed":
+                self._jobs[existing.id] = existing
+                return existing
+            self._jobs[job.id] = job
+            self._active[job.path] = job
+            self._write_state(job)
+
+        self._executor.submit(self._run, job, report)
+        return job
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and (self._active.get(job.path) is job or job.status in ("done", "failed")):
+                return job
+        match = _JOB_ID_RE.match(job_id)
+        if not match:
+            return None
+        tahun, bulan, version = match.groups()
+        return self._read_state(self._new_job(int(tahun), int(bulan), version))
+
+    def _run(self, job: ReportJob, report: Dict[str, Any]) -> None:
+        from .pdf import build_monthly_report_pdf
+
+        job.status = "running"
+        tmp_path = f"{job.path}.{threading.get_ident()}.tmp"
+        try:
+            self._write_state(job)
+            with self.app.app_context():
+                conn = get_db()
+                # Detail dialirkan per batch langsung ke builder PDF.
+                details = iter_report_details(conn, job.tahun, job.bulan)
+                with closing(details), open(tmp_path, "wb") as output:
+                    build_monthly_report_pdf(report, details, output)
+            os.replace(tmp_path, job.path)
+            job.status = "done"
+            self._remove_old_versions(job)
+        except Exception as exc:
+            self.app.logger.error(
+                f"Error generating report PDF {job.tahun}-{job.bulan:02d}: {exc}"
+            )
+            job.status = "failed"
+            job.error = "Gagal membuat laporan PDF."
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            try:
+                self._write_state(job)
+            except OSError:
+                pass
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._active.pop(job.path, None)
+
+    def _remove_old_versions(self, job: ReportJob) -> None:
+        # File status versi ini juga dihapus: PDF yang ada sudah berarti selesai.
+        prefix = f"laporan_{job.tahun}_{job.bulan:02d}_"
+        keep = os.path.basename(job.path)
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix) and name.endswith((".pdf", ".json")) and name != keep:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def _prune(self) -> None:
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self._jobs[job_id]
+
+
+def get_report_jobs() -> ReportJobManager:
+    return current_app.extensions["report_jobs"]
+
+
+def init_app(app) -> None:
+    cache_dir = app.config.get("REPORT_CACHE_DIR") or os.path.join(app.instance_path, "report_cache")
+    app.extensions["report_jobs"] = ReportJobManager(
+        app, cache_dir, max_workers=app.config["REPORT_WORKERS"]
+    )
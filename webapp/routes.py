@@ -1,3 +1,5 @@
+import csv
+import io
 import time
 from functools import wraps
 from typing import Callable, Optional
@@ -9,39 +11,53 @@ from flask import (
     redirect,
     render_template,
     request,
+    send_file,
     session,
+    stream_with_context,
     url_for,
 )
 
-from app.auth import login_admin, login_pelanggan
+from app.auth import authenticate
 from app.db import execute as raw_execute
-from app.usage import create_usage, delete_usage, update_usage
-
-from .db import get_db
-from .midtrans import create_snap_token, get_snap_url, is_midtrans_enabled
+from app.report_summary import refresh_months
+from app.usage import create_usage, delete_usage, import_usage_csv, update_usage
+
+from . import search_index
+from .cache import invalidate as invalidate_cache
+from .dashboard import get_admin_dashboard
+from .export import stream_report_csv, stream_report_xlsx, xlsx_available
+from .db import get_db, get_pool
+from .instrumentation import get_query_stats
+from .notifications import (
+    get_notification_feed,
+    get_notifications_since,
+    serialize_notification,
+)
+from .midtrans import CircuitOpenError, get_midtrans_client, get_snap_url, is_midtrans_enabled
+from .proof_cache import get_proof_cache, proof_version
+from .ratelimit import get_login_limiter
+from .reference_data import get_customer_option, get_tariffs, invalidate_customers, search_customer_options
+from .settlement import bulk_settle, bulk_settle_csv, settle_bill
+from .webhooks import get_webhook_queue, parse_notification
+from .report_jobs import get_report_jobs
 from .queries import (
     create_customer,
     create_admin,
     update_admin,
     delete_admin,
-    get_admin_stats,
     get_bill,
     get_usage,
     get_last_usage_for_customer, # Added for new feature
     list_bills,
-    list_admins,
-    list_recent_payments,
-    list_monthly_reports,
+    list_bill_ids_for_usage,
+    list_bills_page,
+    list_admins_page,
+    list_monthly_reports_page,
+    list_report_years,
     get_monthly_report,
-    list_monthly_report_details,
-    get_usage_by_customer_period,
-    list_customers,
-    list_tariffs,
-    list_usages,
-    get_default_admin_id,
-    has_payment_for_bill,
-    create_payment,
-    update_bill_status,
+    iter_report_details,
+    list_customers_page,
+    list_usages_page,
     get_customer, # Import get_customer
 )
 
@@ -62,67 +78,13 @@ def login_required(role: Optional[str] = None):
     return decorator
 
 
-def _matches_query(value: Optional[object], query: str) -> bool:
-    if value is None:
-        return False
-    return query in str(value).lower()
-
-
-def _row_matches(row: dict, query: str, fields: list, extra_values: Optional[list] = None) -> bool:
-    for field in fields:
-        if _matches_query(row.get(field), query):
-            return True
-    if extra_values:
-        for value in extra_values:
-            if _matches_query(value, query):
-                return True
-    return False
-
-
-def _filter_rows(rows: list, query: str, fields: list, extra_values_fn: Optional[Callable] = None) -> list:
-    if not query:
-        return rows
-    query = query.lower()
-    filtered = []
-    for row in rows:
-        extra_values = extra_values_fn(row) if extra_values_fn else None
-        if _row_matches(row, query, fields, extra_values):
-            filtered.append(row)
-    return filtered
-
-
-def _suggest_from_rows(
-    rows: list,
-    query: str,
-    fields: list,
-    extra_values_fn: Optional[Callable] = None,
-    limit: int = 8,
-) -> list:
-    if not query:
-        return []
-    query = query.lower()
-    suggestions = []
-    seen = set()
-    for row in rows:
-        extra_values = extra_values_fn(row) if extra_values_fn else None
-        candidates = [row.get(field) for field in fields]
-        if extra_values:
-            candidates.extend(extra_values)
-        for value in candidates:
-            if value is None:
-                continue
-            text = str(value)
-            if query in text.lower() and text not in seen:
-                seen.add(text)
-                suggestions.append(text)
-                if len(suggestions) >= limit:
-                    return suggestions
-    return suggestions
-
-
 def register_routes(app: Flask) -> None:
     @app.after_request
     def add_no_cache_headers(response):
+        if response.headers.get("ETag"):
+            # Respons ber-ETag boleh disimpan browser, tapi wajib divalidasi ulang.
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
         response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
         response.headers["Pragma"] = "no-cache"
         response.headers["Expires"] = "0"
@@ -133,7 +95,7 @@ def register_routes(app: Flask) -> None:
         if session.get("role") != "admin":
             return {}
         conn = get_db()
-        notifications = list_recent_payments(conn, limit=20)
+        notifications = get_notification_feed(conn, app.config["NOTIFICATION_CACHE_TTL"])
         return {
             "admin_notifications": notifications,
             "admin_notifications_count": len(notifications),
@@ -151,24 +113,24 @@ def register_routes(app: Flask) -> None:
             username = request.form.get("username", "").strip()
             password = request.form.get("password", "")
 
-            conn = get_db()
-            user_admin = login_admin(conn, username, password)
-            if user_admin:
-                session.clear()
-                session["user_id"] = int(user_admin["id_user"])
-                session["username"] = user_admin["username"]
-                session["name"] = user_admin["nama_admin"]
-                session["role"] = "admin"
-                flash("Login berhasil.", "success")
-                return redirect(url_for("dashboard"))
+            limiter = get_login_limiter()
+            retry_after = limiter.check(username, request.remote_addr) if limiter else None
+            if retry_after is not None:
+                flash(f"Terlalu banyak percobaan login. Coba lagi dalam {int(retry_after)} detik.", "error")
+                response = app.make_response((render_template("login.html"), 429))
+                response.headers["Retry-After"] = str(int(retry_after))
+                return response
 
-            user_customer = login_pelanggan(conn, username, password)
-            if user_customer:
+            conn = get_db()
+            user = authenticate(conn, username, password)
+            if user:
+                if limiter:
+                    limiter.reset_username(username)
                 session.clear()
-                session["user_id"] = int(user_customer["id_pelanggan"])
-                session["username"] = user_customer["username"]
-                session["name"] = user_customer["nama_pelanggan"]
-                session["role"] = "pelanggan"
+                session["user_id"] = user["id"]
+                session["username"] = user["username"]
+                session["name"] = user["nama"]
+                session["role"] = user["role"]
                 flash("Login berhasil.", "success")
                 return redirect(url_for("dashboard"))
 
@@ -187,13 +149,12 @@ def register_routes(app: Flask) -> None:
         conn = get_db()
         role = session.get("role")
         if role == "admin":
-            stats = get_admin_stats(conn)
-            bills = list_bills(conn)[:5]
+            data = get_admin_dashboard(conn, app.config["DASHBOARD_CACHE_TTL"])
             return render_template(
                 "dashboard.html",
                 role=role,
-                stats=stats,
-                bills=bills,
+                stats=data["stats"],
+                bills=data["bills"],
             )
 
         bills = list_bills(conn, id_pelanggan=session["user_id"])
@@ -213,35 +174,20 @@ def register_routes(app: Flask) -> None:
             page_num = max(1, int(page))
         except ValueError:
             page_num = 1
-        per_page = 5
-        usages_all = list_usages(conn)
-        usages_all = _filter_rows(
-            usages_all,
-            query,
-            [
-                "id_penggunaan",
-                "id_pelanggan",
-                "nama_pelanggan",
-                "username",
-                "bulan",
-                "tahun",
-                "meter_awal",
-                "meter_akhir",
-                "kwh",
-            ],
-            extra_values_fn=lambda row: [f"{row.get('bulan')}/{row.get('tahun')}"],
+        result = list_usages_page(
+            conn,
+            query=query,
+            page=page_num,
+            per_page=5,
+            cursor=request.args.get("cursor"),
         )
-        total_items = len(usages_all)
-        total_pages = max(1, (total_items + per_page - 1) // per_page)
-        page_num = min(page_num, total_pages)
-        start = (page_num - 1) * per_page
-        end = start + per_page
-        usages = usages_all[start:end]
         return render_template(
             "admin/usage_list.html",
-            usages=usages,
-            page=page_num,
-            total_pages=total_pages,
+            usages=result.rows,
+            page=result.page,
+            total_pages=result.total_pages,
+            next_cursor=result.next_cursor,
+            prev_cursor=result.prev_cursor,
             q=query,
         )
 
@@ -255,34 +201,12 @@ def register_routes(app: Flask) -> None:
             page_num = max(1, int(page))
         except ValueError:
             page_num = 1
-        per_page = 5
-        customers_all = list_customers(conn)
-        customers_all = _filter_rows(
-            customers_all,
-            query,
-            [
-                "id_pelanggan",
-                "nama_pelanggan",
-                "username",
-                "nomor_kwh",
-                "alamat",
-                "id_tarif",
-                "daya",
-                "tarifperkwh",
-            ],
-            extra_values_fn=lambda row: [f"{row.get('daya')} VA"],
-        )
-        total_items = len(customers_all)
-        total_pages = max(1, (total_items + per_page - 1) // per_page)
-        page_num = min(page_num, total_pages)
-        start = (page_num - 1) * per_page
-        end = start + per_page
-        customers = customers_all[start:end]
+        result = list_customers_page(conn, query=query, page=page_num, per_page=5)
         return render_template(
             "admin/customers.html",
-            customers=customers,
-            page=page_num,
-            total_pages=total_pages,
+            customers=result.rows,
+            page=result.page,
+            total_pages=result.total_pages,
             q=query,
         )
 
@@ -290,7 +214,7 @@ def register_routes(app: Flask) -> None:
     @login_required("admin")
     def admin_customer_new():
         conn = get_db()
-        tariffs = list_tariffs(conn)
+        tariffs = get_tariffs(conn, app.config["REFERENCE_CACHE_TTL"])
 
         if request.method == "POST":
             username = request.form.get("username", "").strip()
@@ -308,7 +232,7 @@ def register_routes(app: Flask) -> None:
                 return render_template("admin/customer_form.html", tariffs=tariffs)
 
             try:
-                create_customer(
+                id_pelanggan = create_customer(
                     conn,
                     username,
                     password,
@@ -321,6 +245,8 @@ def register_routes(app: Flask) -> None:
                 flash(f"Gagal menambah pelanggan: {exc}", "error")
                 return render_template("admin/customer_form.html", tariffs=tariffs)
 
+            invalidate_customers()
+            search_index.refresh_rows(conn, "customers", [id_pelanggan])
             flash("Pelanggan berhasil ditambahkan.", "success")
             return redirect(url_for("admin_customers"))
 
@@ -336,24 +262,10 @@ def register_routes(app: Flask) -> None:
             page_num = max(1, int(page))
         except ValueError:
             page_num = 1
-        per_page = 5
-        admins_all = list_admins(conn)
-        admins_all = _filter_rows(
-            admins_all,
-            query,
-            [
-                "id_user",
-                "username",
-                "nama_admin",
-                "id_level",
-            ],
-        )
-        total_items = len(admins_all)
-        total_pages = max(1, (total_items + per_page - 1) // per_page)
-        page_num = min(page_num, total_pages)
-        start = (page_num - 1) * per_page
-        end = start + per_page
-        admins = admins_all[start:end]
+        result = list_admins_page(conn, query=query, page=page_num, per_page=5)
+        admins = result.rows
+        page_num = result.page
+        total_pages = result.total_pages
 
         if request.method == "POST":
             username = request.form.get("username", "").strip()
@@ -375,7 +287,7 @@ def register_routes(app: Flask) -> None:
                 )
 
             try:
-                create_admin(conn, username, password, nama_admin, id_level)
+                id_user = create_admin(conn, username, password, nama_admin, id_level)
             except Exception as exc:
                 flash(f"Gagal menambah admin: {exc}", "error")
                 return render_template(
@@ -386,6 +298,7 @@ def register_routes(app: Flask) -> None:
                     q=query,
                 )
 
+            search_index.refresh_rows(conn, "admins", [id_user])
             flash("Admin berhasil ditambahkan.", "success")
             return redirect(url_for("admin_admins"))
 
@@ -419,6 +332,7 @@ def register_routes(app: Flask) -> None:
             flash(f"Gagal mengubah admin: {exc}", "error")
             return redirect(url_for("admin_admins"))
 
+        search_index.refresh_rows(conn, "admins", [admin_id])
         flash("Admin berhasil diperbarui.", "success")
         return redirect(url_for("admin_admins"))
 
@@ -432,6 +346,7 @@ def register_routes(app: Flask) -> None:
             flash(f"Gagal menghapus admin: {exc}", "error")
             return redirect(url_for("admin_admins"))
 
+        search_index.refresh_rows(conn, "admins", [admin_id])
         flash("Admin berhasil dihapus.", "success")
         return redirect(url_for("admin_admins"))
 
@@ -446,24 +361,17 @@ def register_routes(app: Flask) -> None:
             page_num = max(1, int(page))
         except ValueError:
             page_num = 1
-        per_page = 5
-        reports_all = list_monthly_reports(conn)
-        if year_filter or month_filter:
-            filtered = []
-            for row in reports_all:
-                if year_filter and str(row["tahun"]) != str(year_filter):
-                    continue
-                if month_filter and str(row["bulan"]) != str(month_filter):
-                    continue
-                filtered.append(row)
-            reports_all = filtered
-        total_items = len(reports_all)
-        total_pages = max(1, (total_items + per_page - 1) // per_page)
-        page_num = min(page_num, total_pages)
-        start = (page_num - 1) * per_page
-        end = start + per_page
-        reports = reports_all[start:end]
-        years = sorted({row["tahun"] for row in reports_all}, reverse=True)
+        try:
+            year = int(year_filter) if year_filter else None
+            month = int(month_filter) if month_filter else None
+        except ValueError:
+            year = month = None
+            year_filter = month_filter = ""
+        result = list_monthly_reports_page(conn, year, month, page=page_num, per_page=5)
+        reports = result.rows
+        page_num = result.page
+        total_pages = result.total_pages
+        years = list_report_years(conn)
         return render_template(
             "admin/reports.html",
             reports=reports,
@@ -472,6 +380,7 @@ def register_routes(app: Flask) -> None:
             years=years,
             year_filter=str(year_filter),
             month_filter=str(month_filter),
+            xlsx_enabled=xlsx_available(),
         )
 
     @app.route("/admin/reports/<int:year>/<int:month>/pdf")
@@ -483,159 +392,75 @@ def register_routes(app: Flask) -> None:
             flash("Laporan tidak ditemukan.", "error")
             return redirect(url_for("admin_reports"))
 
-        from io import BytesIO
-        from reportlab.lib.pagesizes import letter, landscape
-        from reportlab.lib.styles import getSampleStyleSheet
-        from reportlab.lib.units import inch
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-        from reportlab.lib.enums import TA_CENTER
-        from reportlab.lib import colors
-        from flask import send_file
-        from pathlib import Path
-
-        details = list_monthly_report_details(conn, year, month)
-
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=landscape(letter), leftMargin=36, rightMargin=36, topMargin=36, bottomMargin=36)
-        styles = getSampleStyleSheet()
-
-        title_style = styles["Heading1"].clone("title_style")
-        title_style.alignment = TA_CENTER
-
-        elements = []
-
-        logo_path = Path("assets/Logo-LSPBSI.png")
-        if logo_path.exists():
-            elements.append(Image(str(logo_path), width=1.2 * inch, height=1.2 * inch))
-            elements.append(Spacer(1, 0.1 * inch))
-
-        elements.append(Paragraph("LAPORAN BULANAN TAGIHAN LISTRIK", title_style))
-        elements.append(Spacer(1, 0.25 * inch))
-
-        month_names = [
-            "Januari",
-            "Februari",
-            "Maret",
-            "April",
-            "Mei",
-            "Juni",
-            "Juli",
-            "Agustus",
-            "September",
-            "Oktober",
-            "November",
-            "Desember",
-        ]
-        month_label = month_names[month - 1] if 1 <= month <= 12 else str(month)
-
-        summary_data = [
-            ["Keterangan", "Nilai"],
-            ["Periode", f"{report['bulan']}/{report['tahun']}"],
-            ["Total Pelanggan", str(report["total_pelanggan"])],
-            ["Total Tagihan", str(report["total_tagihan"])],
-            ["Tagihan Lunas", str(report["tagihan_lunas"])],
-            ["Belum Bayar", str(report["tagihan_belum"])],
-            [f"Total Pendapatan {month_label} {report['tahun']}", f"Rp {report['total_bayar']:,}".replace(",", ".")],
-        ]
-
-        table = Table(summary_data, colWidths=[2.8 * inch, 3.2 * inch])
-        table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0f5b4a")),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                    ("ALIGN", (0, 0), (-1, 0), "CENTER"),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 11),
-                    ("BACKGROUND", (0, 1), (-1, -1), colors.white),
-                    ("TEXTCOLOR", (0, 1), (-1, -1), colors.black),
-                    ("ALIGN", (0, 1), (0, -1), "LEFT"),
-                    ("ALIGN", (1, 1), (1, -1), "LEFT"),
-                    ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
-                    ("FONTSIZE", (0, 1), (-1, -1), 11),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 10),
-                    ("TOPPADDING", (0, 0), (-1, -1), 10),
-                    ("LEFTPADDING", (0, 0), (-1, -1), 8),
-                    ("RIGHTPADDING", (0, 0), (-1, -1), 8),
-                    ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                    ("GRID", (0, 0), (-1, -1), 0.6, colors.HexColor("#d9d2c9")),
-                ]
+        job = get_report_jobs().submit(report)
+        if job.status == "done":
+            return send_file(
+                job.path,
+                as_attachment=True,
+                download_name=job.filename,
+                mimetype="application/pdf",
             )
-        )
+        return render_template("admin/report_job.html", job=job)
 
-        elements.append(table)
-        elements.append(Spacer(1, 0.3 * inch))
-        elements.append(Spacer(1, 0.25 * inch))
-
-        detail_header = [
-            "No",
-            "Nama Pelanggan",
-            "No KWH",
-            "Alamat",
-            "Meter Awal",
-            "Meter Akhir",
-            "Jumlah Meter",
-            "Tarif/kWh",
-            "Total Bayar",
-            "Status",
-        ]
-        detail_rows = [detail_header]
-        for idx, row in enumerate(details, start=1):
-            meter_awal = row.get("meter_awal")
-            meter_akhir = row.get("meter_akhir")
-            detail_rows.append(
-                [
-                    str(idx),
-                    row.get("nama_pelanggan") or "-",
-                    row.get("nomor_kwh") or "-",
-                    row.get("alamat") or "-",
-                    "-" if meter_awal is None else str(meter_awal),
-                    "-" if meter_akhir is None else str(meter_akhir),
-                    str(row.get("jumlah_meter") or 0),
-                    f"Rp {row['tarifperkwh']:,}".replace(",", "."),
-                    f"Rp {row['total_bayar']:,}".replace(",", "."),
-                    row.get("status") or "-",
-                ]
-            )
-
-        detail_col_widths = [0.45 * inch, 1.5 * inch, 1.0 * inch, 2.0 * inch, 0.85 * inch, 0.85 * inch, 0.95 * inch, 1.0 * inch, 1.1 * inch, 1.0 * inch]
-        detail_table = Table(detail_rows, colWidths=detail_col_widths, repeatRows=1)
-        detail_table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0f5b4a")),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 9),
-                    ("ALIGN", (0, 0), (-1, 0), "CENTER"),
-                    ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                    ("FONTSIZE", (0, 1), (-1, -1), 8),
-                    ("GRID", (0, 0), (-1, -1), 0.4, colors.HexColor("#d9d2c9")),
-                    ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f7f2eb")]),
-                ]
-            )
-        )
-        elements.append(detail_table)
+    @app.route("/admin/reports/export")
+    @login_required("admin")
+    def admin_report_export():
+        try:
+            year = int(request.args.get("year", ""))
+            month = int(request.args["month"]) if request.args.get("month") else None
+        except ValueError:
+            flash("Periode laporan tidak valid.", "error")
+            return redirect(url_for("admin_reports"))
+        if month is not None and not 1 <= month <= 12:
+            flash("Periode laporan tidak valid.", "error")
+            return redirect(url_for("admin_reports"))
 
-        footer_text = "Ringkasan berdasarkan data tagihan."
-        printed_text = f"Tanggal Cetak: {time.strftime('%d-%m-%Y %H:%M:%S')}"
+        export_format = request.args.get("format", "csv")
+        if export_format not in ("csv", "xlsx"):
+            flash("Format export tidak dikenal.", "error")
+            return redirect(url_for("admin_reports"))
+        if export_format == "xlsx" and not xlsx_available():
+            flash("Export XLSX membutuhkan paket xlsxwriter.", "error")
+            return redirect(url_for("admin_reports"))
 
-        def draw_footer(canvas, doc):
-            canvas.saveState()
-            canvas.setFont("Helvetica", 9)
-            canvas.setFillColor(colors.grey)
-            canvas.drawString(doc.leftMargin, 18, footer_text)
-            canvas.drawRightString(doc.pagesize[0] - doc.rightMargin, 18, printed_text)
-            canvas.restoreState()
+        conn = get_db()
+        rows = iter_report_details(conn, year, month, chunk_size=app.config["REPORT_EXPORT_CHUNK_SIZE"])
+        if export_format == "xlsx":
+            body = stream_report_xlsx(rows)
+            mimetype = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        else:
+            body = stream_report_csv(rows)
+            mimetype = "text/csv"
 
-        doc.build(elements, onFirstPage=draw_footer, onLaterPages=draw_footer)
-        buffer.seek(0)
+        period = f"{year}_{month:02d}" if month else str(year)
+        response = app.response_class(stream_with_context(body), mimetype=mimetype)
+        response.headers["Content-Disposition"] = (
+            f'attachment; filename="laporan_tagihan_{period}.{export_format}"'
+        )
+        return response
 
-        filename = f"laporan_tagihan_{year}_{month:02d}.pdf"
+    @app.route("/admin/reports/jobs/<job_id>")
+    @login_required("admin")
+    def admin_report_job_status(job_id: str):
+        job = get_report_jobs().get(job_id)
+        if not job:
+            return jsonify({"status": "missing"}), 404
+        data = job.to_dict()
+        if job.status == "done":
+            data["download_url"] = url_for("admin_report_job_download", job_id=job.id)
+        return jsonify(data)
+
+    @app.route("/admin/reports/jobs/<job_id>/download")
+    @login_required("admin")
+    def admin_report_job_download(job_id: str):
+        job = get_report_jobs().get(job_id)
+        if not job or job.status != "done":
+            flash("Laporan belum siap atau tidak ditemukan.", "error")
+            return redirect(url_for("admin_reports"))
         return send_file(
-            buffer,
+            job.path,
             as_attachment=True,
-            download_name=filename,
+            download_name=job.filename,
             mimetype="application/pdf",
         )
 
@@ -643,7 +468,6 @@ def register_routes(app: Flask) -> None:
     @login_required("admin")
     def admin_usage_new():
         conn = get_db()
-        customers = list_customers(conn)
 
         if request.method == "POST":
             try:
@@ -654,31 +478,65 @@ def register_routes(app: Flask) -> None:
                 meter_akhir = int(request.form.get("meter_akhir", "0"))
             except ValueError:
                 flash("Input angka tidak valid.", "error")
-                return render_template(
-                    "admin/usage_form.html", customers=customers, usage=None
-                )
+                return render_template("admin/usage_form.html", customer=None, usage=None)
+
+            customer = get_customer_option(conn, id_pelanggan, app.config["REFERENCE_CACHE_TTL"])
+            if not customer:
+                flash("Pelanggan tidak ditemukan.", "error")
+                return render_template("admin/usage_form.html", customer=None, usage=None)
 
             if meter_akhir < meter_awal:
                 flash("Meter akhir harus lebih besar dari meter awal.", "error")
-                return render_template(
-                    "admin/usage_form.html", customers=customers, usage=None
-                )
+                return render_template("admin/usage_form.html", customer=customer, usage=None)
 
-            create_usage(conn, id_pelanggan, bulan, tahun, meter_awal, meter_akhir)
+            id_penggunaan = create_usage(conn, id_pelanggan, bulan, tahun, meter_awal, meter_akhir)
+            search_index.refresh_usage(conn, id_penggunaan)
             flash("Data penggunaan berhasil ditambahkan.", "success")
             return redirect(url_for("admin_usages"))
 
-        return render_template("admin/usage_form.html", customers=customers, usage=None)
+        return render_template("admin/usage_form.html", customer=None, usage=None)
+
+    @app.route("/admin/usages/import", methods=["GET", "POST"])
+    @login_required("admin")
+    def admin_usage_import():
+        if request.method == "POST":
+            upload = request.files.get("file")
+            if not upload or not upload.filename:
+                flash("Pilih file CSV terlebih dahulu.", "error")
+                return render_template("admin/usage_import.html", result=None)
+
+            conn = get_db()
+            stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+            try:
+                result = import_usage_csv(
+                    conn, stream, chunk_size=app.config["USAGE_IMPORT_CHUNK_SIZE"]
+                )
+            except (UnicodeDecodeError, csv.Error) as exc:
+                flash(f"File CSV tidak valid: {exc}", "error")
+                return render_template("admin/usage_import.html", result=None)
+
+            if result.inserted:
+                search_index.invalidate("usages", "bills")
+                invalidate_cache("dashboard")
+            category = "success" if not result.rejected else "error"
+            flash(
+                f"Import selesai: {result.inserted} baris berhasil, {result.rejected} ditolak.",
+                category,
+            )
+            return render_template("admin/usage_import.html", result=result)
+
+        return render_template("admin/usage_import.html", result=None)
 
     @app.route("/admin/usages/<int:id_penggunaan>/edit", methods=["GET", "POST"])
     @login_required("admin")
     def admin_usage_edit(id_penggunaan: int):
         conn = get_db()
-        customers = list_customers(conn)
         usage = get_usage(conn, id_penggunaan)
         if not usage:
             flash("Data penggunaan tidak ditemukan.", "error")
             return redirect(url_for("admin_usages"))
+        ttl = app.config["REFERENCE_CACHE_TTL"]
+        customer = get_customer_option(conn, usage["id_pelanggan"], ttl)
 
         if request.method == "POST":
             try:
@@ -689,15 +547,21 @@ def register_routes(app: Flask) -> None:
                 meter_akhir = int(request.form.get("meter_akhir", usage["meter_akhir"]))
             except ValueError:
                 flash("Input angka tidak valid.", "error")
-                return render_template(
-                    "admin/usage_form.html", customers=customers, usage=usage
-                )
+                return render_template("admin/usage_form.html", customer=customer, usage=usage)
+
+            if id_pelanggan != usage["id_pelanggan"]:
+                customer = get_customer_option(conn, id_pelanggan, ttl)
+                if not customer:
+                    flash("Pelanggan tidak ditemukan.", "error")
+                    return render_template(
+                        "admin/usage_form.html",
+                        customer=get_customer_option(conn, usage["id_pelanggan"], ttl),
+                        usage=usage,
+                    )
 
             if meter_akhir < meter_awal:
                 flash("Meter akhir harus lebih besar dari meter awal.", "error")
-                return render_template(
-                    "admin/usage_form.html", customers=customers, usage=usage
-                )
+                return render_template("admin/usage_form.html", customer=customer, usage=usage)
 
             update_usage(conn, id_penggunaan, meter_awal, meter_akhir)
             if id_pelanggan != usage["id_pelanggan"] or bulan != usage["bulan"] or tahun != usage["tahun"]:
@@ -705,17 +569,21 @@ def register_routes(app: Flask) -> None:
                     "UPDATE penggunaan SET id_pelanggan = %s, bulan = %s, tahun = %s WHERE id_penggunaan = %s"
                 )
                 raw_execute(conn, execute_sql, (id_pelanggan, bulan, tahun, id_penggunaan))
+                refresh_months(conn, [(usage["tahun"], usage["bulan"]), (tahun, bulan)])
 
+            search_index.refresh_usage(conn, id_penggunaan)
             flash("Data penggunaan berhasil diperbarui.", "success")
             return redirect(url_for("admin_usages"))
 
-        return render_template("admin/usage_form.html", customers=customers, usage=usage)
+        return render_template("admin/usage_form.html", customer=customer, usage=usage)
 
     @app.route("/admin/usages/<int:id_penggunaan>/delete", methods=["POST"])
     @login_required("admin")
     def admin_usage_delete(id_penggunaan: int):
         conn = get_db()
+        bill_ids = list_bill_ids_for_usage(conn, id_penggunaan)
         delete_usage(conn, id_penggunaan)
+        search_index.refresh_usage(conn, id_penggunaan, bill_ids)
         flash("Data penggunaan berhasil dihapus.", "success")
         return redirect(url_for("admin_usages"))
 
@@ -735,38 +603,22 @@ def register_routes(app: Flask) -> None:
             status_filter = "BELUM BAYAR"
         elif status == "paid":
             status_filter = "SUDAH BAYAR"
-        per_page = 5
-        bills_all = list_bills(conn, status=status_filter)
-        bills_all = _filter_rows(
-            bills_all,
-            query,
-            [
-                "id_tagihan",
-                "id_pelanggan",
-                "nama_pelanggan",
-                "username",
-                "nomor_kwh",
-                "bulan",
-                "tahun",
-                "jumlah_meter",
-                "status",
-                "tarifperkwh",
-                "total_bayar",
-            ],
-            extra_values_fn=lambda row: [f"{row.get('bulan')}/{row.get('tahun')}"],
+        result = list_bills_page(
+            conn,
+            query=query,
+            status=status_filter,
+            page=page_num,
+            per_page=5,
+            cursor=request.args.get("cursor"),
         )
-        total_items = len(bills_all)
-        total_pages = max(1, (total_items + per_page - 1) // per_page)
-        page_num = min(page_num, total_pages)
-        start = (page_num - 1) * per_page
-        end = start + per_page
-        bills = bills_all[start:end]
         return render_template(
             "admin/bills.html",
-            bills=bills,
+            bills=result.rows,
             status=status,
-            page=page_num,
-            total_pages=total_pages,
+            page=result.page,
+            total_pages=result.total_pages,
+            next_cursor=result.next_cursor,
+            prev_cursor=result.prev_cursor,
             q=query,
         )
 
@@ -776,84 +628,27 @@ def register_routes(app: Flask) -> None:
         conn = get_db()
         section = request.args.get("section", "").strip().lower()
         query = request.args.get("q", "").strip()
-        suggestions = []
-
-        if section == "admins":
-            rows = list_admins(conn)
-            suggestions = _suggest_from_rows(
-                rows,
-                query,
-                ["id_user", "username", "nama_admin", "id_level"],
-            )
-        elif section == "customers":
-            rows = list_customers(conn)
-            suggestions = _suggest_from_rows(
-                rows,
-                query,
-                [
-                    "id_pelanggan",
-                    "nama_pelanggan",
-                    "username",
-                    "nomor_kwh",
-                    "alamat",
-                    "id_tarif",
-                    "daya",
-                    "tarifperkwh",
-                ],
-                extra_values_fn=lambda row: [f"{row.get('daya')} VA"],
-            )
-        elif section == "usages":
-            rows = list_usages(conn)
-            suggestions = _suggest_from_rows(
-                rows,
-                query,
-                [
-                    "id_penggunaan",
-                    "id_pelanggan",
-                    "nama_pelanggan",
-                    "username",
-                    "bulan",
-                    "tahun",
-                    "meter_awal",
-                    "meter_akhir",
-                    "kwh",
-                ],
-                extra_values_fn=lambda row: [f"{row.get('bulan')}/{row.get('tahun')}"],
-            )
-        elif section == "bills":
+        status_filter = None
+        if section == "bills":
             status = request.args.get("status")
-            status_filter = None
             if status == "unpaid":
                 status_filter = "BELUM BAYAR"
             elif status == "paid":
                 status_filter = "SUDAH BAYAR"
-            rows = list_bills(conn, status=status_filter)
-            suggestions = _suggest_from_rows(
-                rows,
-                query,
-                [
-                    "id_tagihan",
-                    "id_pelanggan",
-                    "nama_pelanggan",
-                    "username",
-                    "nomor_kwh",
-                    "bulan",
-                    "tahun",
-                    "jumlah_meter",
-                    "status",
-                    "tarifperkwh",
-                    "total_bayar",
-                ],
-                extra_values_fn=lambda row: [f"{row.get('bulan')}/{row.get('tahun')}"],
-            )
 
+        suggestions = search_index.suggest(
+            conn,
+            section,
+            query,
+            filter_value=status_filter,
+            max_age=app.config["SEARCH_INDEX_MAX_AGE"],
+        )
         return jsonify({"suggestions": suggestions})
 
     @app.route("/admin/bills/new", methods=["GET", "POST"])
     @login_required("admin")
     def admin_bill_new():
         conn = get_db()
-        customers = list_customers(conn)
 
         if request.method == "POST":
             try:
@@ -864,39 +659,73 @@ def register_routes(app: Flask) -> None:
                 meter_akhir = int(request.form.get("meter_akhir", "0"))
             except ValueError:
                 flash("Input angka tidak valid.", "error")
-                return render_template("admin/bill_form.html", customers=customers)
+                return render_template("admin/bill_form.html", customer=None)
+
+            customer = get_customer_option(conn, id_pelanggan, app.config["REFERENCE_CACHE_TTL"])
+            if not customer:
+                flash("Pelanggan tidak ditemukan.", "error")
+                return render_template("admin/bill_form.html", customer=None)
 
             if meter_akhir < meter_awal:
                 flash("Meter akhir harus lebih besar dari meter awal.", "error")
-                return render_template("admin/bill_form.html", customers=customers)
+                return render_template("admin/bill_form.html", customer=customer)
 
-            create_usage(conn, id_pelanggan, bulan, tahun, meter_awal, meter_akhir)
+            id_penggunaan = create_usage(conn, id_pelanggan, bulan, tahun, meter_awal, meter_akhir)
+            search_index.refresh_usage(conn, id_penggunaan)
             flash("Tagihan berhasil dibuat dari data penggunaan.", "success")
             return redirect(url_for("admin_bills"))
 
-        return render_template("admin/bill_form.html", customers=customers)
+        return render_template("admin/bill_form.html", customer=None)
 
     @app.route("/admin/bills/<int:id_tagihan>/mark-paid", methods=["POST"])
     @login_required("admin")
     def admin_bill_mark_paid(id_tagihan: int):
         conn = get_db()
-        bill = get_bill(conn, id_tagihan)
-        if bill:
-            if not has_payment_for_bill(conn, id_tagihan):
-                create_payment(
-                    conn,
-                    id_tagihan=id_tagihan,
-                    id_pelanggan=bill["id_pelanggan"],
-                    tanggal_pembayaran=time.strftime("%Y-%m-%d"),
-                    bulan_bayar=int(bill["bulan"]),
-                    biaya_admin=0.0,
-                    total_bayar=float(bill["total_bayar"]),
-                    id_user=int(session.get("user_id")),
-                )
-        update_bill_status(conn, id_tagihan, "SUDAH BAYAR")
-        flash("Tagihan ditandai lunas.", "success")
+        if settle_bill(conn, id_tagihan, id_user=int(session.get("user_id"))):
+            flash("Tagihan ditandai lunas.", "success")
+        else:
+            flash("Tagihan tidak ditemukan.", "error")
         return redirect(url_for("admin_bills"))
 
+    @app.route("/admin/bills/settle", methods=["GET", "POST"])
+    @login_required("admin")
+    def admin_bills_bulk_settle():
+        if request.method == "GET":
+            return render_template("admin/bill_settle.html", result=None)
+
+        conn = get_db()
+        id_user = int(session.get("user_id"))
+        batch_size = app.config["BULK_SETTLE_BATCH_SIZE"]
+        if request.is_json:
+            payload = request.get_json(silent=True) or {}
+            ids = payload.get("id_tagihan")
+            if not isinstance(ids, list):
+                return jsonify({"error": "id_tagihan harus berupa list."}), 400
+            return jsonify(bulk_settle(conn, ids, id_user=id_user, batch_size=batch_size).to_dict())
+
+        upload = request.files.get("file")
+        if upload and upload.filename:
+            stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+            try:
+                result = bulk_settle_csv(conn, stream, id_user=id_user, batch_size=batch_size)
+            except (UnicodeDecodeError, csv.Error) as exc:
+                flash(f"File CSV tidak valid: {exc}", "error")
+                return render_template("admin/bill_settle.html", result=None)
+        else:
+            ids = request.form.getlist("id_tagihan")
+            if not ids:
+                flash("Pilih tagihan atau unggah file rekonsiliasi terlebih dahulu.", "error")
+                return redirect(url_for("admin_bills", status="unpaid"))
+            result = bulk_settle(conn, ids, id_user=id_user, batch_size=batch_size)
+
+        category = "success" if not (result.not_found or result.rejected) else "error"
+        flash(
+            f"{result.paid} tagihan ditandai lunas, {result.already_paid} sudah lunas sebelumnya, "
+            f"{result.not_found + result.rejected} tidak diproses.",
+            category,
+        )
+        return render_template("admin/bill_settle.html", result=result)
+
     @app.route("/admin/customers/<int:customer_id>/history")
     @login_required("admin")
     def admin_customer_bill_history(customer_id: int):
@@ -939,12 +768,14 @@ def register_routes(app: Flask) -> None:
 
         if midtrans_enabled:
             try:
-                snap_token = create_snap_token(
-                    config,
+                snap_token = get_midtrans_client().create_snap_token(
                     order_id,
                     amount,
                     {"name": bill["nama_pelanggan"]},
                 )
+            except CircuitOpenError:
+                midtrans_enabled = False
+                error_message = "Midtrans sedang tidak tersedia. Silakan gunakan simulasi pembayaran atau coba lagi nanti."
             except Exception as exc:
                 midtrans_enabled = False
                 error_message = f"Gagal membuat transaksi Midtrans: {exc}"
@@ -970,60 +801,38 @@ def register_routes(app: Flask) -> None:
             flash("Tagihan tidak ditemukan.", "error")
             return redirect(url_for("customer_bills"))
 
-        if not has_payment_for_bill(conn, id_tagihan):
-            admin_id = get_default_admin_id(conn)
-            if admin_id:
-                create_payment(
-                    conn,
-                    id_tagihan=id_tagihan,
-                    id_pelanggan=bill["id_pelanggan"],
-                    tanggal_pembayaran=time.strftime("%Y-%m-%d"),
-                    bulan_bayar=int(bill["bulan"]),
-                    biaya_admin=0.0,
-                    total_bayar=float(bill["total_bayar"]),
-                    id_user=admin_id,
-                )
-        update_bill_status(conn, id_tagihan, "SUDAH BAYAR")
+        settle_bill(conn, id_tagihan)
         flash("Pembayaran simulasi berhasil.", "success")
         return redirect(url_for("customer_bills"))
 
     @app.route("/payments/notify", methods=["POST"])
     def payments_notify():
         payload = request.get_json(silent=True) or {}
-        order_id = payload.get("order_id", "")
-        transaction_status = payload.get("transaction_status", "")
-
-        if not order_id or not transaction_status:
+        notification = parse_notification(payload)
+        if notification is None:
             return jsonify({"status": "invalid"}), 400
 
-        parts = order_id.split("-")
-        id_tagihan = None
-        if len(parts) >= 2 and parts[1].isdigit():
-            id_tagihan = int(parts[1])
-
-        if not id_tagihan:
-            return jsonify({"status": "invalid"}), 400
-
-        if transaction_status in {"settlement", "capture", "success"}:
-            conn = get_db()
-            bill = get_bill(conn, id_tagihan)
-            if bill and not has_payment_for_bill(conn, id_tagihan):
-                admin_id = get_default_admin_id(conn)
-                if admin_id:
-                    create_payment(
-                        conn,
-                        id_tagihan=id_tagihan,
-                        id_pelanggan=bill["id_pelanggan"],
-                        tanggal_pembayaran=time.strftime("%Y-%m-%d"),
-                        bulan_bayar=int(bill["bulan"]),
-                        biaya_admin=0.0,
-                        total_bayar=float(bill["total_bayar"]),
-                        id_user=admin_id,
-                    )
-            update_bill_status(conn, id_tagihan, "SUDAH BAYAR")
-
+        order_id, transaction_status, id_tagihan = notification
+        get_webhook_queue().enqueue(get_db(), order_id, transaction_status, id_tagihan, payload)
         return jsonify({"status": "ok"})
 
+    @app.route("/admin/api/customer-options")
+    @login_required("admin")
+    def api_customer_options():
+        try:
+            page = max(1, int(request.args.get("page", "1")))
+        except ValueError:
+            page = 1
+        return jsonify(
+            search_customer_options(
+                get_db(),
+                request.args.get("q", "").strip(),
+                page=page,
+                per_page=20,
+                ttl=app.config["REFERENCE_CACHE_TTL"],
+            )
+        )
+
     @app.route("/admin/api/get_last_usage/<int:customer_id>")
     @login_required("admin")
     def api_get_last_usage(customer_id: int):
@@ -1043,6 +852,53 @@ def register_routes(app: Flask) -> None:
         # If no previous usage, return None for pre-fill fields
         return jsonify({"bulan": None, "tahun": None, "meter_awal": None})
 
+    @app.route("/admin/api/notifications")
+    @login_required("admin")
+    def api_admin_notifications():
+        try:
+            since_id = max(0, int(request.args.get("since", "0")))
+        except ValueError:
+            since_id = 0
+        conn = get_db()
+        rows = get_notifications_since(conn, since_id, app.config["NOTIFICATION_CACHE_TTL"])
+        latest_id = max([since_id] + [int(row["id_pembayaran"]) for row in rows])
+        return jsonify(
+            {
+                "notifications": [serialize_notification(row) for row in rows],
+                "latest_id": latest_id,
+            }
+        )
+
+    @app.route("/admin/api/db-pool")
+    @login_required("admin")
+    def api_db_pool_stats():
+        return jsonify(get_pool().stats())
+
+    @app.route("/admin/api/db-queries")
+    @login_required("admin")
+    def api_db_query_stats():
+        query_stats = get_query_stats()
+        if query_stats is None:
+            return jsonify({"enabled": False})
+        limit = min(max(request.args.get("limit", 20, type=int), 1), 200)
+        return jsonify(query_stats.stats(limit))
+
+    @app.route("/admin/api/login-throttle")
+    @login_required("admin")
+    def api_login_throttle_stats():
+        limiter = get_login_limiter()
+        return jsonify(limiter.stats() if limiter else {"enabled": False})
+
+    @app.route("/admin/api/midtrans")
+    @login_required("admin")
+    def api_midtrans_stats():
+        return jsonify(get_midtrans_client().stats())
+
+    @app.route("/admin/api/webhooks")
+    @login_required("admin")
+    def api_webhook_stats():
+        return jsonify(get_webhook_queue().stats(get_db()))
+
     @app.route("/api/bill-details/<int:id_tagihan>")
     @login_required("pelanggan")
     def get_bill_details_api(id_tagihan: int):
@@ -1052,16 +908,6 @@ def register_routes(app: Flask) -> None:
             return jsonify({"error": "Tagihan tidak ditemukan atau Anda tidak memiliki akses."}), 404
         return jsonify(bill)
 
-    from io import BytesIO # Ensure BytesIO is imported
-    from reportlab.lib.pagesizes import letter # Ensure letter is imported
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle # PageBreak removed as it's not used
-    from reportlab.lib.enums import TA_CENTER, TA_RIGHT
-    from reportlab.lib import colors # Import colors
-    from flask import send_file, current_app
-    from pathlib import Path
-
     @app.route("/download-bill-proof/<int:id_tagihan>")
     @login_required("pelanggan")
     def download_bill_proof(id_tagihan: int):
@@ -1076,178 +922,24 @@ def register_routes(app: Flask) -> None:
             flash("Bukti pembayaran hanya tersedia untuk tagihan yang sudah dibayar.", "error")
             return redirect(url_for("customer_bills"))
 
-        try:
-            usage = get_usage_by_customer_period(conn, bill["id_pelanggan"], bill["bulan"], bill["tahun"])
-            buffer = BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
-            styles = getSampleStyleSheet()
-
-            style_title = styles["Heading1"].clone("style_title")
-            style_title.fontSize = 18
-            style_title.leading = 22
-            style_title.alignment = TA_RIGHT
-            style_title.fontName = "Helvetica-Bold"
-
-            style_label = styles["Normal"].clone("style_label")
-            style_label.fontSize = 10
-            style_label.textColor = colors.HexColor("#6e6258")
-
-            style_value = styles["Normal"].clone("style_value")
-            style_value.fontSize = 11
-            style_value.fontName = "Helvetica-Bold"
-
-            style_section = styles["Heading2"].clone("style_section")
-            style_section.fontSize = 12
-            style_section.leading = 16
-            style_section.textColor = colors.HexColor("#0f5b4a")
-
-            elements = []
-
-            logo_path = Path("assets/Logo-LSPBSI.png")
-            logo_img = None
-            if logo_path.exists():
-                logo_img = Image(str(logo_path), width=1.1 * inch, height=1.1 * inch)
-
-            header_left = logo_img if logo_img else ""
-            header_center = Paragraph("<b>LSP Pascabayar</b><br/>Bukti Pembayaran Tagihan Listrik", styles["Normal"])
-            header_right = Paragraph(f"INVOICE<br/><b>#{bill['id_tagihan']}</b>", style_title)
-
-            header_table = Table(
-                [[header_left, header_center, header_right]],
-                colWidths=[1.3 * inch, 3.5 * inch, 1.7 * inch],
-            )
-            header_table.setStyle(
-                TableStyle(
-                    [
-                        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                        ("ALIGN", (2, 0), (2, 0), "RIGHT"),
-                        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-                    ]
-                )
-            )
-            elements.append(header_table)
-            elements.append(Spacer(1, 0.1 * inch))
-
-            meta_table = Table(
-                [
-                    [
-                        Paragraph("Tanggal Cetak", style_label),
-                        Paragraph(time.strftime("%d-%m-%Y %H:%M:%S"), style_value),
-                        Paragraph("Status", style_label),
-                        Paragraph(bill["status"], style_value),
-                    ]
-                ],
-                colWidths=[1.2 * inch, 2.0 * inch, 0.8 * inch, 1.5 * inch],
-            )
-            meta_table.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, -1), colors.HexColor("#f7f2eb")),
-                        ("BOX", (0, 0), (-1, -1), 0.6, colors.HexColor("#d9d2c9")),
-                        ("LEFTPADDING", (0, 0), (-1, -1), 8),
-                        ("RIGHTPADDING", (0, 0), (-1, -1), 8),
-                        ("TOPPADDING", (0, 0), (-1, -1), 6),
-                        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-                    ]
-                )
-            )
-            elements.append(meta_table)
-            elements.append(Spacer(1, 0.2 * inch))
-
-            elements.append(Paragraph("Detail Pelanggan", style_section))
-            customer_data = [
-                ["Nama Pelanggan", bill["nama_pelanggan"]],
-                ["Nomor KWH", bill["nomor_kwh"]],
-                ["Alamat", bill["alamat"]],
-            ]
-            customer_table = Table(customer_data, colWidths=[1.7 * inch, 4.1 * inch])
-            customer_table.setStyle(
-                TableStyle(
-                    [
-                        ("TEXTCOLOR", (0, 0), (0, -1), colors.HexColor("#6e6258")),
-                        ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
-                        ("FONTSIZE", (0, 0), (-1, -1), 10),
-                        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-                    ]
-                )
-            )
-            elements.append(customer_table)
-            elements.append(Spacer(1, 0.2 * inch))
-
-            elements.append(Paragraph("Detail Tagihan", style_section))
-            month_names = [
-                "Januari",
-                "Februari",
-                "Maret",
-                "April",
-                "Mei",
-                "Juni",
-                "Juli",
-                "Agustus",
-                "September",
-                "Oktober",
-                "November",
-                "Desember",
-            ]
-            month_index = bill["bulan"] - 1 if 1 <= bill["bulan"] <= 12 else None
-            month_label = month_names[month_index] if month_index is not None else str(bill["bulan"])
-            prev_month_index = (month_index - 1) if month_index is not None else None
-            prev_month_label = month_names[prev_month_index] if prev_month_index is not None else "-"
-
-            meter_awal = usage["meter_awal"] if usage else None
-            meter_akhir = usage["meter_akhir"] if usage else None
-            bill_data = [
-                ["Periode", f"{month_label} {bill['tahun']}"],
-                [f"Meter Akhir {prev_month_label}", "-" if meter_awal is None else str(meter_awal)],
-                [f"Meter Akhir {month_label}", "-" if meter_akhir is None else str(meter_akhir)],
-                ["Total Meter", f"{bill['jumlah_meter']} KWH"],
-                ["Tarif/kWh", f"Rp {bill['tarifperkwh']:,}".replace(",", ".")],
-                ["Total Bayar", f"Rp {bill['total_bayar']:,}".replace(",", ".")],
-            ]
-            bill_table = Table(bill_data, colWidths=[1.7 * inch, 4.1 * inch])
-            bill_table.setStyle(
-                TableStyle(
-                    [
-                        ("TEXTCOLOR", (0, 0), (0, -1), colors.HexColor("#6e6258")),
-                        ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
-                        ("FONTSIZE", (0, 0), (-1, -1), 10),
-                        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-                        ("LINEABOVE", (0, -1), (-1, -1), 0.8, colors.HexColor("#d9d2c9")),
-                        ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
-                    ]
-                )
-            )
-            elements.append(bill_table)
-            elements.append(Spacer(1, 0.25 * inch))
-
-            total_box = Table(
-                [[Paragraph("TOTAL PEMBAYARAN", style_label), Paragraph(f"Rp {bill['total_bayar']:,}".replace(",", "."), style_value)]],
-                colWidths=[3.2 * inch, 2.6 * inch],
-            )
-            total_box.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, -1), colors.HexColor("#e8f1ee")),
-                        ("TEXTCOLOR", (0, 0), (-1, -1), colors.HexColor("#0f5b4a")),
-                        ("ALIGN", (1, 0), (1, 0), "RIGHT"),
-                        ("LEFTPADDING", (0, 0), (-1, -1), 10),
-                        ("RIGHTPADDING", (0, 0), (-1, -1), 10),
-                        ("TOPPADDING", (0, 0), (-1, -1), 8),
-                        ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
-                    ]
-                )
-            )
-            elements.append(total_box)
-            elements.append(Spacer(1, 0.2 * inch))
-
-            elements.append(Paragraph("Ini adalah bukti pembayaran resmi. Harap simpan sebagai referensi Anda.", styles["Normal"]))
-            elements.append(Paragraph("Terima kasih atas pembayaran Anda.", styles["Normal"]))
-
-            doc.build(elements)
-            buffer.seek(0)
+        proof_cache = get_proof_cache()
+        etag = proof_version(bill)
+        if etag in request.if_none_match:
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
 
+        try:
+            path = proof_cache.get_or_render(conn, bill)
             filename = f"bukti_pembayaran_tagihan_{id_tagihan}.pdf"
-            return send_file(buffer, as_attachment=True, download_name=filename, mimetype='application/pdf')
+            return send_file(
+                path,
+                as_attachment=True,
+                download_name=filename,
+                mimetype="application/pdf",
+                etag=etag,
+                conditional=True,
+            )
         except Exception as e:
-            current_app.logger.error(f"Error generating or sending PDF for bill {id_tagihan}: {e}")
+            app.logger.error(f"Error generating or sending PDF for bill {id_tagihan}: {e}")
             return jsonify({"error": "Terjadi kesalahan saat membuat bukti pembayaran. Silakan coba lagi."}), 500
@@ -0,0 +1,343 @@
+import bisect
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from flask import current_app
+
+from .db import get_db
+from .queries import (
+    list_admins,
+    list_bill_ids_for_usage,
+    list_bills,
+    list_customers,
+    list_usages,
+)
+
+# Panjang n-gram terpanjang yang diindeks. Query sepanjang ini atau kurang
+# langsung dijawab satu posting list; query lebih panjang memakai posting
+# list n-gram yang paling jarang lalu dicek dengan `in`.
+GRAM_SIZE = 3
+
+
+def _grams(lowered: str) -> Set[str]:
+    return {
+        lowered[start:start + size]
+        for size in range(1, GRAM_SIZE + 1)
+        for start in range(len(lowered) - size + 1)
+    }
+
+
+class SuggestionIndex:
+    """Indeks n-gram untuk saran pencarian pada satu section admin.
+
+    Yang diindeks adalah teks unik (bukan baris), sehingga nilai berulang
+    seperti status atau tahun hanya disimpan sekali. Setiap n-gram (1 sampai
+    GRAM_SIZE huruf) menunjuk ke list teks yang terurut, sehingga saran
+    cocok di posisi mana pun dalam teks, sama seperti `LIKE %q%` di halaman
+    daftar, dan top-k cukup diambil dari awal list.
+    """
+
+    def __init__(
+        self,
+        id_field: str,
+        fields: List[str],
+        extra_values_fn: Optional[Callable[[Dict[str, Any]], List[Any]]] = None,
+        filter_field: Optional[str] = None,
+    ) -> None:
+        self.id_field = id_field
+        self.fields = fields
+        self.extra_values_fn = extra_values_fn
+        self.filter_field = filter_field
+        self.built_at: Optional[float] = None
+        self._lock = threading.RLock()
+        self._postings: Dict[str, List[Tuple[str, str]]] = {}
+        self._rows: Dict[Any, Tuple[Any, Tuple[str, ...]]] = {}
+        self._counts: Dict[str, Counter] = {}
+
+    def _row_texts(self, row: Dict[str, Any]) -> Tuple[str, ...]:
+        values = [row.get(field) for field in self.fields]
+        if self.extra_values_fn:
+            values.extend(self.extra_values_fn(row))
+        texts = dict.fromkeys(str(value) for value in values if value is not None)
+        return tuple(texts)
+
+    def _add_text(self, text: str, filter_value: Any) -> None:
+        counts = self._counts.get(text)
+        if counts is None:
+            counts = self._counts[text] = Counter()
+            entry = (text.lower(), text)
+            for gram in _grams(entry[0]):
+                bisect.insort(self._postings.setdefault(gram, []), entry)
+        counts[filter_value] += 1
+
+    def _remove_text(self, text: str, filter_value: Any) -> None:
+        counts = self._counts.get(text)
+        if counts is None:
+            return
+        counts[filter_value] -= 1
+        if counts[filter_value] <= 0:
+            del counts[filter_value]
+        if counts:
+            return
+        del self._counts[text]
+        entry = (text.lower(), text)
+        for gram in _grams(entry[0]):
+            posting = self._postings.get(gram)
+            if posting is None:
+                continue
+            pos = bisect.bisect_left(posting, entry)
+            if pos < len(posting) and posting[pos] == entry:
+                del posting[pos]
+            if not posting:
+                del self._postings[gram]
+
+    def build(self, rows: Iterable[Dict[str, Any]]) -> None:
+        postings: Dict[str, List[Tuple[str, str]]] = {}
+        stored: Dict[Any, Tuple[Any, Tuple[str, ...]]] = {}
+        counts: Dict[str, Counter] = {}
+        for row in rows:
+            filter_value = row.get(self.filter_field) if self.filter_field else None
+            texts = self._row_texts(row)
+            stored[row[self.id_field]] = (filter_value, texts)
+            for text in texts:
+                if text not in counts:
+                    counts[text] = Counter()
+                    entry = (text.lower(), text)
+                    for gram in _grams(entry[0]):
+                        postings.setdefault(gram, []).append(entry)
+                counts[text][filter_value] += 1
+        for posting in postings.values():
+            posting.sort()
+        with self._lock:
+            self._postings = postings
+            self._rows = stored
+            self._counts = counts
+            self.built_at = time.monotonic()
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        with self._lock:
+            self.remove(row[self.id_field])
+            filter_value = row.get(self.filter_field) if self.filter_field else None
+            texts = self._row_texts(row)
+            self._rows[row[self.id_field]] = (filter_value, texts)
+            for text in texts:
+                self._add_text(text, filter_value)
+
+    def remove(self, row_id: Any) -> None:
+        with self._lock:
+            stored = self._rows.pop(row_id, None)
+            if stored is None:
+                return
+            filter_value, texts = stored
+            for text in texts:
+                self._remove_text(text, filter_value)
+
+    def suggest(self, query: str, limit: int = 8, filter_value: Any = None) -> List[str]:
+        needle = query.strip().lower()
+        if not needle:
+            return []
+        suggestions: List[str] = []
+        with self._lock:
+            if len(needle) <= GRAM_SIZE:
+                candidates = self._postings.get(needle, [])
+            else:
+                postings = [
+                    self._postings.get(needle[start:start + GRAM_SIZE], [])
+                    for start in range(len(needle) - GRAM_SIZE + 1)
+                ]
+                candidates = min(postings, key=len)
+            for lowered, text in candidates:
+                if needle not in lowered:
+                    continue
+                if filter_value is not None and not self._counts[text].get(filter_value):
+                    continue
+                suggestions.append(text)
+                if len(suggestions) >= limit:
+                    break
+        return suggestions
+
+
+SECTIONS: Dict[str, Dict[str, Any]] = {
+    "admins": {
+        "id_field": "id_user",
+        "fields": ["id_user", "username", "nama_admin", "id_level"],
+        "load": lambda conn, row_id=None: list_admins(conn, id_user=row_id),
+    },
+    "customers": {
+        "id_field": "id_pelanggan",
+        "fields": [
+            "id_pelanggan",
+            "nama_pelanggan",
+            "username",
+            "nomor_kwh",
+            "alamat",
+            "id_tarif",
+            "daya",
+            "tarifperkwh",
+        ],
+        "extra_values_fn": lambda row: [f"{row.get('daya')} VA"],
+        "load": lambda conn, row_id=None: list_customers(conn, id_pelanggan=row_id),
+    },
+    "usages": {
+        "id_field": "id_penggunaan",
+        "fields": [
+            "id_penggunaan",
+            "id_pelanggan",
+            "nama_pelanggan",
+            "username",
+            "bulan",
+            "tahun",
+            "meter_awal",
+            "meter_akhir",
+            "kwh",
+        ],
+        "extra_values_fn": lambda row: [f"{row.get('bulan')}/{row.get('tahun')}"],
+        "load": lambda conn, row_id=None: list_usages(conn, id_penggunaan=row_id),
+    },
+    "bills": {
+        "id_field": "id_tagihan",
+        "fields": [
+            "id_tagihan",
+            "id_pelanggan",
+            "nama_pelanggan",
+            "username",
+            "nomor_kwh",
+            "bulan",
+            "tahun",
+            "jumlah_meter",
+            "status",
+            "tarifperkwh",
+            "total_bayar",
+        ],
+        "extra_values_fn": lambda row: [f"{row.get('bulan')}/{row.get('tahun')}"],
+        "filter_field": "status",
+        "load": lambda conn, row_id=None: list_bills(conn, id_tagihan=row_id),
+    },
+}
+
+_indexes: Dict[str, SuggestionIndex] = {}
+_section_locks = {section: threading.Lock() for section in SECTIONS}
+# Section yang sedang dibangun ulang di background, beserta id baris yang
+# berubah selama itu dan harus diterapkan ulang ke indeks baru. None berarti
+# section di-invalidate selama rebuild sehingga hasilnya dibuang.
+_rebuilding: Dict[str, Optional[Set[Any]]] = {}
+_build_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-index")
+
+
+def _new_index(spec: Dict[str, Any]) -> SuggestionIndex:
+    return SuggestionIndex(
+        spec["id_field"],
+        spec["fields"],
+        spec.get("extra_values_fn"),
+        spec.get("filter_field"),
+    )
+
+
+def get_index(conn, section: str, max_age: float = 0.0) -> Optional[SuggestionIndex]:
+    spec = SECTIONS.get(section)
+    if spec is None:
+        return None
+    index = _indexes.get(section)
+    if index is None:
+        # Hanya pembangunan pertama yang ditunggu request.
+        with _section_locks[section]:
+            index = _indexes.get(section)
+            if index is None:
+                index = _new_index(spec)
+                index.build(spec["load"](conn))
+                _indexes[section] = index
+    elif max_age > 0 and time.monotonic() - index.built_at >= max_age:
+        # Indeks lama tetap dipakai selama versi baru dibangun di background.
+        with _build_lock:
+            if section in _rebuilding:
+                return index
+            _rebuilding[section] = set()
+        _executor.submit(_rebuild, current_app._get_current_object(), section)
+    return index
+
+
+def _rebuild(app, section: str) -> None:
+    spec = SECTIONS[section]
+    try:
+        with app.app_context():
+            conn = get_db()
+            fresh = _new_index(spec)
+            fresh.build(spec["load"](conn))
+            while True:
+                with _build_lock:
+                    changed = _rebuilding[section]
+                    if changed is None:
+                        return
+                    if not changed:
+                        _indexes[section] = fresh
+                        return
+                    _rebuilding[section] = set()
+                _refresh_index(conn, fresh, spec["load"], changed)
+    except Exception as exc:
+        app.logger.error(f"Error rebuilding search index {section}: {exc}")
+    finally:
+        with _build_lock:
+            _rebuilding.pop(section, None)
+
+
+def suggest(
+    conn,
+    section: str,
+    query: str,
+    filter_value: Any = None,
+    limit: int = 8,
+    max_age: float = 0.0,
+) -> List[str]:
+    if not query.strip():
+        return []
+    index = get_index(conn, section, max_age)
+    if index is None:
+        return []
+    return index.suggest(query, limit=limit, filter_value=filter_value)
+
+
+def invalidate(*sections: str) -> None:
+    with _build_lock:
+        for section in sections:
+            _indexes.pop(section, None)
+            if section in _rebuilding:
+                _rebuilding[section] = None
+
+
+def refresh_rows(conn, section: str, row_ids: Iterable[Any]) -> None:
+    """Memperbarui baris tertentu pada indeks yang sudah dibangun.
+
+    Baris yang tidak lagi ditemukan di database dihapus dari indeks.
+    """
+    row_ids = list(row_ids)
+    with _build_lock:
+        if _rebuilding.get(section) is not None:
+            _rebuilding[section].update(row_ids)
+    index = _indexes.get(section)
+    if index is None:
+        return
+    _refresh_index(conn, index, SECTIONS[section]["load"], row_ids)
+
+
+def _refresh_index(
+    conn, index: SuggestionIndex, load: Callable[..., List[Dict[str, Any]]], row_ids: Iterable[Any]
+) -> None:
+    for row_id in row_ids:
+        rows = load(conn, row_id)
+        if rows:
+            index.upsert(rows[0])
+        else:
+            index.remove(row_id)
+
+
+def refresh_usage(conn, id_penggunaan: int, bill_ids: Optional[Iterable[int]] = None) -> None:
+    if "usages" not in _indexes and "bills" not in _indexes:
+        return
+    refresh_rows(conn, "usages", [id_penggunaan])
+    if bill_ids is None:
+        bill_ids = list_bill_ids_for_usage(conn, id_penggunaan)
+    refresh_rows(conn, "bills", bill_ids)
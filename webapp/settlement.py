@@ -0,0 +1,303 @@
+import csv
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, TextIO, Tuple
+
+from app.db import execute, fetch_all, transaction
+from app.report_summary import refresh_months
+
+from . import search_index
+from .cache import invalidate
+from .proof_cache import get_proof_cache
+
+PAID_STATUS = "SUDAH BAYAR"
+# Di atas jumlah ini indeks pencarian tagihan dibangun ulang saat dipakai
+# berikutnya dan PDF bukti bayar dibuat saat diunduh, bukan per tagihan.
+REFRESH_ROWS_LIMIT = 50
+
+
+@dataclass
+class SettlementResult:
+    settled: List[int] = field(default_factory=list)
+    newly_paid: List[int] = field(default_factory=list)
+    missing: List[int] = field(default_factory=list)
+    periods: Set[Tuple[int, int]] = field(default_factory=set)
+
+
+def _placeholders(values: List[int]) -> str:
+    return ", ".join(["%s"] * len(values))
+
+
+def apply_settlement(conn, bill_ids: Iterable[int], id_user: Optional[int] = None) -> SettlementResult:
+    # Dipanggil di dalam transaksi milik pemanggil (lihat settle_bills).
+    # Tagihan dikunci lebih dulu dengan SELECT ... FOR UPDATE, sehingga
+    # proses lain yang menyelesaikan tagihan yang sama menunggu commit ini
+    # lalu melihat pembayaran yang sudah ada: tidak ada pembayaran ganda
+    # walaupun pembayaran.id_tagihan belum punya unique key.
+    ids = sorted({int(id_tagihan) for id_tagihan in bill_ids})
+    result = SettlementResult()
+    if not ids:
+        return result
+
+    bills = fetch_all(
+        conn,
+        f"SELECT id_tagihan, tahun, bulan, status FROM tagihan WHERE id_tagihan IN ({_placeholders(ids)}) FOR UPDATE",
+        tuple(ids),
+    )
+    result.settled = sorted(int(bill["id_tagihan"]) for bill in bills)
+    result.newly_paid = sorted(int(bill["id_tagihan"]) for bill in bills if bill["status"] != PAID_STATUS)
+    result.missing = sorted(set(ids) - set(result.settled))
+    result.periods = {(int(bill["tahun"]), int(bill["bulan"])) for bill in bills}
+    if not result.settled:
+        return result
+
+    # Pembayaran dibuat langsung dari data tagihan dalam satu statement.
+    # Tanpa id_user (pembayaran online/simulasi) dipakai admin pertama;
+    # jika belum ada admin sama sekali, pembayaran tidak dibuat seperti
+    # alur sebelumnya. ON DUPLICATE KEY membuat insert tetap aman jika
+    # tabel diberi `UNIQUE KEY (id_tagihan)`.
+    placeholders = _placeholders(result.settled)
+    execute(
+        conn,
+        f"""
+        INSERT INTO pembayaran (id_tagihan, id_pelanggan, tanggal_pembayaran, bulan_bayar, biaya_admin, total_bayar, id_user)
+        SELECT t.id_tagihan, t.id_pelanggan, CURDATE(), t.bulan, 0,
+               ROUND(t.jumlah_meter * tr.tarifperkwh, 0), COALESCE(%s, u.id_user)
+        FROM tagihan t
+        JOIN pelanggan pl ON pl.id_pelanggan = t.id_pelanggan
+        JOIN tarif tr ON tr.id_tarif = pl.id_tarif
+        CROSS JOIN (SELECT MIN(id_user) AS id_user FROM user) u
+        WHERE t.id_tagihan IN ({placeholders})
+          AND COALESCE(%s, u.id_user) IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM pembayaran p WHERE p.id_tagihan = t.id_tagihan)
+        ON DUPLICATE KEY UPDATE pembayaran.id_tagihan = pembayaran.id_tagihan
+        """,
+        (id_user, *result.settled, id_user),
+        commit=False,
+    )
+    if result.newly_paid:
+        execute(
+            conn,
+            f"UPDATE tagihan SET status = %s WHERE id_tagihan IN ({_placeholders(result.newly_paid)})",
+            (PAID_STATUS, *result.newly_paid),
+            commit=False,
+        )
+    return result
+
+
+def after_settlement(conn, result: SettlementResult) -> None:
+    # Pekerjaan turunan dijalankan setelah commit agar kunci tagihan tidak
+    # ditahan selama rekap, indeks pencarian, dan antrean PDF diperbarui.
+    if not result.settled:
+        return
+    invalidate("dashboard", "notifications")
+    if not result.newly_paid:
+        return
+    refresh_months(conn, result.periods)
+    if len(result.newly_paid) > REFRESH_ROWS_LIMIT:
+        search_index.invalidate("bills")
+        return
+    search_index.refresh_rows(conn, "bills", result.newly_paid)
+    proof_cache = get_proof_cache()
+    for id_tagihan in result.newly_paid:
+        proof_cache.render_async(id_tagihan)
+
+
+def settle_bills(conn, bill_ids: Iterable[int], id_user: Optional[int] = None) -> SettlementResult:
+    with transaction(conn):
+        result = apply_settlement(conn, bill_ids, id_user=id_user)
+    after_settlement(conn, result)
+    return result
+
+
+def settle_bill(conn, id_tagihan: int, id_user: Optional[int] = None) -> bool:
+    return bool(settle_bills(conn, [id_tagihan], id_user=id_user).settled)
+
+
+# =====================
+# PELUNASAN MASSAL
+# =====================
+@dataclass
+class BulkSettlementItem:
+    reference: str
+    status: str
+    id_tagihan: Optional[int] = None
+    line: Optional[int] = None
+    reason: str = ""
+
+
+@dataclass
+class BulkSettlementResult:
+    total: int = 0
+    paid: int = 0
+    already_paid: int = 0
+    not_found: int = 0
+    rejected: int = 0
+    items: List[BulkSettlementItem] = field(default_factory=list)
+
+    def add(self, item: BulkSettlementItem) -> None:
+        self.items.append(item)
+        if item.status == "paid":
+            self.paid += 1
+        elif item.status == "already_paid":
+            self.already_paid += 1
+        elif item.status == "not_found":
+            self.not_found += 1
+        else:
+            self.rejected += 1
+
+    @property
+    def problems(self) -> List[BulkSettlementItem]:
+        return [item for item in self.items if item.status != "paid"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["items"] = [asdict(item) for item in self.items]
+        return data
+
+
+def _parse_reconciliation_row(row: Dict[str, Optional[str]]) -> Tuple[Optional[Dict[str, Any]], str]:
+    id_raw = (row.get("id_tagihan") or "").strip()
+    order_id = (row.get("order_id") or "").strip()
+    nomor_kwh = (row.get("nomor_kwh") or "").strip()
+    if id_raw:
+        if not id_raw.isdigit():
+            return None, f"Kolom id_tagihan harus berupa angka (nilai: '{id_raw}')"
+        return {"reference": id_raw, "id_tagihan": int(id_raw)}, ""
+    if order_id:
+        # Format order_id Midtrans dari aplikasi ini: INV-<id_tagihan>-<waktu>.
+        parts = order_id.split("-")
+        if len(parts) < 2 or not parts[1].isdigit():
+            return None, f"Format order_id tidak dikenal: '{order_id}'"
+        return {"reference": order_id, "id_tagihan": int(parts[1])}, ""
+    if nomor_kwh:
+        try:
+            bulan = int((row.get("bulan") or "").strip())
+            tahun = int((row.get("tahun") or "").strip())
+        except ValueError:
+            return None, "Kolom bulan dan tahun wajib berupa angka jika memakai nomor_kwh"
+        return {"reference": f"{nomor_kwh} {bulan}/{tahun}", "period": (nomor_kwh, bulan, tahun)}, ""
+    return None, "Kolom id_tagihan, order_id, atau nomor_kwh + bulan + tahun wajib diisi"
+
+
+def _resolve_periods(conn, periods: Set[Tuple[str, int, int]]) -> Dict[Tuple[str, int, int], int]:
+    if not periods:
+        return {}
+    params: List[Any] = []
+    for period in periods:
+        params.extend(period)
+    group = ", ".join(["(%s, %s, %s)"] * len(periods))
+    rows = fetch_all(
+        conn,
+        f"""
+        SELECT t.id_tagihan, pl.nomor_kwh, t.bulan, t.tahun
+        FROM tagihan t
+        JOIN pelanggan pl ON pl.id_pelanggan = t.id_pelanggan
+        WHERE (pl.nomor_kwh, t.bulan, t.tahun) IN ({group})
+        """,
+        tuple(params),
+    )
+    return {(str(row["nomor_kwh"]), int(row["bulan"]), int(row["tahun"])): int(row["id_tagihan"]) for row in rows}
+
+
+class _BulkSettlement:
+    def __init__(self, conn, id_user: Optional[int], batch_size: int) -> None:
+        self.conn = conn
+        self.id_user = id_user
+        self.batch_size = batch_size
+        self.result = BulkSettlementResult()
+        self.combined = SettlementResult()
+        self.seen: Set[int] = set()
+        self.pending: List[Tuple[Optional[int], Dict[str, Any]]] = []
+
+    def add(self, line: Optional[int], entry: Dict[str, Any]) -> None:
+        self.result.total += 1
+        self.pending.append((line, entry))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def reject(self, line: Optional[int], reference: str, reason: str) -> None:
+        self.add(line, {"reference": reference, "reason": reason})
+
+    def flush(self) -> None:
+        chunk, self.pending = self.pending, []
+        if not chunk:
+            return
+        resolved = _resolve_periods(self.conn, {entry["period"] for _, entry in chunk if "period" in entry})
+        planned: List[BulkSettlementItem] = []
+        targets: List[int] = []
+        for line, entry in chunk:
+            item = BulkSettlementItem(entry["reference"], "", line=line, reason=entry.get("reason", ""))
+            planned.append(item)
+            if item.reason:
+                item.status = "rejected"
+                continue
+            item.id_tagihan = entry.get("id_tagihan", resolved.get(entry.get("period")))
+            if item.id_tagihan is None:
+                item.status = "not_found"
+            elif item.id_tagihan in self.seen:
+                item.status = "duplicate"
+                item.reason = "Tagihan sudah ada di baris sebelumnya"
+            else:
+                self.seen.add(item.id_tagihan)
+                targets.append(item.id_tagihan)
+
+        with transaction(self.conn):
+            settlement = apply_settlement(self.conn, targets, id_user=self.id_user)
+        newly_paid = set(settlement.newly_paid)
+        settled = set(settlement.settled)
+        for item in planned:
+            if not item.status:
+                if item.id_tagihan in newly_paid:
+                    item.status = "paid"
+                elif item.id_tagihan in settled:
+                    item.status = "already_paid"
+                else:
+                    item.status = "not_found"
+            self.result.add(item)
+        self.combined.settled.extend(settlement.settled)
+        self.combined.newly_paid.extend(settlement.newly_paid)
+        self.combined.periods |= settlement.periods
+
+    def finish(self) -> BulkSettlementResult:
+        self.flush()
+        after_settlement(self.conn, self.combined)
+        return self.result
+
+
+def bulk_settle(
+    conn, bill_ids: Iterable[Any], id_user: Optional[int] = None, batch_size: int = 500
+) -> BulkSettlementResult:
+    """Melunasi banyak tagihan sekaligus, satu transaksi per batch.
+
+    Setiap id menghasilkan satu item di hasil: paid, already_paid,
+    not_found, duplicate, atau rejected.
+    """
+    bulk = _BulkSettlement(conn, id_user, batch_size)
+    for raw in bill_ids:
+        text = str(raw).strip()
+        if text.isdigit():
+            bulk.add(None, {"reference": text, "id_tagihan": int(text)})
+        else:
+            bulk.reject(None, text, "id_tagihan harus berupa angka")
+    return bulk.finish()
+
+
+def bulk_settle_csv(
+    conn, stream: TextIO, id_user: Optional[int] = None, batch_size: int = 500
+) -> BulkSettlementResult:
+    """Melunasi tagihan dari file rekonsiliasi CSV yang dibaca per batch.
+
+    Kolom: id_tagihan, atau order_id (INV-<id_tagihan>-...), atau
+    nomor_kwh + bulan + tahun.
+    """
+    bulk = _BulkSettlement(conn, id_user, batch_size)
+    reader = csv.DictReader(stream)
+    for row in reader:
+        line = reader.line_num
+        entry, reason = _parse_reconciliation_row(row)
+        if entry is None:
+            reference = ", ".join(value.strip() for value in row.values() if isinstance(value, str) and value.strip())
+            bulk.reject(line, reference, reason)
+            continue
+        bulk.add(line, entry)
+    return bulk.finish()
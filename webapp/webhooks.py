@@ -0,0 +1,262 @@
+import json
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+
+from app.db import execute, fetch_all, transaction
+
+from .db import get_db
+from .settlement import SettlementResult, after_settlement, apply_settlement
+
+QUEUE_TABLE = "webhook_pembayaran"
+SETTLED_STATUSES = {"settlement", "capture", "success"}
+MAX_ATTEMPTS = 5
+# Klaim yang tidak selesai dalam waktu ini (misal worker mati) diambil ulang.
+CLAIM_TIMEOUT_SECONDS = 300
+
+_CREATE_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {QUEUE_TABLE} (
+        id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        order_id VARCHAR(64) NOT NULL,
+        transaction_status VARCHAR(32) NOT NULL,
+        id_tagihan INT NOT NULL,
+        payload TEXT NOT NULL,
+        status VARCHAR(16) NOT NULL DEFAULT 'pending',
+        attempts INT NOT NULL DEFAULT 0,
+        claim_token CHAR(32) NULL,
+        claimed_at DATETIME NULL,
+        error VARCHAR(255) NULL,
+        diterima_pada TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        diproses_pada DATETIME NULL,
+        UNIQUE KEY uq_webhook_order_status (order_id, transaction_status),
+        KEY idx_webhook_status (status, id),
+        KEY idx_webhook_claim (claim_token)
+    )
+"""
+
+
+def parse_notification(payload: Dict[str, Any]) -> Optional[Tuple[str, str, int]]:
+    order_id = str(payload.get("order_id") or "")
+    transaction_status = str(payload.get("transaction_status") or "")
+    if not order_id or not transaction_status:
+        return None
+    parts = order_id.split("-")
+    if len(parts) < 2 or not parts[1].isdigit():
+        return None
+    return order_id, transaction_status, int(parts[1])
+
+
+class WebhookQueue:
+    """Antrean notifikasi pembayaran Midtrans yang disimpan di database.
+
+    Endpoint hanya menyimpan notifikasi mentah lalu langsung membalas.
+    Worker mengklaim notifikasi per batch dan menyelesaikan tagihannya dalam
+    satu transaksi. Notifikasi yang sama (order_id + status) yang dikirim
+    ulang Midtrans hanya disimpan sekali.
+    """
+
+    def __init__(self, app, workers: int = 2, batch_size: int = 100, poll_interval: float = 5.0) -> None:
+        self.app = app
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._table_ready = False
+        self._counters = {"received": 0, "duplicates": 0, "batches": 0, "settled": 0, "ignored": 0, "failed_batches": 0}
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def ensure_table(self, conn) -> None:
+        if self._table_ready:
+            return
+        execute(conn, _CREATE_TABLE_SQL)
+        self._table_ready = True
+
+    def enqueue(self, conn, order_id: str, transaction_status: str, id_tagihan: int, payload: Dict[str, Any]) -> bool:
+        self.ensure_table(conn)
+        inserted = execute(
+            conn,
+            f"""
+            INSERT IGNORE INTO {QUEUE_TABLE} (order_id, transaction_status, id_tagihan, payload)
+            VALUES (%s, %s, %s, %s)
+            """,
+            (order_id, transaction_status, id_tagihan, json.dumps(payload)),
+        )
+        self._count("received" if inserted else "duplicates")
+        self.start()
+        self._wakeup.set()
+        return bool(inserted)
+
+    # Worker dijalankan saat request pertama masuk (lihat init_app), bukan
+    # saat app dibuat, sehingga proses CLI/test yang membuat app tidak ikut
+    # menjalankan thread polling. Setelah restart, notifikasi yang masih
+    # pending atau klaim worker yang mati tetap diproses tanpa menunggu
+    # notifikasi baru.
+    def start(self) -> None:
+        if self._threads or self.workers <= 0:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"webhook-{number}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self) -> None:
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                with self.app.app_context():
+                    self.drain(get_db())
+            except Exception as exc:
+                self.app.logger.error(f"Error processing payment webhooks: {exc}")
+
+    def drain(self, conn) -> int:
+        total = 0
+        while True:
+            processed = self.process_batch(conn)
+            if not processed:
+                return total
+            total += processed
+
+    def _claim(self, conn) -> Tuple[str, List[Dict[str, Any]]]:
+        # Klaim lewat UPDATE ... LIMIT (bukan SELECT ... SKIP LOCKED) agar
+        # tetap jalan di MySQL 5.7/MariaDB dan aman untuk banyak worker/proses.
+        token = uuid.uuid4().hex
+        execute(
+            conn,
+            f"""
+            UPDATE {QUEUE_TABLE}
+            SET status = 'processing', claim_token = %s, claimed_at = NOW()
+            WHERE status = 'pending'
+               OR (status = 'processing' AND claimed_at < NOW() - INTERVAL %s SECOND)
+            ORDER BY id
+            LIMIT %s
+            """,
+            (token, CLAIM_TIMEOUT_SECONDS, self.batch_size),
+        )
+        rows = fetch_all(
+            conn,
+            f"""
+            SELECT id, order_id, transaction_status, id_tagihan, attempts
+            FROM {QUEUE_TABLE}
+            WHERE claim_token = %s AND status = 'processing'
+            ORDER BY id
+            """,
+            (token,),
+        )
+        return token, rows
+
+    def process_batch(self, conn) -> int:
+        self.ensure_table(conn)
+        token, rows = self._claim(conn)
+        if not rows:
+            return 0
+        try:
+            result = self._apply(conn, token, rows)
+        except Exception as exc:
+            self.app.logger.warning(f"Webhook batch failed, retrying row by row: {exc}")
+            self._count("failed_batches")
+            result = self._apply_rows(conn, token, rows)
+        else:
+            self._count("batches")
+        after_settlement(conn, result)
+        return len(rows)
+
+    def _apply_rows(self, conn, token: str, rows: List[Dict[str, Any]]) -> SettlementResult:
+        # Satu notifikasi yang bermasalah tidak boleh menahan notifikasi lain
+        # di batch yang sama: setiap baris diulang dalam transaksinya sendiri
+        # dan hanya baris yang gagal yang dilepas dan dihitung percobaannya.
+        combined = SettlementResult()
+        for row in rows:
+            try:
+                result = self._apply(conn, token, [row])
+            except Exception as exc:
+                self.app.logger.error(f"Error processing payment webhook {row['order_id']}: {exc}")
+                self._release(conn, token, str(exc), row["id"])
+                continue
+            combined.settled.extend(result.settled)
+            combined.newly_paid.extend(result.newly_paid)
+            combined.periods |= result.periods
+        return combined
+
+    def _apply(self, conn, token: str, rows: List[Dict[str, Any]]) -> SettlementResult:
+        bill_ids = [int(row["id_tagihan"]) for row in rows if row["transaction_status"] in SETTLED_STATUSES]
+        with transaction(conn):
+            result = apply_settlement(conn, bill_ids)
+            found = set(result.settled)
+            done_ids = [
+                row["id"]
+                for row in rows
+                if row["transaction_status"] in SETTLED_STATUSES and int(row["id_tagihan"]) in found
+            ]
+            done = set(done_ids)
+            ignored_ids = [row["id"] for row in rows if row["id"] not in done]
+            for status, ids in (("done", done_ids), ("ignored", ignored_ids)):
+                if ids:
+                    placeholders = ", ".join(["%s"] * len(ids))
+                    execute(
+                        conn,
+                        f"""
+                        UPDATE {QUEUE_TABLE}
+                        SET status = %s, claim_token = NULL, diproses_pada = NOW(), error = NULL
+                        WHERE claim_token = %s AND id IN ({placeholders})
+                        """,
+                        (status, token, *ids),
+                        commit=False,
+                    )
+        self._count("settled", len(done_ids))
+        self._count("ignored", len(ignored_ids))
+        return result
+
+    def _release(self, conn, token: str, error: str, row_id: int) -> None:
+        execute(
+            conn,
+            f"""
+            UPDATE {QUEUE_TABLE}
+            SET attempts = attempts + 1,
+                status = IF(attempts >= %s, 'failed', 'pending'),
+                claim_token = NULL,
+                error = %s
+            WHERE claim_token = %s AND id = %s
+            """,
+            (MAX_ATTEMPTS, error[:255], token, row_id),
+        )
+
+    def stats(self, conn) -> Dict[str, Any]:
+        self.ensure_table(conn)
+        rows = fetch_all(conn, f"SELECT status, COUNT(*) AS total FROM {QUEUE_TABLE} GROUP BY status")
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._counters)
+        stats["workers"] = len(self._threads)
+        stats["queue"] = {row["status"]: int(row["total"]) for row in rows}
+        return stats
+
+
+def get_webhook_queue() -> WebhookQueue:
+    return current_app.extensions["webhook_queue"]
+
+
+def init_app(app) -> None:
+    queue = WebhookQueue(
+        app,
+        workers=app.config["WEBHOOK_WORKERS"],
+        batch_size=app.config["WEBHOOK_BATCH_SIZE"],
+        poll_interval=app.config["WEBHOOK_POLL_INTERVAL"],
+    )
+    app.extensions["webhook_queue"] = queue
+    app.before_request(queue.start)
+
+    @app.cli.command("drain-webhooks")
+    def drain_webhooks() -> None:
+        """Proses semua notifikasi pembayaran yang masih antre lalu keluar."""
+        total = queue.drain(get_db())
+        print(f"Notifikasi diproses: {total}")